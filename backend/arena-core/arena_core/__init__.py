@@ -0,0 +1 @@
+# Shared runtime for the Python backends
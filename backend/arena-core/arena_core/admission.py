@@ -0,0 +1,421 @@
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import AbstractSet, Any, Dict, Iterable, List, Optional, Tuple
+
+from arena_core.serialization import to_json
+
+
+def _refill(
+    tokens: float, updated: float, now: float, rate: float, burst: float
+) -> Tuple[float, float]:
+    """
+    Takes one token from a bucket last seen at `updated` holding `tokens`. Returns the
+    tokens left and the seconds to wait, which is 0 when the token was granted
+    """
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class RateLimitStore:
+    """
+    Token buckets keyed by client. `take` returns 0 when a request is allowed, or how
+    many seconds to wait until it would be
+    """
+
+    # Takes that failed and let the request through
+    errors = 0
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    Buckets of a single worker. The least recently seen clients are dropped past
+    `max_keys`; a dropped bucket simply starts full again
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens, wait = _refill(tokens, updated, now, rate, burst)
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """
+    Buckets kept in a SQLite file, so every uvicorn worker on a host enforces the same
+    limit. Each take is one short write transaction run off the event loop. A take that
+    cannot get the write lock within `timeout` seconds lets the request through rather
+    than failing it: the in-flight and queue limits still apply
+    """
+
+    def __init__(self, path: str, timeout: float = 1.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._takes = 0
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        try:
+            return await asyncio.to_thread(self._take, key, rate, burst)
+        except sqlite3.OperationalError:
+            # Typically "database is locked" under contention between workers
+            self.errors += 1
+            return 0.0
+
+    def _take(self, key: str, rate: float, burst: float) -> float:
+        # Wall-clock time, since the buckets are shared between processes
+        now = time.time()
+        with self._lock:
+            # Outside the try: a BEGIN that failed leaves nothing to roll back
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM rate_limits WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row or (burst, now)
+                tokens, wait = _refill(tokens, updated, now, rate, burst)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._takes += 1
+                if self._takes % 1000 == 0:
+                    # Buckets idle long enough to be full again carry no state
+                    self._conn.execute(
+                        "DELETE FROM rate_limits WHERE updated < ?",
+                        (now - burst / rate,),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class Rejected(Exception):
+    """
+    A request turned away by admission control
+    """
+
+    def __init__(self, status: int, reason: str, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Admission Control - Decides whether a request may run now, wait or be rejected.
+
+    Each client gets a token bucket of `rate` requests per second with bursts of up to
+    `burst` (429 when empty) and at most `client_max_in_flight` requests running at once
+    (429). Across all clients at most `max_in_flight` requests run at once and up to
+    `max_queue` more wait, each for at most `queue_timeout` seconds. A full queue or an
+    expired wait is answered with 503. Rejections carry a Retry-After hint, so clients
+    back off instead of timing out together.
+
+    In-flight limits are per worker. Rate limits are per worker too unless the store is
+    shared, such as SQLiteRateLimitStore.
+
+    Clients are told apart by address. An `x-api-key` header only identifies a client
+    when the key is one of `api_keys`, since a client could otherwise send a new key
+    with every request to get a fresh bucket.
+    """
+
+    wait_buckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_queue: int = 128,
+        queue_timeout: float = 5.0,
+        client_max_in_flight: int = 0,
+        rate: float = 0.0,
+        burst: float = 20.0,
+        store: Optional[RateLimitStore] = None,
+        api_keys: AbstractSet[str] = frozenset(),
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_max_in_flight = client_max_in_flight
+        self.rate = rate
+        self.burst = burst
+        self.store = store or MemoryRateLimitStore()
+        self.api_keys = frozenset(api_keys)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self._clients: Dict[str, int] = {}
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {}
+        self._waits = [0] * (len(self.wait_buckets) + 1)
+        self._wait_sum = 0.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        path = os.getenv("RATE_LIMIT_PATH")
+        api_keys = os.getenv("ADMISSION_API_KEYS", "")
+        return cls(
+            max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "128")),
+            queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5")),
+            client_max_in_flight=int(os.getenv("ADMISSION_CLIENT_MAX_IN_FLIGHT", "0")),
+            rate=float(os.getenv("RATE_LIMIT_PER_SECOND", "0")),
+            burst=float(os.getenv("RATE_LIMIT_BURST", "20")),
+            store=SQLiteRateLimitStore(path) if path else None,
+            api_keys={key.strip() for key in api_keys.split(",") if key.strip()},
+        )
+
+    async def acquire(self, client: str) -> None:
+        """
+        Waits for a slot for `client`, or raises Rejected
+        """
+        if self.rate > 0:
+            wait = await self.store.take(client, self.rate, self.burst)
+            if wait > 0:
+                raise self._reject(429, "rate_limited", "Rate limit exceeded", wait)
+
+        # Queued requests count towards the client's cap, so one client cannot fill
+        # the queue either
+        running = self._clients.get(client, 0)
+        if self.client_max_in_flight and running >= self.client_max_in_flight:
+            raise self._reject(
+                429,
+                "client_limit",
+                f"{running} requests from this client are already in progress",
+                1.0,
+            )
+
+        slots = self._get_slots()
+        if not slots.locked():
+            # A free slot is taken without suspending, so a burst arriving in the same
+            # tick still sees the slots it used up
+            await slots.acquire()
+            self._clients[client] = running + 1
+            self._admit(0.0)
+            return
+        if self.waiting >= self.max_queue:
+            raise self._reject(
+                503, "queue_full", "Server is at capacity", self._retry_hint()
+            )
+
+        self._clients[client] = running + 1
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+        except BaseException as e:
+            self._leave(client)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject(
+                    503,
+                    "queue_timeout",
+                    f"Timed out after {self.queue_timeout:g}s waiting for capacity",
+                    self._retry_hint(),
+                )
+            raise
+        finally:
+            self.waiting -= 1
+        self._admit(time.perf_counter() - started)
+
+    def release(self, client: str) -> None:
+        self.in_flight -= 1
+        self._leave(client)
+        self._get_slots().release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+    def render(self, namespace: str = "arena") -> str:
+        """
+        Prometheus text exposition of the admission gauges, counters and wait times
+        """
+        ns = f"{namespace}_admission"
+        lines = [
+            f"# HELP {ns}_in_flight Requests holding an admission slot.",
+            f"# TYPE {ns}_in_flight gauge",
+            f"{ns}_in_flight {self.in_flight}",
+            f"# HELP {ns}_queue_depth Requests waiting for an admission slot.",
+            f"# TYPE {ns}_queue_depth gauge",
+            f"{ns}_queue_depth {self.waiting}",
+            f"# HELP {ns}_admitted_total Requests admitted.",
+            f"# TYPE {ns}_admitted_total counter",
+            f"{ns}_admitted_total {self.admitted}",
+            f"# HELP {ns}_rejected_total Requests rejected, by reason.",
+            f"# TYPE {ns}_rejected_total counter",
+        ]
+        for reason, count in sorted(self.rejected.items()):
+            lines.append(f'{ns}_rejected_total{{reason="{reason}"}} {count}')
+        lines += [
+            f"# HELP {ns}_rate_limit_errors_total Rate limit checks that failed and "
+            "let the request through.",
+            f"# TYPE {ns}_rate_limit_errors_total counter",
+            f"{ns}_rate_limit_errors_total {self.store.errors}",
+        ]
+        metric = f"{ns}_wait_seconds"
+        lines += [
+            f"# HELP {metric} Time admitted requests waited for a slot.",
+            f"# TYPE {metric} histogram",
+        ]
+        for bound, count in zip(self.wait_buckets, self._waits):
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+        lines.append(f'{metric}_bucket{{le="+Inf"}} {self._waits[-1]}')
+        lines.append(f"{metric}_sum {self._wait_sum:.6f}")
+        lines.append(f"{metric}_count {self._waits[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def close(self) -> None:
+        self.store.close()
+
+    def _admit(self, waited: float) -> None:
+        self._observe_wait(waited)
+        self.admitted += 1
+        self.in_flight += 1
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Created on first use so it belongs to the server's event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._slots
+
+    def _leave(self, client: str) -> None:
+        running = self._clients.get(client, 1) - 1
+        if running:
+            self._clients[client] = running
+        else:
+            self._clients.pop(client, None)
+
+    def _reject(
+        self, status: int, reason: str, detail: str, retry_after: float
+    ) -> Rejected:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return Rejected(status, reason, detail, retry_after)
+
+    def _retry_hint(self) -> float:
+        # Roughly how long the queue ahead takes to drain at the current capacity
+        return max(1.0, self.queue_timeout * self.waiting / max(1, self.max_queue))
+
+    def _observe_wait(self, seconds: float) -> None:
+        for index, bound in enumerate(self.wait_buckets):
+            if seconds <= bound:
+                self._waits[index] += 1
+        self._waits[-1] += 1
+        self._wait_sum += seconds
+
+
+def client_key(
+    scope: Dict[str, Any],
+    api_keys: AbstractSet[str] = frozenset(),
+    header: bytes = b"x-api-key",
+) -> str:
+    """
+    Identifies the caller by API key when it is one of `api_keys`, and by the client IP
+    otherwise. Behind a proxy, run uvicorn with `--proxy-headers` and
+    `--forwarded-allow-ips` so the IP is the client's rather than the proxy's
+    """
+    if api_keys:
+        for name, value in scope.get("headers", []):
+            if name == header and value:
+                key = value.decode("latin-1")
+                if key in api_keys:
+                    return f"key:{key}"
+                break
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that puts requests to the expensive planning endpoints through an
+    AdmissionController. Only the given methods under the given path prefixes are
+    limited; health checks, metrics and option paging are always served. Paths in
+    `exclude` admit their work themselves, such as a batch that admits each of its plans
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        controller: AdmissionController,
+        paths: Iterable[str] = ("/plan",),
+        methods: Iterable[str] = ("POST", "PATCH"),
+        exclude: Iterable[str] = (),
+    ):
+        self.app = app
+        self.controller = controller
+        self.paths = tuple(paths)
+        self.methods = set(methods)
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in self.methods
+            or not scope["path"].startswith(self.paths)
+            or scope["path"] in self.exclude
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client = client_key(scope, self.controller.api_keys)
+        try:
+            await self.controller.acquire(client)
+        except Rejected as e:
+            await self._reject(send, e)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(client)
+
+    async def _reject(self, send: Any, rejection: Rejected) -> None:
+        body = to_json({"detail": str(rejection), "reason": rejection.reason})
+        headers: List[Tuple[bytes, bytes]] = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(math.ceil(rejection.retry_after)).encode()),
+        ]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": rejection.status,
+                "headers": headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,585 @@
+"""
+FastAPI application shared by the Python backends.
+
+`create_app` builds the middleware stack and the planning, session and option endpoints
+around an `AgentRuntime`, which owns the plan engine and everything else that lives for
+the whole application lifespan. A backend subclasses `AgentRuntime` to build its
+`AgentAdapter` and may add its own endpoints to the returned app.
+"""
+
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Literal, Optional, Set
+
+from arena_core.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    client_key,
+)
+from arena_core.batch import run_batch
+from arena_core.cache import ResultCache, cache_key
+from arena_core.candidates import CandidateStore
+from arena_core.cassette import Cassette, use_cassette
+from arena_core.compression import CompressionMiddleware
+from arena_core.engine import AgentAdapter, PlanEngine
+from arena_core.fakes import FaultModel, LatencyModel, inject_faults, inject_latency
+from arena_core.jobs import JobQueue, QueueFull
+from arena_core.models import (
+    SECTION_MODELS,
+    BatchPlanRequest,
+    Itinerary,
+    PlanRequest,
+    PlanUpdate,
+)
+from arena_core.resilience import Resilience, UpstreamUnavailable, retry_after_header
+from arena_core.serialization import ModelResponse, to_json
+from arena_core.sessions import PlanSessions
+from arena_core.startup import WARMUP_REQUEST, Prewarm
+from arena_core.tracing import (
+    PrometheusExporter,
+    TracingMiddleware,
+    configure_tracing,
+    get_tracer,
+    untraced,
+)
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import ValidationError
+
+
+class AgentRuntime:
+    """
+    Agent Runtime - Owns the plan engine, result cache, resilience layer and plan sessions
+    that live for the whole application lifespan, so requests reuse warm instances instead of building
+    new agents each time. Subclasses build the framework's adapter in `build_adapter`
+    """
+
+    def __init__(self, resilience: Optional[Resilience] = None):
+        self.resilience = resilience or Resilience.from_env()
+        self.cache: Optional[ResultCache] = None
+        self.engine: Optional[PlanEngine] = None
+        self.jobs: Optional[JobQueue] = None
+        self.cassette: Optional[Cassette] = None
+        self.candidates: Optional[CandidateStore] = None
+        self.sessions: Optional[PlanSessions] = None
+
+    async def build_adapter(self) -> AgentAdapter:
+        raise NotImplementedError
+
+    async def build_warmup_adapter(self) -> AgentAdapter:
+        """
+        Adapter for `prewarm`: the same code paths as `build_adapter`'s, without real
+        upstreams, billed model calls or shared state such as the cache
+        """
+        raise NotImplementedError
+
+    async def startup(self) -> None:
+        self.cache = ResultCache.from_env()
+        # Set before the adapter is built, so subclasses can record their model calls
+        self.cassette = Cassette.from_env()
+        adapter = await self.build_adapter()
+
+        # Benchmarks simulate upstream failures and stalls via ARENA_FAKE_FAULTS, and
+        # upstream latency via ARENA_FAKE_LATENCY, which failed searches take as well
+        faults = FaultModel.from_env()
+        if faults is not None:
+            inject_faults(adapter, faults, "search")
+        latency = LatencyModel.from_env()
+        if latency is not None:
+            inject_latency(adapter, latency, "search")
+        # ARENA_CASSETTE records searches, along with any simulated latency and faults,
+        # or replays them offline
+        if self.cassette is not None:
+            use_cassette(adapter, self.cassette, "search")
+
+        self.engine = PlanEngine(
+            adapter,
+            agent_timeout=float(os.getenv("AGENT_TIMEOUT_SECONDS", "30")),
+            cache=self.cache,
+            resilience=self.resilience,
+        )
+        # Candidate sets behind GET /options and the sessions behind /plan/sessions
+        self.candidates = CandidateStore(self.cache)
+        self.sessions = PlanSessions.from_env(self.engine)
+
+        # Background workers for POST /plan/jobs
+        self.jobs = JobQueue.from_env()
+        self.jobs.start(self.run_job)
+
+    async def run_job(self, request: PlanRequest) -> Itinerary:
+        return await self.engine.plan_trip(
+            destination=request.destination,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            budget=request.budget,
+            preferences=request.preferences,
+        )
+
+    async def prewarm(self) -> None:
+        """
+        Plans and encodes a sample trip, so the first real plan does not pay for lazy
+        imports, building validators and serializers or cold code paths.
+
+        The plan runs on a throwaway engine around `build_warmup_adapter`, with no cache,
+        its own resilience state and no tracing, so it leaves nothing behind: no cached
+        results, cassette entries, span or usage metrics, breaker or fallback state.
+        """
+        engine = PlanEngine(
+            await self.build_warmup_adapter(),
+            agent_timeout=float(os.getenv("AGENT_TIMEOUT_SECONDS", "30")),
+            resilience=Resilience.from_env(),
+        )
+        request = WARMUP_REQUEST
+        try:
+            with untraced():
+                itinerary = await engine.plan_trip(
+                    destination=request.destination,
+                    start_date=request.start_date,
+                    end_date=request.end_date,
+                    budget=request.budget,
+                    preferences=request.preferences,
+                )
+        finally:
+            await engine.adapter.close()
+        to_json(itinerary)
+
+    def render_metrics(self) -> str:
+        """
+        Prometheus text for GET /metrics, besides the span histograms and admission
+        counters
+        """
+        return self.resilience.render() + self.jobs.render()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Body of GET /cache/stats
+        """
+        return {
+            **self.cache.snapshot(),
+            "single_flight": self.engine.single_flight.snapshot(),
+        }
+
+    async def shutdown(self) -> None:
+        if self.jobs is not None:
+            await self.jobs.stop()
+            self.jobs.close()
+            self.jobs = None
+        if self.sessions is not None:
+            self.sessions.close()
+            self.sessions = None
+        self.candidates = None
+        if self.engine is not None:
+            await self.engine.adapter.close()
+            self.engine = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        if self.cassette is not None:
+            self.cassette.save()
+
+
+def get_engine(request: Request) -> PlanEngine:
+    """
+    FastAPI dependency returning the shared plan engine
+    """
+    engine = request.app.state.registry.engine
+    if engine is None:
+        raise RuntimeError("Agent registry has not been started")
+    return engine
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Set[str]]:
+    """
+    Parses a sparse fieldset such as `transportation,budget` into the itinerary fields
+    to return, or None for all of them
+    """
+    if not fields:
+        return None
+    include = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = include - set(Itinerary.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Choose from "
+            + ", ".join(Itinerary.model_fields),
+        )
+    return include
+
+
+def plan_etag(request: PlanRequest, include: Optional[Set[str]], version: str) -> str:
+    """
+    Weak ETag of a plan response: the normalized request and fieldset, and the version
+    of the cached plan behind it. Timings and usage in the metadata may differ between
+    responses with the same ETag
+    """
+    key = cache_key(
+        "etag",
+        **request.model_dump(),
+        fields=sorted(include) if include is not None else None,
+    )
+    return f'W/"{key.split(":", 1)[1][:32]}-{version}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, as If-None-Match calls for
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def create_app(
+    title: str, framework: str, runtime: Callable[[], AgentRuntime]
+) -> FastAPI:
+    """
+    Builds a backend's app: admission control, CORS and tracing middleware, a lifespan
+    that starts `runtime()` and the health, metrics and planning endpoints
+    """
+    # Largest batch accepted by /plan/batch and how many of its plans run at once
+    batch_max_items = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+    batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+    # Limits how many planning requests run and wait at once, and how fast each client
+    # may send them. Created with the app because middleware is built before the
+    # lifespan runs
+    admission = AdmissionController.from_env()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Build the agents once and share them across requests
+        tracer = configure_tracing(framework)
+        registry = runtime()
+        await registry.startup()
+        app.state.registry = registry
+        # Optionally plan a sample trip before or while serving, set by PREWARM
+        prewarm = Prewarm.from_env()
+        app.state.prewarm = prewarm
+        await prewarm.start(registry.prewarm)
+        try:
+            yield
+        finally:
+            await prewarm.stop()
+            await registry.shutdown()
+            admission.close()
+            tracer.close()
+
+    app = FastAPI(title=title, lifespan=lifespan)
+
+    # Reject excess planning requests with 429/503 and Retry-After before any agent
+    # runs. Added before CORS so rejections still carry the CORS headers. A batch
+    # admits each of its plans instead, so it cannot fan out past the limits
+    app.add_middleware(
+        AdmissionMiddleware, controller=admission, exclude=("/plan/batch",)
+    )
+
+    # Setup CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # In production, replace with specific frontend URL
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Trace every request and report per-stage durations in a Server-Timing header
+    app.add_middleware(
+        TracingMiddleware, server_timing=os.getenv("SERVER_TIMING", "1") == "1"
+    )
+
+    # Compress JSON responses from COMPRESS_MIN_BYTES with zstd or gzip, as accepted
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(os.getenv("COMPRESS_MIN_BYTES", "1024")),
+        gzip_level=int(os.getenv("COMPRESS_GZIP_LEVEL", "6")),
+        zstd_level=int(os.getenv("COMPRESS_ZSTD_LEVEL", "3")),
+    )
+
+    @app.get("/")
+    def health_check(request: Request):
+        # A background warm-up may still be running; readiness checks can wait for it
+        return {
+            "status": "ok",
+            "framework": framework,
+            "prewarm": request.app.state.prewarm.snapshot(),
+        }
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics(request: Request):
+        exporter = get_tracer().exporter(PrometheusExporter)
+        spans = exporter.render() if exporter else ""
+        return spans + request.app.state.registry.render_metrics() + admission.render()
+
+    @app.get("/cache/stats")
+    def cache_stats(request: Request):
+        return request.app.state.registry.stats()
+
+    @app.post("/plan", response_model=Itinerary, response_class=ModelResponse)
+    async def create_travel_plan(
+        request: PlanRequest,
+        http_request: Request,
+        fields: Optional[str] = Query(
+            None, description="Comma-separated itinerary fields to return"
+        ),
+        engine: PlanEngine = Depends(get_engine),
+    ):
+        """
+        Plans a trip. `fields` returns only some itinerary fields, and the agents of
+        sections that are not listed do not run. A plan whose ETag matches
+        If-None-Match answers 304 without running the agents.
+        """
+        include = parse_fields(fields)
+        sections = None
+        if include is not None and include & set(SECTION_MODELS):
+            sections = [name for name in SECTION_MODELS if name in include]
+        params = dict(
+            destination=request.destination,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            budget=request.budget,
+            preferences=request.preferences,
+            sections=sections,
+        )
+
+        if_none_match = http_request.headers.get("if-none-match")
+        if if_none_match:
+            version = await engine.plan_version(**params)
+            if version is not None:
+                etag = plan_etag(request, include, version)
+                if etag_matches(if_none_match, etag):
+                    return Response(status_code=304, headers={"ETag": etag})
+
+        try:
+            # Process the request through the plan engine
+            result = await engine.plan_trip(**params)
+
+            # Encode with the compiled model serializer instead of jsonable_encoder.
+            # Only plans that were cached get an ETag, since only they can match later
+            version = result.metadata.get("version")
+            headers = {"ETag": plan_etag(request, include, version)} if version else {}
+            return ModelResponse(result, include=include, headers=headers)
+        except UpstreamUnavailable as e:
+            # Every agent is down and none has an earlier result to fall back on
+            raise HTTPException(
+                status_code=503, detail=str(e), headers=retry_after_header(e)
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.post("/plan/jobs", status_code=202)
+    async def submit_plan_job(request: PlanRequest, http_request: Request):
+        """
+        Queues the plan and returns its job id at once. Identical requests share a job.
+        Poll GET /plan/jobs/{id} for the result.
+        """
+        jobs = http_request.app.state.registry.jobs
+        try:
+            job_id, deduplicated = await jobs.submit(request)
+        except QueueFull as e:
+            raise HTTPException(
+                status_code=503, detail=str(e), headers={"Retry-After": "1"}
+            )
+        job = await jobs.get(job_id)
+        return Response(
+            to_json(
+                {
+                    "id": job_id,
+                    "status": job.status if job else "done",
+                    "deduplicated": deduplicated,
+                }
+            ),
+            status_code=202,
+            media_type="application/json",
+            headers={"Location": f"/plan/jobs/{job_id}"},
+        )
+
+    @app.get("/plan/jobs/{job_id}")
+    async def get_plan_job(
+        job_id: str,
+        request: Request,
+        wait: float = Query(0, ge=0, le=60, description="Seconds to wait for it"),
+    ):
+        """
+        Returns the job's status, and the itinerary once it is done. With `wait`, the
+        request is held until the job finishes or the wait runs out.
+        """
+        job = await request.app.state.registry.jobs.get(job_id, wait=wait)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired plan job")
+        return Response(job.to_json(), media_type="application/json")
+
+    @app.post("/plan/stream")
+    async def stream_travel_plan(
+        request: PlanRequest, engine: PlanEngine = Depends(get_engine)
+    ):
+        """
+        Streams the itinerary as newline-delimited JSON: one `section` event per
+        sub-agent as soon as it finishes, then a `rollup` event with the budget and
+        summary.
+        """
+        events = engine.stream_plan(
+            destination=request.destination,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            budget=request.budget,
+            preferences=request.preferences,
+        )
+
+        async def ndjson():
+            try:
+                async for event in events:
+                    yield to_json(event) + b"\n"
+            except Exception as e:
+                # Headers are already sent, so report the failure in-band
+                yield to_json({"event": "error", "detail": str(e)}) + b"\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    @app.post("/plan/batch")
+    async def batch_travel_plans(
+        request: BatchPlanRequest,
+        http_request: Request,
+        engine: PlanEngine = Depends(get_engine),
+    ):
+        """
+        Plans every trip of the batch with bounded concurrency. Results are streamed as
+        newline-delimited JSON, one `item` event per trip in completion order, followed
+        by a `done` event. A failed or invalid trip is reported in its own event and
+        the rest still run.
+
+        Every trip is admitted on its own, charging the client one rate limit token and
+        one in-flight slot per plan, and a trip turned away is reported in its event.
+        """
+        if len(request.requests) > batch_max_items:
+            raise HTTPException(
+                status_code=413,
+                detail=f"A batch holds at most {batch_max_items} plan requests",
+            )
+        concurrency = min(request.concurrency or batch_concurrency, batch_concurrency)
+        # More plans at once would only be turned away by the client's own cap
+        if admission.client_max_in_flight:
+            concurrency = min(concurrency, admission.client_max_in_flight)
+        client = client_key(http_request.scope, admission.api_keys)
+
+        async def plan(raw: Dict[str, Any]) -> Itinerary:
+            # An invalid item raises here and is reported in its own event
+            item = PlanRequest.model_validate(raw)
+            await admission.acquire(client)
+            try:
+                # Identical searches across the batch are coalesced and cached by the
+                # engine
+                return await engine.plan_trip(
+                    destination=item.destination,
+                    start_date=item.start_date,
+                    end_date=item.end_date,
+                    budget=item.budget,
+                    preferences=item.preferences,
+                )
+            finally:
+                admission.release(client)
+
+        async def ndjson():
+            started = time.perf_counter()
+            failed = 0
+            async for outcome in run_batch(request.requests, plan, concurrency):
+                failed += not outcome.ok
+                yield to_json(outcome.to_event()) + b"\n"
+            done = {
+                "event": "done",
+                "total": len(request.requests),
+                "failed": failed,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+            yield to_json(done) + b"\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    @app.post("/plan/sessions", response_model=Itinerary, response_class=ModelResponse)
+    async def create_plan_session(request: PlanRequest, http_request: Request):
+        """
+        Plans a trip and opens a session for editing it. The session id is returned in
+        `metadata.session_id`.
+        """
+        sessions = http_request.app.state.registry.sessions
+        try:
+            return ModelResponse(await sessions.create(request))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.patch(
+        "/plan/sessions/{session_id}",
+        response_model=Itinerary,
+        response_class=ModelResponse,
+    )
+    async def update_plan_session(
+        session_id: str, update: PlanUpdate, http_request: Request
+    ):
+        """
+        Applies a partial edit to a session's request and re-plans it, re-running only
+        the agents that read a changed field. `metadata.sections` lists the reused and
+        re-run sections.
+        """
+        sessions = http_request.app.state.registry.sessions
+        try:
+            itinerary = await sessions.update(session_id, update)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        if itinerary is None:
+            raise HTTPException(
+                status_code=404, detail="Unknown or expired plan session"
+            )
+        return ModelResponse(itinerary)
+
+    @app.get("/options/{section}/{result_set}", response_class=ModelResponse)
+    async def search_options(
+        section: str,
+        result_set: str,
+        request: Request,
+        sort: Literal["price", "rating", "duration"] = "rating",
+        order: Optional[Literal["asc", "desc"]] = None,
+        max_price: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        max_duration: Optional[float] = Query(None, description="Minutes"),
+        limit: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = None,
+    ):
+        """
+        Filters, sorts and pages the candidate options behind one section of a plan. The
+        result set id comes from the plan's `metadata.result_sets`, and paging only
+        re-slices the cached candidates without calling the agents again.
+        """
+        store = request.app.state.registry.candidates
+        candidates = await store.get(section, result_set)
+        if candidates is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Unknown or expired result set; plan the trip again to refresh it",
+            )
+
+        try:
+            rows, total, next_cursor = candidates.page(
+                sort=sort,
+                descending=None if order is None else order == "desc",
+                limit=limit,
+                cursor=cursor,
+                max_price=max_price,
+                min_rating=min_rating,
+                max_duration=max_duration,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return ModelResponse(
+            {
+                "section": section,
+                "result_set": result_set,
+                "total": total,
+                "items": [
+                    {"index": row, "option": candidates.options[row]} for row in rows
+                ],
+                "next_cursor": next_cursor,
+            }
+        )
+
+    return app
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Sequence, TypeVar
+
+from arena_core.admission import Rejected
+from pydantic import ValidationError
+
+T = TypeVar("T")
+
+
+def error_detail(error: Exception) -> Any:
+    """
+    The `detail` of a failed item: the list of validation errors, shaped like a 422
+    body, for an invalid item, the reason and retry hint for an item turned away by
+    admission control, and the error message otherwise
+    """
+    if isinstance(error, ValidationError):
+        # Through JSON, so exceptions in the error context become plain strings
+        return json.loads(error.json(include_url=False))
+    if isinstance(error, Rejected):
+        return {
+            "status": error.status,
+            "reason": error.reason,
+            "message": str(error),
+            "retry_after": math.ceil(error.retry_after),
+        }
+    return str(error)
+
+
+@dataclass
+class BatchItem:
+    """
+    Outcome of one item of a batch: either its value or the error it raised
+    """
+
+    index: int
+    status: str  # "ok" or "error"
+    value: Any = None
+    error: Any = None
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    def to_event(self) -> dict:
+        event = {
+            "event": "item",
+            "index": self.index,
+            "status": self.status,
+            "elapsed_ms": self.elapsed_ms,
+        }
+        if self.ok:
+            event["data"] = self.value
+        else:
+            event["detail"] = self.error
+        return event
+
+
+async def run_batch(
+    items: Sequence[T],
+    call: Callable[[T], Awaitable[Any]],
+    concurrency: int = 8,
+) -> AsyncIterator[BatchItem]:
+    """
+    Runs `call` over every item with at most `concurrency` calls in flight, yielding each
+    outcome as soon as it finishes.
+
+    A failing item is reported as an error outcome instead of stopping the batch. If the
+    consumer stops iterating, the calls still running are cancelled.
+    """
+    queue: "asyncio.Queue[BatchItem]" = asyncio.Queue()
+    pending = iter(enumerate(items))
+
+    async def worker() -> None:
+        # Workers share one iterator, so each item is picked up exactly once
+        for index, item in pending:
+            started = time.perf_counter()
+            try:
+                value = await call(item)
+            except Exception as e:
+                outcome = BatchItem(index=index, status="error", error=error_detail(e))
+            else:
+                outcome = BatchItem(index=index, status="ok", value=value)
+            outcome.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            queue.put_nowait(outcome)
+
+    workers = [
+        asyncio.ensure_future(worker())
+        for _ in range(max(1, min(concurrency, len(items))))
+    ]
+    try:
+        for _ in range(len(items)):
+            yield await queue.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+from arena_core.models import ActivitiesResult
+from arena_core.startup import lazy_import
+
+# Loaded on the first allocation rather than at startup
+np = lazy_import("numpy")
+
+
+@dataclass
+class Allocation:
+    """
+    The option picked from each section's candidates and what the combination costs
+    """
+
+    choices: Dict[str, int]
+    total_cost: float
+    score: float
+    within_budget: bool
+
+
+def option_rating(option: Any) -> float:
+    """
+    Rating of one candidate on a 0-5 scale. Activity packages are rated by the average of
+    their activities
+    """
+    if isinstance(option, ActivitiesResult):
+        ratings = [activity.rating for activity in option.activities]
+        return sum(ratings) / len(ratings) if ratings else 0.0
+    return getattr(option, "rating", None) or 0.0
+
+
+def pareto_front(costs: "np.ndarray", scores: "np.ndarray") -> "np.ndarray":
+    """
+    Indices of the options that no other option beats on both cost and score. The best
+    combination is always built from these, so pruning shrinks the search up front.
+    """
+    # Cheapest first, best score first among equal costs
+    order = np.lexsort((-scores, costs))
+    best_so_far = np.maximum.accumulate(scores[order])
+    previous_best = np.concatenate(([-np.inf], best_so_far[:-1]))
+    return order[scores[order] > previous_best]
+
+
+def allocate_budget(
+    candidates: Dict[str, Sequence[Any]],
+    budget: float,
+    weights: Optional[Dict[str, float]] = None,
+) -> Allocation:
+    """
+    Picks one candidate per section so the combined cost fits the budget and the weighted
+    sum of ratings is as high as possible, preferring the cheaper combination on ties.
+
+    Every combination of the non-dominated candidates is scored at once by broadcasting
+    each section along its own axis. When nothing fits, the cheapest combination is
+    returned with `within_budget` unset.
+    """
+    weights = weights or {}
+    names = list(candidates)
+    fronts, costs, scores = [], [], []
+    for axis, name in enumerate(names):
+        section_costs = np.array(
+            [option.total_cost for option in candidates[name]], dtype=float
+        )
+        section_scores = np.array(
+            [option_rating(option) for option in candidates[name]], dtype=float
+        ) * float(weights.get(name, 1.0))
+        front = pareto_front(section_costs, section_scores)
+
+        shape = [1] * len(names)
+        shape[axis] = len(front)
+        fronts.append(front)
+        costs.append(section_costs[front].reshape(shape))
+        scores.append(section_scores[front].reshape(shape))
+
+    total_cost = sum(costs, np.zeros(()))
+    total_score = sum(scores, np.zeros(()))
+
+    feasible = total_cost <= budget
+    if feasible.any():
+        ranked = np.where(feasible, total_score, -np.inf)
+        best = np.isclose(ranked, ranked.max())
+        flat_index = np.where(best, total_cost, np.inf).argmin()
+    else:
+        flat_index = total_cost.argmin()
+
+    index = np.unravel_index(flat_index, total_cost.shape)
+    return Allocation(
+        choices={
+            name: int(front[position])
+            for name, front, position in zip(names, fronts, index)
+        },
+        total_cost=float(total_cost[index]),
+        score=float(total_score[index]),
+        within_budget=bool(feasible.any()),
+    )
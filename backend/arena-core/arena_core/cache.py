@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from arena_core.serialization import to_json
+
+
+def normalize_text(value: Any) -> str:
+    """
+    Case-folds a string and collapses runs of whitespace
+    """
+    return " ".join(str(value).split()).casefold()
+
+
+def bucket_budget(budget: Any, bucket: float) -> Any:
+    """
+    Rounds a budget down to its bucket so nearby budgets share a cache entry
+    """
+    if budget is None or bucket <= 0:
+        return budget
+    return int(float(budget) // bucket * bucket)
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def cache_key(namespace: str, budget_bucket: float = 0, **params: Any) -> str:
+    """
+    Builds a stable key from request parameters.
+
+    Strings are normalized, mapping keys are sorted and any `budget` parameter is
+    bucketed, so requests that only differ in casing, spacing or key order share a key.
+    """
+    if "budget" in params:
+        params["budget"] = bucket_budget(params["budget"], budget_bucket)
+    payload = json.dumps(_canonical(params), sort_keys=True, default=str)
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class LRUCache:
+    """
+    In-memory LRU cache whose entries expire after `ttl` seconds
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 900.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    On-disk cache so results survive restarts and are shared by workers on one host.
+
+    Values are stored as JSON, so models come back as plain dicts. Entries expire after
+    `ttl` seconds and the oldest entries are pruned once the table grows past `max_entries`.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl: float = 900.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)"
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at >= ?",
+                (key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, to_json(value).decode(), time.time() + self.ttl),
+            )
+            self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResultCache:
+    """
+    Result Cache - Two-tier cache for plan and search results, with a memory LRU in front of
+    an optional SQLite store, and hit/miss counters per namespace.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 900.0,
+        path: Optional[str] = None,
+        budget_bucket: float = 25.0,
+    ):
+        self.memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.disk = SQLiteCache(path, ttl=ttl) if path else None
+        self.budget_bucket = budget_bucket
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")),
+            ttl=float(os.getenv("CACHE_TTL_SECONDS", "900")),
+            path=os.getenv("CACHE_PATH") or None,
+            budget_bucket=float(os.getenv("CACHE_BUDGET_BUCKET", "25")),
+        )
+
+    def key(self, namespace: str, **params: Any) -> str:
+        return cache_key(namespace, budget_bucket=self.budget_bucket, **params)
+
+    async def get(self, key: str, count: bool = True) -> Optional[Any]:
+        """
+        The cached value for `key`, or None. `count=False` leaves the hit/miss counters
+        alone, for probes that are followed by a counted lookup of the same key
+        """
+        namespace = key.split(":", 1)[0]
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.memory.set(key, value)
+        if count:
+            self._count(namespace, "hits" if value is not None else "misses")
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        The cached value for `key`, or the result of `compute`, which is cached unless
+        `cacheable` rejects it
+        """
+        value = await self.get(key)
+        if value is None:
+            value = await compute()
+            if cacheable(value):
+                await self.set(key, value)
+        return value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters per namespace, for the /cache/stats endpoint
+        """
+        namespaces = {}
+        for namespace, counts in self.stats.items():
+            lookups = counts["hits"] + counts["misses"]
+            namespaces[namespace] = {
+                **counts,
+                "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0,
+            }
+        return {
+            "entries": len(self.memory),
+            "persistent": self.disk is not None,
+            "namespaces": namespaces,
+        }
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+    def _count(self, namespace: str, outcome: str) -> None:
+        counts = self.stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
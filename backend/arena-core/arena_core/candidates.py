@@ -0,0 +1,165 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+from arena_core.budget import option_rating
+from arena_core.cache import LRUCache, ResultCache
+from arena_core.models import SECTION_MODELS, ActivitiesResult, FlightResult
+from arena_core.schedule import parse_duration_minutes
+from arena_core.startup import lazy_import
+
+# Loaded on the first candidate set rather than at startup
+np = lazy_import("numpy")
+
+SORT_FIELDS = ("price", "rating", "duration")
+
+
+def option_duration(option: Any) -> float:
+    """
+    Duration of one candidate in minutes: flight time for flights, length of stay for
+    accommodation and the summed activity durations for activity packages
+    """
+    if isinstance(option, FlightResult):
+        legs = (option.outbound, option.return_flight)
+        return sum(parse_duration_minutes(leg.duration) for leg in legs)
+    if isinstance(option, ActivitiesResult):
+        return sum(
+            parse_duration_minutes(activity.duration) for activity in option.activities
+        )
+    return option.nights * 24 * 60.0
+
+
+def encode_cursor(sort: str, descending: bool, key: float, index: int) -> str:
+    payload = json.dumps({"s": sort, "d": descending, "k": key, "i": index})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> Tuple[float, int]:
+    """
+    Returns the sort key and index of the last row of the previous page. Cursors are only
+    valid for the ordering they were issued for.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort or payload["d"] != descending:
+            raise ValueError("Cursor was issued for a different sort order")
+        return float(payload["k"]), int(payload["i"])
+    except (binascii.Error, json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+@dataclass
+class CandidateSet:
+    """
+    A section's candidate options with their price, rating and duration held as columns,
+    so filters and orderings run as vectorized array operations
+    """
+
+    section: str
+    options: List[Any]
+    price: "np.ndarray"
+    rating: "np.ndarray"
+    duration: "np.ndarray"
+
+    @classmethod
+    def from_options(cls, section: str, options: Sequence[Any]) -> "CandidateSet":
+        # Cached options may come back as plain dicts, so normalize them to models here
+        models = [SECTION_MODELS[section].model_validate(option) for option in options]
+        return cls(
+            section=section,
+            options=models,
+            price=np.array([option.total_cost for option in models], dtype=float),
+            rating=np.array([option_rating(option) for option in models], dtype=float),
+            duration=np.array(
+                [option_duration(option) for option in models], dtype=float
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.options)
+
+    def matches(
+        self,
+        max_price: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        max_duration: Optional[float] = None,
+    ) -> "np.ndarray":
+        """
+        Boolean mask of the options passing every given filter
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if max_price is not None:
+            mask &= self.price <= max_price
+        if min_rating is not None:
+            mask &= self.rating >= min_rating
+        if max_duration is not None:
+            mask &= self.duration <= max_duration
+        return mask
+
+    def page(
+        self,
+        sort: str = "rating",
+        descending: Optional[bool] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        **filters: Optional[float],
+    ) -> Tuple[List[int], int, Optional[str]]:
+        """
+        Filters and orders the options, then returns one page of option indices, the
+        number of matching options and the cursor of the next page.
+
+        Pages are keyset-paginated on (sort key, index), so a cursor stays valid and never
+        repeats or skips rows. Ratings sort best first and the other fields cheapest or
+        shortest first unless `descending` says otherwise.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort!r}")
+        if descending is None:
+            descending = sort == "rating"
+
+        mask = self.matches(**filters)
+        total = int(mask.sum())
+
+        # Negating the column turns a descending order into an ascending one
+        key = -getattr(self, sort) if descending else getattr(self, sort)
+        index = np.arange(len(self))
+        if cursor is not None:
+            last_key, last_index = decode_cursor(cursor, sort, descending)
+            mask &= (key > last_key) | ((key == last_key) & (index > last_index))
+
+        rows = index[mask]
+        ordered = rows[np.lexsort((rows, key[rows]))]
+        page = ordered[:limit]
+
+        next_cursor = None
+        if len(ordered) > limit:
+            last = int(page[-1])
+            next_cursor = encode_cursor(sort, descending, float(key[last]), last)
+        return [int(row) for row in page], total, next_cursor
+
+
+class CandidateStore:
+    """
+    Looks up the candidate sets cached by the plan engine's searches and keeps their
+    columnar form in memory, so paging through a set does not rebuild it every time
+    """
+
+    def __init__(self, cache: ResultCache, max_sets: int = 256):
+        self.cache = cache
+        self._sets = LRUCache(max_entries=max_sets, ttl=cache.memory.ttl)
+
+    async def get(self, section: str, result_id: str) -> Optional[CandidateSet]:
+        if section not in SECTION_MODELS:
+            return None
+        key = f"{section}:{result_id}"
+        candidates = self._sets.get(key)
+        if candidates is None:
+            options = await self.cache.get(key)
+            if options is None:
+                return None
+            candidates = CandidateSet.from_options(section, options)
+            self._sets.set(key, candidates)
+        return candidates
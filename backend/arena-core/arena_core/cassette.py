@@ -0,0 +1,202 @@
+"""
+Record and replay of upstream calls, to profile the planning pipeline offline.
+
+In record mode every call to a wrapped method is passed through, and its arguments,
+result (or error) and latency are written to a cassette: gzip-compressed JSON lines,
+one call per line. In replay mode the wrapped methods never reach the upstream: each
+call is answered from the cassette after sleeping for the recorded latency divided by
+`speed` (`speed=0` answers at once). Calls are matched on their exact arguments, and
+calls with the same arguments are served in the order they were recorded, so a replayed
+run sees the same results, failures and latencies as the recorded one.
+"""
+
+import asyncio
+import functools
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from arena_core.serialization import to_json
+
+CASSETTE_MODES = ("record", "replay")
+
+
+class CassetteMiss(Exception):
+    """
+    Raised in replay mode for a call that was never recorded
+    """
+
+
+class ReplayedError(Exception):
+    """
+    Raised in replay mode for a call that failed when it was recorded
+    """
+
+
+def _plain(value: Any) -> Any:
+    # Read through the base dict, so preferences that record which keys an agent
+    # read are not marked as fully read by the cassette
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in dict.items(value)}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def call_key(name: str, args: Any, kwargs: Dict[str, Any]) -> str:
+    """
+    Exact key of a call: unlike cache keys, strings are not normalized
+    """
+    payload = json.dumps(
+        [name, _plain(args), _plain(kwargs)], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _encode_json(value: Any) -> Any:
+    return json.loads(to_json(value))
+
+
+def _decode_json(data: Any) -> Any:
+    return data
+
+
+class Cassette:
+    """
+    Upstream calls and their latencies, recorded to or replayed from a file
+    """
+
+    def __init__(self, path: str, mode: str = "replay", speed: float = 1.0):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(
+                f"Cassette mode must be one of {', '.join(CASSETTE_MODES)}"
+            )
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.calls = 0
+        self.misses = 0
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursors: Dict[str, int] = defaultdict(int)
+        self._recorded: List[Dict[str, Any]] = []
+        if mode == "replay":
+            self.load()
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        path = os.getenv("ARENA_CASSETTE")
+        if not path:
+            return None
+        return cls(
+            path,
+            mode=os.getenv("ARENA_CASSETTE_MODE", "replay"),
+            speed=float(os.getenv("ARENA_CASSETTE_SPEED", "1")),
+        )
+
+    def load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as lines:
+            for line in lines:
+                entry = json.loads(line)
+                self._entries[entry["key"]].append(entry)
+
+    def save(self) -> None:
+        """
+        Writes the calls recorded so far, replacing the file in one step
+        """
+        if self.mode != "record":
+            return
+        partial = f"{self.path}.partial"
+        with gzip.open(partial, "wt", encoding="utf-8") as lines:
+            for entry in self._recorded:
+                lines.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(partial, self.path)
+
+    async def call(
+        self,
+        name: str,
+        upstream: Callable[[], Any],
+        args: Any,
+        kwargs: Dict[str, Any],
+        encode: Callable[[Any], Any] = _encode_json,
+        decode: Callable[[Any], Any] = _decode_json,
+    ) -> Any:
+        """
+        Records the call to `upstream`, or replays it from the cassette
+        """
+        self.calls += 1
+        key = call_key(name, args, kwargs)
+        if self.mode == "replay":
+            return await self._replay(name, key, decode)
+
+        # A cancelled call has no outcome to replay, so it is not recorded
+        started = time.perf_counter()
+        try:
+            result = await upstream()
+        except Exception as error:
+            self._record(name, key, started, error=f"{type(error).__name__}: {error}")
+            raise
+        self._record(name, key, started, result=encode(result))
+        return result
+
+    def _record(self, name: str, key: str, started: float, **outcome: Any) -> None:
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        self._recorded.append({"key": key, "call": name, "ms": elapsed_ms, **outcome})
+
+    async def _replay(self, name: str, key: str, decode: Callable[[Any], Any]) -> Any:
+        entries = self._entries.get(key)
+        if not entries:
+            self.misses += 1
+            raise CassetteMiss(f"No recorded {name} call matches these arguments")
+        # Calls with the same arguments cycle through their recordings in order
+        index = self._cursors[key]
+        self._cursors[key] = index + 1
+        entry = entries[index % len(entries)]
+        if self.speed > 0:
+            await asyncio.sleep(entry["ms"] / 1000 / self.speed)
+        if "error" in entry:
+            raise ReplayedError(entry["error"])
+        return decode(entry["result"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "mode": self.mode,
+            "calls": self.calls,
+            "recorded": len(self._recorded),
+            "misses": self.misses,
+        }
+
+
+def use_cassette(
+    target: Any,
+    cassette: Cassette,
+    *method_names: str,
+    encode: Callable[[Any], Any] = _encode_json,
+    decode: Callable[[Any], Any] = _decode_json,
+) -> Any:
+    """
+    Replaces the named async methods on `target` with versions that are recorded to, or
+    replayed from, `cassette`. Results are stored as `encode` returns them and rebuilt
+    with `decode`, which default to plain JSON. The object is patched in place and
+    returned.
+    """
+    for name in method_names:
+        method = getattr(target, name)
+
+        @functools.wraps(method)
+        async def taped(*args: Any, _method=method, _name=name, **kwargs: Any) -> Any:
+            return await cassette.call(
+                _name,
+                lambda: _method(*args, **kwargs),
+                args,
+                kwargs,
+                encode=encode,
+                decode=decode,
+            )
+
+        setattr(target, name, taped)
+    return target
@@ -0,0 +1,115 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+Only bodies sent in one piece are compressed, and only from `minimum_size` bytes, so the
+middleware never buffers a streamed response: NDJSON plan streams still flush each event
+as soon as it is ready. zstd is preferred when the `zstandard` package is installed and
+the client accepts it, gzip otherwise.
+"""
+
+import asyncio
+import gzip
+from typing import Any, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstd is an optional speedup
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+# Bodies at least this large are compressed on a thread, off the event loop
+THREAD_MIN_SIZE = 256 * 1024
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    The encoding to answer with for an Accept-Encoding header, or None for identity
+    """
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ("zstd", "gzip"):
+        if encoding == "zstd" and zstandard is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses JSON and text responses with zstd or gzip
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Responses vary on Accept-Encoding even when this one is sent as is
+        encoding = accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Optional[Dict[str, Any]] = None
+
+        async def send_compressed(message: Dict[str, Any]) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            response_start, start = start, None
+            headers = MutableHeaders(raw=list(response_start.get("headers", [])))
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            if content_type.startswith(COMPRESSIBLE_TYPES):
+                headers.add_vary_header("Accept-Encoding")
+            if (
+                encoding is None
+                or message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send({**response_start, "headers": headers.raw})
+                await send(message)
+                return
+
+            if len(body) >= THREAD_MIN_SIZE:
+                body = await asyncio.to_thread(self.compress, body, encoding)
+            else:
+                body = self.compress(body, encoding)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            await send({**response_start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "zstd":
+            return zstandard.ZstdCompressor(level=self.zstd_level).compress(body)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
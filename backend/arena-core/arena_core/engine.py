@@ -0,0 +1,658 @@
+"""
+Plan engine shared by the Python backends.
+
+The engine owns everything that does not depend on the agent framework: the fan-out
+over itinerary sections with per-section timeouts, request coalescing, result caching,
+retries and fallbacks, budget allocation, scheduling and tracing. A framework plugs in
+through an `AgentAdapter`, which only searches one section and optionally polishes the
+summary, so both backends are compared on the same orchestration.
+"""
+
+import hashlib
+from contextlib import nullcontext
+from typing import (
+    Any,
+    AsyncIterator,
+    ContextManager,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from arena_core.budget import allocate_budget
+from arena_core.cache import ResultCache, cache_key
+from arena_core.models import SECTION_MODELS, BudgetSummary, Itinerary, TripDates
+from arena_core.orchestrator import BranchFactory, BranchResult, FanOutOrchestrator
+from arena_core.resilience import Resilience, Stale, UpstreamUnavailable
+from arena_core.schedule import schedule_trip
+from arena_core.serialization import to_json
+from arena_core.singleflight import SingleFlight
+from arena_core.tracing import get_tracer
+from arena_core.tracking import TrackedPreferences
+
+
+class AgentAdapter:
+    """
+    Base class for the framework-specific part of a backend.
+
+    `search` is called once per itinerary section and returns the section's candidate
+    options, or a single option. The plan hooks let a framework keep per-plan state,
+    such as a token meter: `begin_plan` creates it, `plan_scope` is entered around every
+    step of the plan (tasks started inside it inherit its context variables) and
+    `finish_plan` reports it on the itinerary.
+    """
+
+    async def search(
+        self,
+        section: str,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> Any:
+        raise NotImplementedError
+
+    async def summarize(
+        self,
+        draft: str,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> str:
+        return draft
+
+    def begin_plan(self) -> Any:
+        return None
+
+    def plan_scope(self, state: Any) -> ContextManager[Any]:
+        return nullcontext(state)
+
+    def finish_plan(self, itinerary: Itinerary, state: Any) -> Itinerary:
+        return itinerary
+
+    async def close(self) -> None:
+        pass
+
+
+class PlanEngine:
+    """
+    Plan Engine - Runs one search per itinerary section through an agent adapter and
+    synthesizes the results into the itinerary returned by /plan
+    """
+
+    def __init__(
+        self,
+        adapter: AgentAdapter,
+        agent_timeout: float = 30.0,
+        agent_timeouts: Optional[Dict[str, float]] = None,
+        cache: Optional[ResultCache] = None,
+        resilience: Optional[Resilience] = None,
+    ):
+        self.adapter = adapter
+
+        # Per-agent timeouts are keyed by itinerary section
+        self.orchestrator = FanOutOrchestrator(
+            default_timeout=agent_timeout, timeouts=agent_timeouts
+        )
+
+        # Caching is optional; without a cache every request runs the agents
+        self.cache = cache
+
+        # Coalesces concurrent identical sub-agent searches
+        self.single_flight = SingleFlight()
+
+        # Retries, circuit breakers and fallbacks around every sub-agent search
+        self.resilience = resilience or Resilience()
+
+    async def plan_trip(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+        sections: Optional[Sequence[str]] = None,
+    ) -> Itinerary:
+        """
+        Orchestrates the travel planning process by delegating tasks to specialized agents
+        and synthesizing their results into a comprehensive itinerary.
+
+        `sections` limits the plan to some itinerary sections; the agents of the others
+        do not run, their sections are null and the budget covers only the planned ones.
+        """
+        state = self.adapter.begin_plan()
+        with get_tracer().span(
+            "plan", destination=destination
+        ), self.adapter.plan_scope(state):
+            itinerary = await self._plan_trip(
+                destination, start_date, end_date, budget, preferences, sections
+            )
+        return self.adapter.finish_plan(itinerary, state)
+
+    async def plan_version(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+        sections: Optional[Sequence[str]] = None,
+    ) -> Optional[str]:
+        """
+        Version of the cached plan for these inputs, as reported in `metadata.version`,
+        or None when no plan is cached. Lets a caller tell that a plan is unchanged
+        without running the agents or synthesizing it again
+        """
+        if self.cache is None:
+            return None
+        # Not counted, since a plan that is not unchanged is looked up again
+        entry = await self.cache.get(
+            self._plan_key(
+                destination, start_date, end_date, budget, preferences, sections
+            ),
+            count=False,
+        )
+        return entry["version"] if entry is not None else None
+
+    async def _plan_trip(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+        sections: Optional[Sequence[str]] = None,
+    ) -> Itinerary:
+        plan_key = None
+        if self.cache is not None:
+            plan_key = self._plan_key(
+                destination, start_date, end_date, budget, preferences, sections
+            )
+            entry = await self.cache.get(plan_key)
+            if entry is not None:
+                # Re-synthesize so the budget rollup reflects this request's exact budget
+                results = {
+                    name: BranchResult(name=name, status="ok", value=value)
+                    for name, value in entry["sections"].items()
+                }
+                itinerary = await self._synthesize(
+                    destination, start_date, end_date, budget, preferences, results
+                )
+                itinerary.metadata["cache"] = "hit"
+                itinerary.metadata["version"] = entry["version"]
+                return itinerary
+
+        branches = self._branches(
+            destination, start_date, end_date, budget, preferences, sections=sections
+        )
+
+        # The sub-agents are independent, so run them concurrently
+        results = await self.orchestrator.run(branches)
+        itinerary = await self._synthesize(
+            destination, start_date, end_date, budget, preferences, results
+        )
+
+        # Degraded plans, with failed agents or stale results, are not cached so the next
+        # request retries those agents
+        if plan_key is not None and not itinerary.metadata["degraded"]:
+            values = {name: result.value for name, result in results.items()}
+            version = hashlib.sha256(to_json(values)).hexdigest()[:16]
+            await self.cache.set(plan_key, {"version": version, "sections": values})
+            itinerary.metadata["version"] = version
+        itinerary.metadata["cache"] = "miss"
+        return itinerary
+
+    def _plan_key(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+        sections: Optional[Sequence[str]],
+    ) -> str:
+        params = {}
+        if sections is not None:
+            params["sections"] = sorted(sections)
+        return self.cache.key(
+            "plan",
+            destination=destination,
+            start_date=start_date,
+            end_date=end_date,
+            budget=budget,
+            preferences=preferences,
+            **params,
+        )
+
+    async def stream_plan(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Same as plan_trip, but yields each itinerary section as soon as its agent finishes,
+        followed by a final rollup event with the budget, summary and metadata.
+
+        A section event carries the section's best option on its own. Once every agent
+        has finished the budget optimizer may trade it for another option, and the
+        scheduler dates the activities, so the rollup includes every section that differs
+        from what was streamed, along with the day-by-day plan.
+        """
+        branches = self._branches(
+            destination, start_date, end_date, budget, preferences
+        )
+        weights = preferences.get("priorities")
+
+        # The plan scope is only entered around code that does not yield, since an async
+        # generator may be resumed in another context. The branch tasks copy it
+        state = self.adapter.begin_plan()
+        with self.adapter.plan_scope(state):
+            tasks = self.orchestrator.start(branches)
+
+        results: Dict[str, BranchResult] = {}
+        streamed: Dict[str, Any] = {}
+        async for result in self.orchestrator.as_completed(tasks):
+            results[result.name] = result
+            data = None
+            if result.ok and result.value:
+                options = {
+                    result.name: [
+                        SECTION_MODELS[result.name].model_validate(option)
+                        for option in result.value
+                    ]
+                }
+                choice = allocate_budget(options, budget, weights).choices[result.name]
+                data = options[result.name][choice]
+                streamed[result.name] = data
+            yield {
+                "event": "section",
+                "section": result.name,
+                "status": result.status,
+                "data": data,
+                "elapsed_ms": result.elapsed_ms,
+            }
+
+        # Keep the sections in the same order as the non-streaming itinerary
+        results = {name: results[name] for name in branches}
+        with self.adapter.plan_scope(state):
+            itinerary = await self._synthesize(
+                destination, start_date, end_date, budget, preferences, results
+            )
+        itinerary = self.adapter.finish_plan(itinerary, state)
+        unchanged = {
+            name
+            for name in branches
+            if name in streamed and streamed[name] == getattr(itinerary, name)
+        }
+        yield {
+            "event": "rollup",
+            "data": itinerary.model_dump(
+                mode="json", by_alias=True, exclude_unset=True, exclude=unchanged
+            ),
+        }
+
+    async def replan(
+        self,
+        previous: Dict[str, Dict[str, Any]],
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> Tuple[Itinerary, Dict[str, Dict[str, Any]]]:
+        """
+        Re-plans a session, re-running only the agents whose inputs changed.
+
+        `previous` holds one record per section from the last plan of the session: the
+        preference keys its agent read, a fingerprint of its inputs and its candidates.
+        Sections whose fingerprint still matches reuse their candidates, and the budget is
+        re-optimized over the combined result. Returns the itinerary and the records to
+        keep for the next edit.
+        """
+        state = self.adapter.begin_plan()
+        with get_tracer().span(
+            "plan", destination=destination, incremental=True
+        ), self.adapter.plan_scope(state):
+            params = self._search_params(
+                destination, start_date, end_date, budget, preferences
+            )
+            reused = {
+                name: BranchResult(name=name, status="ok", value=record["value"])
+                for name, record in previous.items()
+                if record["fingerprint"]
+                == self._fingerprint(name, params[name], record["reads"])
+            }
+
+            tracked = {name: TrackedPreferences(preferences) for name in params}
+            branches = self._branches(
+                destination, start_date, end_date, budget, preferences, tracked
+            )
+            fresh = await self.orchestrator.run(
+                {
+                    name: branch
+                    for name, branch in branches.items()
+                    if name not in reused
+                }
+            )
+            results = {name: reused.get(name) or fresh[name] for name in branches}
+            itinerary = await self._synthesize(
+                destination, start_date, end_date, budget, preferences, results
+            )
+        itinerary = self.adapter.finish_plan(itinerary, state)
+
+        records = {name: previous[name] for name in reused}
+        for name, result in fresh.items():
+            # Failed and stale sections get no record, so the next edit retries them
+            if result.ok and not result.stale:
+                reads = tracked[name].reads
+                records[name] = {
+                    "reads": sorted(reads) if reads is not None else None,
+                    "fingerprint": self._fingerprint(name, params[name], reads),
+                    "value": result.value,
+                }
+        itinerary.metadata["sections"] = {
+            "reused": list(reused),
+            "replanned": list(fresh),
+        }
+        return itinerary, records
+
+    def _fingerprint(
+        self, name: str, params: Dict[str, Any], reads: Optional[Iterable[str]]
+    ) -> str:
+        """
+        Key of a section's inputs, counting only the preferences its agent read. Unknown
+        reads (None) count every preference.
+        """
+        inputs = dict(params)
+        if reads is not None:
+            preferences = params["preferences"]
+            inputs["preferences"] = {
+                key: preferences[key] for key in reads if key in preferences
+            }
+        return cache_key(name, **inputs)
+
+    def _branches(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+        tracked: Optional[Dict[str, TrackedPreferences]] = None,
+        sections: Optional[Sequence[str]] = None,
+    ) -> Dict[str, BranchFactory]:
+        """
+        Builds one branch per itinerary section, or per section in `sections`, keyed by
+        the section name. Each agent searches against the whole budget and returns its
+        candidate options; the split between sections is decided afterwards by the
+        budget optimizer.
+
+        When `tracked` preferences are given, each agent gets its section's copy so the
+        caller can see which preferences it read.
+        """
+        params = self._search_params(
+            destination, start_date, end_date, budget, preferences
+        )
+
+        def agent_preferences(name: str) -> Dict[str, Any]:
+            if tracked is None:
+                return preferences
+            tracked[name].used = True
+            return tracked[name]
+
+        def branch(name: str) -> BranchFactory:
+            return lambda: self._search(
+                name,
+                lambda: self.adapter.search(
+                    name,
+                    destination=destination,
+                    start_date=start_date,
+                    end_date=end_date,
+                    budget=budget,
+                    preferences=agent_preferences(name),
+                ),
+                **params[name],
+            )
+
+        return {
+            name: branch(name)
+            for name in SECTION_MODELS
+            if sections is None or name in sections
+        }
+
+    def _search_params(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Inputs that identify each section's search, used for its cache and coalescing key
+        """
+        common = {
+            "destination": destination,
+            "start_date": start_date,
+            "end_date": end_date,
+            "budget": budget,
+            "preferences": preferences,
+        }
+        return {
+            "transportation": {
+                "origin": preferences.get("origin", "New York"),
+                **common,
+            },
+            "accommodation": common,
+            "activities": common,
+        }
+
+    async def _search(
+        self, namespace: str, search: BranchFactory, **params: Any
+    ) -> List[Any]:
+        """
+        Runs a sub-agent search keyed on its normalized inputs. Concurrent identical searches
+        share one call, and results go through the result cache when one is configured.
+        Failed searches are retried, and served from the last good result for the same
+        inputs when the agent stays down. That result comes back as `Stale` and is not
+        written to the result cache.
+        """
+
+        async def upstream() -> List[Any]:
+            with get_tracer().span(f"upstream.{namespace}"):
+                options = await search()
+            # Adapters that find a single option are treated as one candidate
+            return options if isinstance(options, list) else [options]
+
+        if self.cache is None:
+            key = cache_key(namespace, **params)
+        else:
+            key = self.cache.key(namespace, **params)
+
+        def resilient() -> Any:
+            return self.resilience.call(namespace, upstream, key=key)
+
+        if self.cache is None:
+            return await self.single_flight.do(key, resilient)
+        return await self.single_flight.do(
+            key,
+            lambda: self.cache.get_or_compute(
+                key, resilient, cacheable=lambda value: not isinstance(value, Stale)
+            ),
+        )
+
+    async def _synthesize(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+        results: Dict[str, BranchResult],
+    ) -> Itinerary:
+        """
+        Combines the branch results into the itinerary returned by /plan
+        """
+        with get_tracer().span("synthesis"):
+            itinerary = self._build_itinerary(
+                destination, start_date, end_date, budget, preferences, results
+            )
+            itinerary.summary = await self.adapter.summarize(
+                itinerary.summary,
+                destination=destination,
+                start_date=start_date,
+                end_date=end_date,
+                budget=budget,
+                preferences=preferences,
+            )
+            return itinerary
+
+    def _build_itinerary(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+        results: Dict[str, BranchResult],
+    ) -> Itinerary:
+        failed = {name: result for name, result in results.items() if not result.ok}
+        stale = {name: result for name, result in results.items() if result.stale}
+        if len(failed) == len(results):
+            message = "All agents failed: " + "; ".join(
+                f"{name}: {result.error}" for name, result in failed.items()
+            )
+            # Only upstream outages are worth a retry from the client
+            retry_after = [result.retry_after for result in failed.values()]
+            if None not in retry_after:
+                raise UpstreamUnavailable("agents", message, min(retry_after))
+            raise RuntimeError(message)
+
+        # Failed sections are left empty so the rest of the plan is still returned.
+        # Cached candidates may come back as plain dicts, so normalize them to models here
+        candidates = {
+            name: [
+                SECTION_MODELS[name].model_validate(option) for option in result.value
+            ]
+            for name, result in results.items()
+            if result.ok and result.value
+        }
+
+        # Pick one option per section so the plan fits the whole budget
+        allocation = allocate_budget(
+            candidates, budget, weights=preferences.get("priorities")
+        )
+        sections = {
+            name: (
+                candidates[name][allocation.choices[name]]
+                if name in candidates
+                else None
+            )
+            for name in results
+        }
+        # Sections that were not planned are left empty as well
+        flight_results = sections.get("transportation")
+        accommodation_results = sections.get("accommodation")
+        activities_results = sections.get("activities")
+
+        # Lay the chosen activities and restaurants out day by day. The chosen option
+        # may be shared with the cache, so the dated activities go on a copy
+        schedule = schedule_trip(
+            start_date,
+            end_date,
+            activities_results.activities if activities_results else [],
+            activities_results.dining if activities_results else [],
+            arrival=flight_results.outbound.arrival.time if flight_results else None,
+            departure=(
+                flight_results.return_flight.departure.time if flight_results else None
+            ),
+        )
+        if activities_results is not None:
+            activities_results = activities_results.model_copy(
+                update={"activities": schedule.activities}
+            )
+
+        # Synthesize results into a comprehensive itinerary
+        itinerary = Itinerary(
+            destination=destination,
+            dates=TripDates(start=start_date, end=end_date),
+            budget=BudgetSummary(
+                total=budget,
+                spent=allocation.total_cost,
+                remaining=budget - allocation.total_cost,
+            ),
+            transportation=flight_results,
+            accommodation=accommodation_results,
+            activities=activities_results,
+            days=schedule.days,
+            summary=f"A {len(schedule.days)}-day trip to {destination}",
+            metadata={
+                "degraded": bool(failed or stale),
+                "failures": {
+                    name: {"status": result.status, "error": result.error}
+                    for name, result in failed.items()
+                },
+                # Sections served from an earlier result while their agent is down
+                "stale": list(stale),
+                "timings_ms": {
+                    name: result.elapsed_ms for name, result in results.items()
+                },
+                # Stale candidates are not cached, so they have no result set
+                "result_sets": self._result_sets(
+                    destination,
+                    start_date,
+                    end_date,
+                    budget,
+                    preferences,
+                    [name for name in candidates if name not in stale],
+                ),
+                "allocation": {
+                    "within_budget": allocation.within_budget,
+                    "choices": allocation.choices,
+                    "costs": {
+                        name: section.total_cost
+                        for name, section in sections.items()
+                        if section is not None
+                    },
+                    "candidates": {
+                        name: len(options) for name, options in candidates.items()
+                    },
+                },
+            },
+        )
+        if schedule.unscheduled:
+            itinerary.metadata["unscheduled"] = schedule.unscheduled
+
+        return itinerary
+
+    def _result_sets(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+        sections: Iterable[str],
+    ) -> Dict[str, str]:
+        """
+        Ids of the cached candidate sets behind each section, which the options endpoint
+        filters, sorts and pages without running the agents again
+        """
+        if self.cache is None:
+            return {}
+        params = self._search_params(
+            destination, start_date, end_date, budget, preferences
+        )
+        return {
+            name: self.cache.key(name, **params[name]).split(":", 1)[1]
+            for name in sections
+        }
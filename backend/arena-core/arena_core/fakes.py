@@ -0,0 +1,145 @@
+import asyncio
+import functools
+import os
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass
+class LatencyModel:
+    """
+    Simulated upstream latency, used to stand in for real provider calls in benchmarks.
+
+    Specs are written as `<distribution>:<params>` with values in milliseconds:
+    `fixed:50`, `uniform:20,80`, or `lognormal:<median>,<sigma>`.
+    """
+
+    distribution: str
+    params: Tuple[float, ...]
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._random = random.Random(self.seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "LatencyModel":
+        distribution, _, raw = spec.partition(":")
+        params = tuple(float(value) for value in raw.split(",") if value)
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if expected.get(distribution) != len(params):
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        return cls(distribution, params, seed)
+
+    @classmethod
+    def from_env(cls, name: str = "ARENA_FAKE_LATENCY") -> Optional["LatencyModel"]:
+        spec = os.getenv(name)
+        if not spec:
+            return None
+        seed = os.getenv(f"{name}_SEED")
+        return cls.parse(spec, seed=int(seed) if seed else None)
+
+    def sample_ms(self) -> float:
+        if self.distribution == "fixed":
+            return self.params[0]
+        if self.distribution == "uniform":
+            return self._random.uniform(*self.params)
+        median, sigma = self.params
+        return median * self._random.lognormvariate(0.0, sigma)
+
+    async def sleep(self) -> None:
+        await asyncio.sleep(self.sample_ms() / 1000)
+
+
+def inject_latency(target: Any, latency: LatencyModel, *method_names: str) -> Any:
+    """
+    Replaces the named async methods on `target` with versions that first sleep for a
+    sampled latency. The object is patched in place and returned.
+    """
+    for name in method_names:
+        method = getattr(target, name)
+
+        @functools.wraps(method)
+        async def delayed(*args: Any, _method=method, **kwargs: Any) -> Any:
+            await latency.sleep()
+            return await _method(*args, **kwargs)
+
+        setattr(target, name, delayed)
+    return target
+
+
+class InjectedFault(Exception):
+    """
+    Raised by a call that FaultModel decided should fail
+    """
+
+
+@dataclass
+class FaultModel:
+    """
+    Simulated upstream faults, used to exercise retries, circuit breakers and hedging
+    offline.
+
+    Specs are written as comma-separated `key=value` pairs: `error=0.2` fails a fifth of
+    the calls, `slow=0.05,slow_ms=2000` delays one call in twenty by two seconds, and
+    `down=1` fails every call, as in an outage.
+    """
+
+    error_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_ms: float = 1000.0
+    down: bool = False
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._random = random.Random(self.seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> "FaultModel":
+        fields = {"error": "error_rate", "slow": "slow_rate", "slow_ms": "slow_ms"}
+        options: Dict[str, Any] = {}
+        for item in spec.split(","):
+            key, _, value = item.strip().partition("=")
+            try:
+                if key == "down":
+                    options["down"] = value not in ("", "0", "false")
+                else:
+                    options[fields[key]] = float(value)
+            except (KeyError, ValueError):
+                raise ValueError(f"Invalid fault spec: {spec!r}")
+        return cls(**options, seed=seed)
+
+    @classmethod
+    def from_env(cls, name: str = "ARENA_FAKE_FAULTS") -> Optional["FaultModel"]:
+        spec = os.getenv(name)
+        if not spec:
+            return None
+        seed = os.getenv(f"{name}_SEED")
+        return cls.parse(spec, seed=int(seed) if seed else None)
+
+    async def apply(self) -> None:
+        """
+        Fails or delays the current call according to the model
+        """
+        roll = self._random.random()
+        if self.down or roll < self.error_rate:
+            raise InjectedFault("Injected upstream failure")
+        if roll < self.error_rate + self.slow_rate:
+            await asyncio.sleep(self.slow_ms / 1000)
+
+
+def inject_faults(target: Any, faults: FaultModel, *method_names: str) -> Any:
+    """
+    Replaces the named async methods on `target` with versions that may first fail or
+    stall according to `faults`. The object is patched in place and returned.
+    """
+    for name in method_names:
+        method = getattr(target, name)
+
+        @functools.wraps(method)
+        async def faulty(*args: Any, _method=method, **kwargs: Any) -> Any:
+            await faults.apply()
+            return await _method(*args, **kwargs)
+
+        setattr(target, name, faulty)
+    return target
@@ -0,0 +1,531 @@
+"""
+Durable plan jobs, for clients that should not hold a connection open while a plan runs.
+
+`POST /plan/jobs` stores the request in a SQLite queue and answers at once with a job id.
+A pool of workers in every app process claims queued jobs, plans them and stores the
+encoded itinerary, which `GET /plan/jobs/{id}` returns until it expires. The queue is
+a file (JOBS_PATH, `jobs.sqlite3` by default) shared by every worker on the host, so it
+survives restarts: a worker renews the lease of the job it runs, and a job left running
+by a process that died is claimed again once its lease runs out. `JOBS_PATH=:memory:`
+keeps the queue in memory, private to the process, for tests and development.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from arena_core.cache import cache_key
+from arena_core.models import PlanRequest
+from arena_core.serialization import to_json
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """
+    Raised when a job is submitted while the queue already holds its maximum
+    """
+
+
+@dataclass
+class Job:
+    """
+    One plan job. `result` holds the encoded itinerary once the job is done
+    """
+
+    id: str
+    status: str
+    request: PlanRequest
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[bytes] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_json(self) -> bytes:
+        """
+        Encodes the job for GET /plan/jobs/{id}. The stored itinerary is spliced in
+        without decoding it again
+        """
+        body = to_json(
+            {
+                "id": self.id,
+                "status": self.status,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "attempts": self.attempts,
+                "error": self.error,
+            }
+        )
+        if self.result is None:
+            return body
+        return body[:-1] + b',"result":' + self.result + b"}"
+
+
+class JobStore:
+    """
+    SQLite table of plan jobs. Every method is one short transaction; JobQueue runs them
+    off the event loop. With the path `:memory:` the table is private to the process
+    """
+
+    _COLUMNS = (
+        "id, status, request, created_at, started_at, finished_at, attempts, error, "
+        "result"
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path,
+            timeout=5.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plan_jobs ("
+            "id TEXT PRIMARY KEY, key TEXT NOT NULL, status TEXT NOT NULL, "
+            "request TEXT NOT NULL, created_at REAL NOT NULL, started_at REAL, "
+            "finished_at REAL, lease_until REAL, expires_at REAL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, result BLOB)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS plan_jobs_key ON plan_jobs (key, status)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS plan_jobs_queue "
+            "ON plan_jobs (status, created_at)"
+        )
+
+    def submit(
+        self, key: str, request: PlanRequest, max_queued: int
+    ) -> Tuple[str, bool]:
+        """
+        Queues a job unless one with the same key is queued, running or done and not
+        expired. Returns the job id and whether an existing job was reused
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM plan_jobs WHERE key = ? AND (status IN "
+                    "('queued', 'running') OR (status = 'done' AND expires_at >= ?)) "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (key, now),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("COMMIT")
+                    return row[0], True
+                (queued,) = self._conn.execute(
+                    "SELECT COUNT(*) FROM plan_jobs WHERE status = 'queued'"
+                ).fetchone()
+                if queued >= max_queued:
+                    raise QueueFull(f"{queued} plan jobs are already queued")
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO plan_jobs (id, key, status, request, created_at) "
+                    "VALUES (?, ?, 'queued', ?, ?)",
+                    (job_id, key, request.model_dump_json(), now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id, False
+
+    def claim(self, lease: float, max_attempts: int, ttl: float) -> Optional[Job]:
+        """
+        Marks the oldest queued job, or a running job whose lease ran out, as running
+        and returns it. A job already started `max_attempts` times fails instead, and is
+        kept for `ttl` seconds like any finished job
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE plan_jobs SET status = 'failed', finished_at = ?, "
+                    "expires_at = ?, error = 'Gave up after the worker running it stopped ' || "
+                    "attempts || ' times' "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now + ttl, now, max_attempts),
+                )
+                row = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM plan_jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE plan_jobs SET status = 'running', started_at = ?, "
+                        "lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                        (now, now + lease, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = self._job(row)
+        job.status, job.started_at, job.attempts = "running", now, job.attempts + 1
+        return job
+
+    def renew(self, job_id: str, attempts: int, lease: float) -> bool:
+        """
+        Extends the lease of a running job by `lease` seconds from now. Returns False
+        when the job is no longer running or was claimed again since attempt `attempts`
+        """
+        with self._lock:
+            return (
+                self._conn.execute(
+                    "UPDATE plan_jobs SET lease_until = ? "
+                    "WHERE id = ? AND status = 'running' AND attempts = ?",
+                    (time.time() + lease, job_id, attempts),
+                ).rowcount
+                > 0
+            )
+
+    def finish(
+        self,
+        job_id: str,
+        attempts: int,
+        ttl: float,
+        result: Optional[bytes] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """
+        Stores the outcome of attempt `attempts`. Returns False, storing nothing, when
+        the job was claimed again or given up on since, so a worker that lost its lease
+        cannot overwrite the outcome of the attempt that replaced it
+        """
+        now = time.time()
+        with self._lock:
+            return (
+                self._conn.execute(
+                    "UPDATE plan_jobs SET status = ?, finished_at = ?, expires_at = ?, "
+                    "lease_until = NULL, result = ?, error = ? "
+                    "WHERE id = ? AND status = 'running' AND attempts = ?",
+                    (
+                        "done" if error is None else "failed",
+                        now,
+                        now + ttl,
+                        result,
+                        error,
+                        job_id,
+                        attempts,
+                    ),
+                ).rowcount
+                > 0
+            )
+
+    def release(self, job_id: str, attempts: int) -> None:
+        """
+        Puts a running job back in the queue without counting the attempt, when its
+        worker is stopped. Does nothing when the job was claimed again since
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE plan_jobs SET status = 'queued', lease_until = NULL, "
+                "attempts = attempts - 1 "
+                "WHERE id = ? AND status = 'running' AND attempts = ?",
+                (job_id, attempts),
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM plan_jobs WHERE id = ? "
+                "AND (expires_at IS NULL OR expires_at >= ?)",
+                (job_id, time.time()),
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def purge(self) -> int:
+        """
+        Deletes finished jobs whose results expired
+        """
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM plan_jobs WHERE expires_at < ?", (time.time(),)
+            ).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM plan_jobs GROUP BY status"
+            ).fetchall()
+        return {status: 0 for status in JOB_STATUSES} | dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _job(self, row: tuple) -> Job:
+        return Job(
+            id=row[0],
+            status=row[1],
+            request=PlanRequest.model_validate_json(row[2]),
+            created_at=row[3],
+            started_at=row[4],
+            finished_at=row[5],
+            attempts=row[6],
+            error=row[7],
+            result=row[8],
+        )
+
+
+class JobQueue:
+    """
+    Job Queue - Accepts plan jobs and runs them on a pool of background workers, so the
+    number of plans in progress is bounded by `workers` rather than by open connections.
+
+    Identical requests share a job: a request whose normalized key matches a queued,
+    running or unexpired finished job gets that job's id. Results are kept for
+    `result_ttl` seconds. Workers wake up at once for jobs submitted in this process, and
+    every `poll_interval` seconds for jobs submitted by other processes. Likewise a
+    waiting `get` wakes up as soon as a job run by this process finishes, and polls for
+    jobs run elsewhere.
+
+    A worker renews its job's lease every third of `lease` while the plan runs, so only
+    a job whose worker stopped renewing it is claimed again. A worker that lost its lease
+    anyway drops its result, since the job belongs to the attempt that claimed it next.
+    Store errors, such as a
+    queue file locked by another process, are logged and retried after `poll_interval`
+    rather than stopping the worker.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 4,
+        max_queued: int = 1000,
+        result_ttl: float = 3600.0,
+        lease: float = 300.0,
+        max_attempts: int = 3,
+        poll_interval: float = 0.5,
+        purge_interval: float = 60.0,
+    ):
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        self.counters = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "done": 0,
+            "failed": 0,
+            "lost": 0,
+        }
+        self.worker_errors = 0
+        self._wakeup = asyncio.Event()
+        # Jobs this process is running, and the events their waiters wait on
+        self._running: Set[str] = set()
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._purged_at = time.monotonic()
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        return cls(
+            JobStore(os.getenv("JOBS_PATH") or "jobs.sqlite3"),
+            workers=int(os.getenv("JOBS_WORKERS", "4")),
+            max_queued=int(os.getenv("JOBS_MAX_QUEUED", "1000")),
+            result_ttl=float(os.getenv("JOBS_RESULT_TTL_SECONDS", "3600")),
+            lease=float(os.getenv("JOBS_LEASE_SECONDS", "300")),
+            max_attempts=int(os.getenv("JOBS_MAX_ATTEMPTS", "3")),
+        )
+
+    def key(self, request: PlanRequest) -> str:
+        # Budgets are not bucketed, since the result reports the exact budget
+        return cache_key("job", **request.model_dump())
+
+    async def submit(self, request: PlanRequest) -> Tuple[str, bool]:
+        """
+        Queues a plan and returns its job id, and whether an identical job was reused.
+        Raises QueueFull when the queue is at its limit
+        """
+        job_id, reused = await asyncio.to_thread(
+            self.store.submit, self.key(request), request, self.max_queued
+        )
+        self.counters["deduplicated" if reused else "submitted"] += 1
+        if not reused:
+            self._wakeup.set()
+        return job_id, reused
+
+    async def get(self, job_id: str, wait: float = 0.0) -> Optional[Job]:
+        """
+        Returns the job, waiting up to `wait` seconds for it to finish
+        """
+        deadline = time.monotonic() + wait
+        job = await asyncio.to_thread(self.store.get, job_id)
+        while job is not None and not job.finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            timeout = min(remaining, self.poll_interval)
+            if job_id in self._running:
+                # Woken at once when the job finishes here. `_run` drops the event
+                # when the job stops running, so no event outlives its job
+                finished = self._finished.setdefault(job_id, asyncio.Event())
+                try:
+                    await asyncio.wait_for(finished.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Run by another process, or not claimed yet
+                await asyncio.sleep(timeout)
+            job = await asyncio.to_thread(self.store.get, job_id)
+        return job
+
+    def start(self, run: Callable[[PlanRequest], Awaitable[Any]]) -> None:
+        """
+        Starts the workers. `run` plans one request and returns the itinerary
+        """
+        self._tasks = [
+            asyncio.ensure_future(self._work(run)) for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Stops the workers. Jobs they were running go back to the queue
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def close(self) -> None:
+        self.store.close()
+
+    def render(self, namespace: str = "arena") -> str:
+        """
+        Job counts by status and job outcomes in the Prometheus text format
+        """
+        lines = [
+            f"# HELP {namespace}_jobs Plan jobs by status.",
+            f"# TYPE {namespace}_jobs gauge",
+        ]
+        for status, count in self.store.counts().items():
+            lines.append(f'{namespace}_jobs{{status="{status}"}} {count}')
+        lines += [
+            f"# HELP {namespace}_jobs_total Plan jobs handled by this worker.",
+            f"# TYPE {namespace}_jobs_total counter",
+        ]
+        for outcome, count in self.counters.items():
+            lines.append(f'{namespace}_jobs_total{{outcome="{outcome}"}} {count}')
+        lines += [
+            f"# HELP {namespace}_jobs_worker_errors_total Queue errors the workers "
+            "retried after.",
+            f"# TYPE {namespace}_jobs_worker_errors_total counter",
+            f"{namespace}_jobs_worker_errors_total {self.worker_errors}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    async def _work(self, run: Callable[[PlanRequest], Awaitable[Any]]) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(
+                    self.store.claim, self.lease, self.max_attempts, self.result_ttl
+                )
+                if job is not None:
+                    await self._run(job, run)
+                    continue
+                if time.monotonic() - self._purged_at >= self.purge_interval:
+                    self._purged_at = time.monotonic()
+                    await asyncio.to_thread(self.store.purge)
+            except Exception:
+                # A job whose result could not be stored is claimed again once its
+                # lease runs out
+                self.worker_errors += 1
+                logger.exception("Plan job worker failed, retrying")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _renew(self, job: Job) -> None:
+        """
+        Keeps the job's lease from running out while its plan is in progress
+        """
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                renewed = await asyncio.to_thread(
+                    self.store.renew, job.id, job.attempts, self.lease
+                )
+                if not renewed:
+                    return
+            except Exception:
+                logger.exception("Could not renew the lease of plan job %s", job.id)
+
+    async def _run(
+        self, job: Job, run: Callable[[PlanRequest], Awaitable[Any]]
+    ) -> None:
+        self._running.add(job.id)
+        renewal = asyncio.ensure_future(self._renew(job))
+        try:
+            try:
+                result = to_json(await run(job.request))
+            except asyncio.CancelledError:
+                await asyncio.shield(
+                    asyncio.to_thread(self.store.release, job.id, job.attempts)
+                )
+                raise
+            except Exception as e:
+                outcome = "failed"
+                stored = await asyncio.to_thread(
+                    self.store.finish,
+                    job.id,
+                    job.attempts,
+                    self.result_ttl,
+                    error=str(e) or repr(e),
+                )
+            else:
+                outcome = "done"
+                stored = await asyncio.to_thread(
+                    self.store.finish,
+                    job.id,
+                    job.attempts,
+                    self.result_ttl,
+                    result=result,
+                )
+            if not stored:
+                outcome = "lost"
+                logger.warning(
+                    "Dropped the result of plan job %s: its lease ran out and it was "
+                    "claimed again or given up on",
+                    job.id,
+                )
+            self.counters[outcome] += 1
+        finally:
+            renewal.cancel()
+            self._running.discard(job.id)
+            finished = self._finished.pop(job.id, None)
+            if finished is not None:
+                finished.set()
@@ -0,0 +1,182 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+
+class ArenaModel(BaseModel):
+    """
+    Base model for the planning pipeline.
+
+    Fields accept either their name or their alias, and responses are serialized with
+    `by_alias=True, exclude_unset=True` so optional fields an agent never filled in are
+    left out of the JSON, exactly like the hand-built dicts they replace.
+    """
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class PlanRequest(ArenaModel):
+    """
+    Body of POST /plan
+    """
+
+    destination: str
+    start_date: str = Field(alias="startDate")
+    end_date: str = Field(alias="endDate")
+    budget: float
+    preferences: Dict[str, Any] = Field(default_factory=dict)
+
+    @model_validator(mode="after")
+    def check_dates(self) -> "PlanRequest":
+        # Parsed here so a bad date is a 422 rather than a failure during synthesis
+        if date.fromisoformat(self.end_date) < date.fromisoformat(self.start_date):
+            raise ValueError("endDate must not be before startDate")
+        return self
+
+
+class PlanUpdate(ArenaModel):
+    """
+    Partial PlanRequest for editing a plan session. Omitted fields keep their value,
+    preferences are merged key by key and a null preference removes that key
+    """
+
+    destination: Optional[str] = None
+    start_date: Optional[str] = Field(default=None, alias="startDate")
+    end_date: Optional[str] = Field(default=None, alias="endDate")
+    budget: Optional[float] = None
+    preferences: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchPlanRequest(ArenaModel):
+    """
+    Body of POST /plan/batch. `concurrency` can lower, but not raise, the server's limit
+    on how many plans of the batch run at once. Each item is validated as a PlanRequest
+    on its own when it runs, so an invalid trip fails alone instead of the whole batch
+    """
+
+    requests: List[Dict[str, Any]] = Field(min_length=1)
+    concurrency: Optional[int] = Field(default=None, ge=1)
+
+
+class FlightEndpoint(ArenaModel):
+    airport: str
+    time: str
+
+
+class FlightLeg(ArenaModel):
+    airline: str
+    flight_number: str
+    departure: FlightEndpoint
+    arrival: FlightEndpoint
+    duration: str
+    price: float
+
+
+class FlightResult(ArenaModel):
+    outbound: FlightLeg
+    return_flight: FlightLeg = Field(alias="return")
+    total_cost: float
+    rating: Optional[float] = None
+    notes: List[str] = Field(default_factory=list)
+
+
+class AccommodationResult(ArenaModel):
+    type: str
+    name: str
+    address: str
+    check_in: str
+    check_out: str
+    nights: int
+    room_type: Optional[str] = None
+    property_type: Optional[str] = None
+    amenities: List[str] = Field(default_factory=list)
+    total_cost: float
+    nightly_rate: float
+    rating: float
+    images: List[str] = Field(default_factory=list)
+    notes: List[str] = Field(default_factory=list)
+
+
+class Activity(ArenaModel):
+    name: str
+    category: str
+    description: str
+    location: str
+    price: float
+    duration: str
+    rating: float
+    images: List[str] = Field(default_factory=list)
+    date: str
+    # Opening hours as "HH:MM"; the scheduler assumes daytime hours when unknown
+    opens: Optional[str] = None
+    closes: Optional[str] = None
+
+
+class Restaurant(ArenaModel):
+    name: str
+    category: str
+    cuisine: str
+    description: str
+    location: str
+    price_range: str
+    rating: float
+    images: List[str] = Field(default_factory=list)
+    recommended_dishes: List[str] = Field(default_factory=list)
+
+
+class ActivitiesResult(ArenaModel):
+    activities: List[Activity]
+    dining: List[Restaurant] = Field(default_factory=list)
+    total_cost: float
+    notes: List[str] = Field(default_factory=list)
+
+
+class TripDates(ArenaModel):
+    start: str
+    end: str
+
+
+class BudgetSummary(ArenaModel):
+    total: float
+    spent: float
+    remaining: float
+
+
+class ScheduledItem(ArenaModel):
+    kind: str  # "activity" or "dining"
+    name: str
+    start: str
+    end: str
+    location: str
+
+
+class DayPlan(ArenaModel):
+    day: int
+    date: str
+    area: Optional[str] = None
+    items: List[ScheduledItem] = Field(default_factory=list)
+
+
+class Itinerary(ArenaModel):
+    """
+    Response of POST /plan. A section is null when its agent failed
+    """
+
+    destination: str
+    dates: TripDates
+    budget: BudgetSummary
+    transportation: Optional[FlightResult]
+    accommodation: Optional[AccommodationResult]
+    activities: Optional[ActivitiesResult]
+    days: List[DayPlan] = Field(default_factory=list)
+    summary: str
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+# Itinerary section name -> model of the agent result that fills it
+SECTION_MODELS = {
+    "transportation": FlightResult,
+    "accommodation": AccommodationResult,
+    "activities": ActivitiesResult,
+}
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from arena_core.resilience import Stale, UpstreamUnavailable
+from arena_core.tracing import get_tracer
+
+BranchFactory = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class BranchResult:
+    """
+    Outcome of a single fan-out branch
+    """
+
+    name: str
+    status: str  # "ok", "timeout" or "error"
+    value: Any = None
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+    # Set when the branch failed because its upstream is unavailable
+    retry_after: Optional[float] = None
+    # Set when the value is a last good result served while the upstream is down;
+    # `error` then says why the upstream call failed
+    stale: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+class FanOutOrchestrator:
+    """
+    Fan-out/fan-in orchestrator - Runs independent agent calls concurrently, each with its own
+    timeout, and collects partial results instead of failing the whole plan
+    """
+
+    def __init__(
+        self,
+        default_timeout: float = 30.0,
+        timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+
+    async def run(self, branches: Dict[str, BranchFactory]) -> Dict[str, BranchResult]:
+        """
+        Starts every branch at once and waits for all of them to settle.
+
+        A branch that times out or raises is reported with its status instead of propagating.
+        If the caller is cancelled, every branch that is still running is cancelled as well.
+        """
+        results = {}
+        async for result in self.iter_results(branches):
+            results[result.name] = result
+
+        # Report results in the order the branches were declared
+        return {name: results[name] for name in branches}
+
+    async def iter_results(
+        self, branches: Dict[str, BranchFactory]
+    ) -> AsyncIterator[BranchResult]:
+        """
+        Starts every branch at once and yields each result as soon as it settles.
+
+        Branches still running when the consumer stops iterating, or is cancelled, are
+        cancelled.
+        """
+        async for result in self.as_completed(self.start(branches)):
+            yield result
+
+    def start(
+        self, branches: Dict[str, BranchFactory]
+    ) -> List["asyncio.Task[BranchResult]"]:
+        """
+        Starts every branch as a task. Tasks copy the current context, so context
+        variables set by the caller are seen by every branch
+        """
+        return [
+            asyncio.ensure_future(self._run_branch(name, factory))
+            for name, factory in branches.items()
+        ]
+
+    async def as_completed(
+        self, tasks: List["asyncio.Task[BranchResult]"]
+    ) -> AsyncIterator[BranchResult]:
+        """
+        Yields the result of each started branch as soon as it settles, and cancels the
+        rest when the consumer stops iterating
+        """
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _run_branch(self, name: str, factory: BranchFactory) -> BranchResult:
+        with get_tracer().span(f"agent.{name}") as span:
+            result = await self._settle(name, factory)
+            span.status = result.status
+        return result
+
+    async def _settle(self, name: str, factory: BranchFactory) -> BranchResult:
+        timeout = self.timeouts.get(name, self.default_timeout)
+        started = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(factory(), timeout=timeout)
+            if isinstance(value, Stale):
+                return BranchResult(
+                    name=name,
+                    status="ok",
+                    value=value.value,
+                    error=value.error,
+                    elapsed_ms=_elapsed_ms(started),
+                    stale=True,
+                )
+            return BranchResult(
+                name=name, status="ok", value=value, elapsed_ms=_elapsed_ms(started)
+            )
+        except asyncio.TimeoutError:
+            return BranchResult(
+                name=name,
+                status="timeout",
+                error=f"{name} did not finish within {timeout:g}s",
+                elapsed_ms=_elapsed_ms(started),
+            )
+        except Exception as e:
+            return BranchResult(
+                name=name,
+                status="error",
+                error=str(e),
+                elapsed_ms=_elapsed_ms(started),
+                retry_after=(
+                    e.retry_after if isinstance(e, UpstreamUnavailable) else None
+                ),
+            )
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
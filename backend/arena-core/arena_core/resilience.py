@@ -0,0 +1,408 @@
+"""
+Resilient calls to flaky upstreams: sub-agent searches and model providers.
+
+`Resilience.call` runs one upstream call with, in order:
+
+- a circuit breaker per upstream, which fails fast while the upstream keeps failing
+  and lets a single probe through once `reset_timeout` has passed
+- bounded retries with exponential backoff and full jitter, so clients that failed
+  together do not retry together
+- an optional hedged attempt, started when the first one is slower than the upstream's
+  recent p95 latency, whichever finishes first wins and the other is cancelled
+- a fallback to the last good result for the same key when every attempt failed or the
+  circuit is open, returned wrapped in `Stale` so callers can tell it from a fresh one
+
+Only retryable errors count against the breaker. The rest, such as a rejected request,
+propagate at once.
+"""
+
+import asyncio
+import math
+import os
+import random
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+Call = Callable[[], Awaitable[Any]]
+
+
+class UpstreamUnavailable(Exception):
+    """
+    Raised when an upstream call failed on every attempt and no fallback was available
+    """
+
+    def __init__(self, upstream: str, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """
+    Raised without calling the upstream while its circuit is open
+    """
+
+
+def retry_after_header(error: UpstreamUnavailable) -> Dict[str, str]:
+    """
+    Retry-After header for a 503 caused by an unavailable upstream
+    """
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+
+
+@dataclass
+class Stale:
+    """
+    A last good result served in place of a failed upstream call. `age` is how many
+    seconds ago it was fetched and `error` why the upstream call failed
+    """
+
+    value: Any
+    age: float
+    error: str
+
+
+@dataclass
+class RetryPolicy:
+    attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 2.0
+
+    def delay(self, attempt: int, rng: random.Random) -> float:
+        """
+        Seconds to wait after failed attempt number `attempt` (from 1): a random
+        duration up to the exponential backoff, capped at `max_delay`
+        """
+        return rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Opens when at least `failure_rate` of the last `window` calls failed, once it has
+    seen `min_calls` of them. Judging a rate rather than a run of failures keeps a burst
+    of concurrent errors from opening it while most calls still succeed. While open,
+    calls are rejected until `reset_timeout` seconds have passed. Then one probe is let
+    through (half-open), closing the circuit if it succeeds and reopening it if it fails
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        reset_timeout: float = 30.0,
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._probing = False
+
+    @property
+    def recent_failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    @property
+    def retry_after(self) -> float:
+        if self.state == "closed":
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == "open" and self.retry_after <= 0:
+            self.state = "half_open"
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def succeeded(self) -> None:
+        if self.state == "half_open":
+            self._outcomes.clear()
+        self.state = "closed"
+        self._outcomes.append(True)
+        self._probing = False
+
+    def failed(self) -> None:
+        self._outcomes.append(False)
+        if self.state == "half_open" or (
+            len(self._outcomes) >= self.min_calls
+            and self.recent_failure_rate >= self.failure_rate
+        ):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def abandoned(self) -> None:
+        """
+        Releases a probe that ended without telling whether the upstream is healthy,
+        e.g. because it was cancelled
+        """
+        self._probing = False
+
+
+class LatencyWindow:
+    """
+    Latencies of an upstream's recent successful attempts
+    """
+
+    def __init__(self, size: int = 256, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        The q-quantile of the window, or None until it holds `min_samples` latencies
+        """
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LastGood:
+    """
+    Last successful result per key, kept for up to `max_age` seconds as a fallback
+    """
+
+    def __init__(self, max_entries: int = 1024, max_age: float = 86400.0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        The last good result for `key` and its age in seconds, or None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[0]
+        if age > self.max_age:
+            return None
+        return entry[1], age
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class _Upstream:
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        self.latency = LatencyWindow()
+        self.counts: Dict[str, int] = {}
+
+    def count(self, outcome: str) -> None:
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+
+def _always(error: Exception) -> bool:
+    return True
+
+
+class Resilience:
+    """
+    Retries, circuit breakers, hedging and last-good fallbacks for named upstreams.
+
+    `retryable` decides which errors are transient. Hedging is off unless `hedge` is
+    set, and can be enabled or disabled per call, since it is only safe for idempotent
+    calls and a hedged model call may be billed twice.
+    """
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[Dict[str, Any]] = None,
+        attempt_timeout: Optional[float] = None,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        fallback: Optional[LastGood] = None,
+        retryable: Callable[[Exception], bool] = _always,
+        seed: Optional[int] = None,
+    ):
+        self.retry = retry or RetryPolicy()
+        # CircuitBreaker arguments, applied to the breaker of every upstream
+        self.breaker = breaker or {}
+        self.attempt_timeout = attempt_timeout
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.fallback = fallback
+        self.retryable = retryable
+        self._random = random.Random(seed)
+        self._upstreams: Dict[str, _Upstream] = {}
+
+    @classmethod
+    def from_env(cls, retryable: Callable[[Exception], bool] = _always) -> "Resilience":
+        env = os.environ.get
+        attempt_timeout = env("UPSTREAM_ATTEMPT_TIMEOUT")
+        fallback_age = float(env("UPSTREAM_FALLBACK_MAX_AGE", "86400"))
+        return cls(
+            retry=RetryPolicy(
+                attempts=int(env("UPSTREAM_RETRY_ATTEMPTS", "3")),
+                base_delay=float(env("UPSTREAM_RETRY_BASE_DELAY", "0.1")),
+                max_delay=float(env("UPSTREAM_RETRY_MAX_DELAY", "2")),
+            ),
+            breaker={
+                "failure_rate": float(env("CIRCUIT_FAILURE_RATE", "0.5")),
+                "window": int(env("CIRCUIT_WINDOW", "20")),
+                "min_calls": int(env("CIRCUIT_MIN_CALLS", "10")),
+                "reset_timeout": float(env("CIRCUIT_RESET_TIMEOUT", "30")),
+            },
+            attempt_timeout=float(attempt_timeout) if attempt_timeout else None,
+            hedge=env("UPSTREAM_HEDGE", "0") == "1",
+            hedge_quantile=float(env("UPSTREAM_HEDGE_QUANTILE", "0.95")),
+            fallback=LastGood(max_age=fallback_age) if fallback_age > 0 else None,
+            retryable=retryable,
+        )
+
+    async def call(
+        self,
+        upstream: str,
+        call: Call,
+        key: Optional[str] = None,
+        hedge: Optional[bool] = None,
+    ) -> Any:
+        """
+        Calls `upstream`, retrying transient failures. When `key` is given, the result is
+        remembered under it, and a later call with the same key that fails returns it
+        wrapped in `Stale`
+        """
+        state = self._upstream(upstream)
+        try:
+            value = await self._call(
+                upstream, state, call, self.hedge if hedge is None else hedge
+            )
+        except UpstreamUnavailable as e:
+            last_good = self.fallback.get(key) if self.fallback and key else None
+            if last_good is None:
+                raise
+            state.count("fallback")
+            return Stale(value=last_good[0], age=last_good[1], error=str(e))
+        if self.fallback is not None and key:
+            self.fallback.set(key, value)
+        return value
+
+    def circuit(self, upstream: str) -> CircuitBreaker:
+        return self._upstream(upstream).breaker
+
+    def render(self, namespace: str = "arena") -> str:
+        """
+        Prometheus text exposition of the attempt outcomes and circuit states
+        """
+        ns = f"{namespace}_upstream"
+        lines: List[str] = [
+            f"# HELP {ns}_calls_total Upstream attempts and fallbacks, by outcome.",
+            f"# TYPE {ns}_calls_total counter",
+        ]
+        for name, state in sorted(self._upstreams.items()):
+            for outcome, count in sorted(state.counts.items()):
+                lines.append(
+                    f'{ns}_calls_total{{upstream="{name}",outcome="{outcome}"}} {count}'
+                )
+        lines += [
+            f"# HELP {ns}_circuit_open Whether the upstream's circuit is open "
+            "(1), half-open (0.5) or closed (0).",
+            f"# TYPE {ns}_circuit_open gauge",
+        ]
+        levels = {"closed": 0, "half_open": 0.5, "open": 1}
+        for name, state in sorted(self._upstreams.items()):
+            level = levels[state.breaker.state]
+            lines.append(f'{ns}_circuit_open{{upstream="{name}"}} {level}')
+        return "\n".join(lines) + "\n"
+
+    def _upstream(self, name: str) -> _Upstream:
+        state = self._upstreams.get(name)
+        if state is None:
+            state = self._upstreams[name] = _Upstream(CircuitBreaker(**self.breaker))
+        return state
+
+    async def _call(
+        self, upstream: str, state: _Upstream, call: Call, hedge: bool
+    ) -> Any:
+        breaker = state.breaker
+        for attempt in range(1, self.retry.attempts + 1):
+            if not breaker.allow():
+                state.count("short_circuit")
+                raise CircuitOpenError(
+                    upstream,
+                    f"{upstream} is unavailable; circuit open after "
+                    f"{breaker.recent_failure_rate:.0%} of recent calls failed",
+                    retry_after=breaker.retry_after,
+                )
+            try:
+                value = await self._attempt(state, call, hedge)
+            except Exception as e:
+                if not self.retryable(e):
+                    breaker.abandoned()
+                    raise
+                state.count(
+                    "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                )
+                breaker.failed()
+                if attempt == self.retry.attempts:
+                    raise UpstreamUnavailable(
+                        upstream,
+                        f"{upstream} failed after {attempt} attempts: {e!r}",
+                        retry_after=breaker.retry_after,
+                    ) from e
+                await asyncio.sleep(self.retry.delay(attempt, self._random))
+            except BaseException:
+                breaker.abandoned()
+                raise
+            else:
+                breaker.succeeded()
+                state.count("ok" if attempt == 1 else "retried_ok")
+                return value
+
+    async def _attempt(self, state: _Upstream, call: Call, hedge: bool) -> Any:
+        delay = state.latency.quantile(self.hedge_quantile) if hedge else None
+        if delay is None:
+            return await self._timed(state, call)
+
+        first = asyncio.ensure_future(self._timed(state, call))
+        attempts = {first}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if done:
+                return first.result()
+            # The first attempt is slower than most, so race a second one against it
+            state.count("hedged")
+            attempts.add(asyncio.ensure_future(self._timed(state, call)))
+            error: Optional[BaseException] = None
+            while attempts:
+                done, attempts = await asyncio.wait(
+                    attempts, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            state.count("hedge_won")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def _timed(self, state: _Upstream, call: Call) -> Any:
+        started = time.perf_counter()
+        if self.attempt_timeout is None:
+            value = await call()
+        else:
+            value = await asyncio.wait_for(call(), timeout=self.attempt_timeout)
+        state.latency.add(time.perf_counter() - started)
+        return value
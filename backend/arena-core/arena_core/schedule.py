@@ -0,0 +1,330 @@
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from arena_core.models import Activity, DayPlan, Restaurant, ScheduledItem
+
+DAY_START = 9 * 60
+DAY_END = 22 * 60
+LUNCH = (12 * 60 + 30, 13 * 60 + 30)
+DINNER = (19 * 60, 20 * 60 + 30)
+DEFAULT_DURATION = 120
+# Buffer between two items, longer when moving to another part of town
+SAME_AREA_GAP = 15
+NEW_AREA_GAP = 45
+# Time to leave after arriving and to keep free before the flight home
+ARRIVAL_BUFFER = 90
+DEPARTURE_BUFFER = 180
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*(h|hour|hours|m|min|mins|minutes)\b")
+
+
+def parse_duration_minutes(text: str) -> float:
+    """
+    Parses durations such as "4h 00m" or "3 hours" into minutes
+    """
+    minutes = 0.0
+    for amount, unit in _DURATION_PART.findall(text.lower()):
+        minutes += float(amount) * (60 if unit.startswith("h") else 1)
+    return minutes
+
+
+def parse_clock(text: str) -> int:
+    hours, _, minutes = text.partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def format_clock(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def area_of(location: str) -> str:
+    """
+    Neighbourhood part of a location such as "Art District, Paris"
+    """
+    return location.split(",")[0].strip()
+
+
+@dataclass
+class TripCalendar:
+    """
+    Trip dates parsed once, with the number of nights and the list of days
+    """
+
+    start: date
+    end: date
+
+    @classmethod
+    def parse(cls, start_date: str, end_date: str) -> "TripCalendar":
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        if end < start:
+            raise ValueError(f"Trip ends ({end_date}) before it starts ({start_date})")
+        return cls(start, end)
+
+    @property
+    def nights(self) -> int:
+        return (self.end - self.start).days
+
+    @property
+    def days(self) -> List[date]:
+        return [
+            self.start + timedelta(days=offset) for offset in range(self.nights + 1)
+        ]
+
+
+def trip_nights(start_date: str, end_date: str) -> int:
+    return TripCalendar.parse(start_date, end_date).nights
+
+
+@dataclass
+class _Block:
+    """
+    A free stretch of a day between meals, filled from its start
+    """
+
+    cursor: int
+    end: int
+
+
+@dataclass
+class _Day:
+    date: date
+    blocks: List[_Block]
+    meals: List[Tuple[int, int]]
+    items: List[Tuple[int, ScheduledItem]] = field(default_factory=list)
+    area: Optional[str] = None
+    last_area: Optional[str] = None
+
+    # Longest stretch still free, kept up to date so full days are skipped cheaply
+    longest: int = 0
+
+    def __post_init__(self) -> None:
+        self._measure()
+
+    def _measure(self) -> None:
+        if not self.blocks:
+            self.longest = 0
+        elif not self.items:
+            # An empty day can also give up lunch. A day that starts after dinner,
+            # such as a late arrival, has no such stretch
+            self.longest = max(
+                0, min(DINNER[0], self.blocks[-1].end) - self.blocks[0].cursor
+            )
+        else:
+            self.longest = max(block.end - block.cursor for block in self.blocks)
+
+    def place(self, activity: Activity, duration: int, opens: int, closes: int) -> bool:
+        """
+        Puts the activity in the first block where it fits its opening hours. A day with
+        nothing planned yet skips lunch for an activity too long for any single block
+        """
+        area = area_of(activity.location)
+        gap = 0
+        if self.last_area is not None:
+            gap = SAME_AREA_GAP if area == self.last_area else NEW_AREA_GAP
+        for block in self.blocks:
+            start = max(block.cursor + gap, opens)
+            if start + duration <= min(block.end, closes):
+                block.cursor = start + duration
+                self._add(activity, area, start, duration)
+                return True
+
+        if self.items or not self.blocks:
+            return False
+        start = max(self.blocks[0].cursor, opens)
+        end = start + duration
+        if end > min(DINNER[0], self.blocks[-1].end, closes):
+            return False
+        self.meals = [meal for meal in self.meals if meal[1] <= start or meal[0] >= end]
+        for block in self.blocks:
+            if block.cursor < end:
+                block.cursor = min(end, block.end)
+        self._add(activity, area, start, duration)
+        return True
+
+    def _add(self, activity: Activity, area: str, start: int, duration: int) -> None:
+        self.area = self.area or area
+        self.last_area = area
+        self.items.append(
+            (
+                start,
+                ScheduledItem(
+                    kind="activity",
+                    name=activity.name,
+                    start=format_clock(start),
+                    end=format_clock(start + duration),
+                    location=activity.location,
+                ),
+            )
+        )
+        self._measure()
+
+
+def _build_days(
+    calendar: TripCalendar, arrival: Optional[str], departure: Optional[str]
+) -> List[_Day]:
+    days = []
+    first, last = calendar.start, calendar.end
+    for day in calendar.days:
+        day_start, day_end = DAY_START, DAY_END
+        if arrival and day == first:
+            landed = datetime.fromisoformat(arrival)
+            if landed.date() == day:
+                day_start = max(
+                    day_start, landed.hour * 60 + landed.minute + ARRIVAL_BUFFER
+                )
+        if departure and day == last:
+            takeoff = datetime.fromisoformat(departure)
+            if takeoff.date() == day:
+                day_end = min(
+                    day_end, takeoff.hour * 60 + takeoff.minute - DEPARTURE_BUFFER
+                )
+
+        # Meals split the day into morning, afternoon and evening blocks
+        meals = [
+            meal
+            for meal in (LUNCH, DINNER)
+            if day_start <= meal[0] and meal[1] <= day_end
+        ]
+        bounds = [day_start]
+        for meal_start, meal_end in meals:
+            bounds += [meal_start, meal_end]
+        bounds.append(day_end)
+        blocks = [
+            _Block(cursor=bounds[index], end=bounds[index + 1])
+            for index in range(0, len(bounds), 2)
+            if bounds[index] < bounds[index + 1]
+        ]
+        days.append(_Day(date=day, blocks=blocks, meals=meals))
+    return days
+
+
+@dataclass
+class Schedule:
+    days: List[DayPlan]
+    # Activities with their date set to the day they were scheduled on
+    activities: List[Activity]
+    unscheduled: List[str]
+
+
+def schedule_trip(
+    start_date: str,
+    end_date: str,
+    activities: Sequence[Activity],
+    dining: Sequence[Restaurant] = (),
+    arrival: Optional[str] = None,
+    departure: Optional[str] = None,
+) -> Schedule:
+    """
+    Lays out a day-by-day plan for the trip.
+
+    Activities are grouped by area and placed greedily, best-rated areas and activities
+    first, into the first day with a free block that fits their duration and opening
+    hours. A day pointer only moves forward while an area fills its days, so an area's
+    activities end up on neighbouring days and the whole pass stays close to linear in
+    the number of activities, even for months-long trips. Lunch and dinner go to
+    restaurants in the day's main area when possible. Arrival and departure times (ISO
+    datetimes of the flights) shorten the first and last day.
+    """
+    calendar = TripCalendar.parse(start_date, end_date)
+    days = _build_days(calendar, arrival, departure)
+
+    # Rank areas by their best activity, then activities by rating within an area
+    best_in_area: Dict[str, float] = {}
+    for activity in activities:
+        area = area_of(activity.location)
+        best_in_area[area] = max(best_in_area.get(area, 0.0), activity.rating)
+    ranked = sorted(
+        range(len(activities)),
+        key=lambda index: (
+            -best_in_area[area_of(activities[index].location)],
+            area_of(activities[index].location),
+            -activities[index].rating,
+        ),
+    )
+
+    scheduled_on: Dict[int, date] = {}
+    pointer, current_area = 0, None
+    for index in ranked:
+        activity = activities[index]
+        area = area_of(activity.location)
+        if area != current_area and current_area is not None and days[pointer].items:
+            # Start the next area on a fresh day when one is left
+            pointer = min(pointer + 1, len(days) - 1)
+        current_area = area
+
+        duration = int(parse_duration_minutes(activity.duration) or DEFAULT_DURATION)
+        opens = parse_clock(activity.opens) if activity.opens else DAY_START
+        closes = parse_clock(activity.closes) if activity.closes else DAY_END
+        for offset, day in enumerate(days[pointer:]):
+            if day.longest >= duration and day.place(activity, duration, opens, closes):
+                scheduled_on[index] = day.date
+                pointer += offset
+                break
+        else:
+            # Fall back to any earlier day with room left
+            for day in days[:pointer]:
+                if day.longest >= duration and day.place(
+                    activity, duration, opens, closes
+                ):
+                    scheduled_on[index] = day.date
+                    break
+
+    _assign_dining(days, dining)
+
+    plans = [
+        DayPlan(
+            day=number,
+            date=day.date.isoformat(),
+            area=day.area,
+            items=[item for _, item in sorted(day.items, key=lambda pair: pair[0])],
+        )
+        for number, day in enumerate(days, start=1)
+    ]
+    return Schedule(
+        days=plans,
+        activities=[
+            (
+                activity.model_copy(update={"date": scheduled_on[index].isoformat()})
+                if index in scheduled_on
+                else activity
+            )
+            for index, activity in enumerate(activities)
+        ],
+        unscheduled=[
+            activity.name
+            for index, activity in enumerate(activities)
+            if index not in scheduled_on
+        ],
+    )
+
+
+def _assign_dining(days: List[_Day], dining: Sequence[Restaurant]) -> None:
+    if not dining:
+        return
+    by_area: Dict[str, List[Restaurant]] = {}
+    for restaurant in dining:
+        by_area.setdefault(area_of(restaurant.location), []).append(restaurant)
+    # Rotate through each list so consecutive meals go to different places
+    turns: Dict[str, int] = {}
+
+    for day in days:
+        for meal_start, meal_end in day.meals:
+            area = day.area if day.area in by_area else None
+            options = by_area[area] if area else list(dining)
+            turn = turns.get(area or "", 0)
+            restaurant = options[turn % len(options)]
+            turns[area or ""] = turn + 1
+            day.items.append(
+                (
+                    meal_start,
+                    ScheduledItem(
+                        kind="dining",
+                        name=restaurant.name,
+                        start=format_clock(meal_start),
+                        end=format_clock(meal_end),
+                        location=restaurant.location,
+                    ),
+                )
+            )
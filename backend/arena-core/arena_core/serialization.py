@@ -0,0 +1,52 @@
+import json
+from typing import AbstractSet, Any, Optional
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+
+def _encode_model(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True, exclude_unset=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_json(value: Any, include: Optional[AbstractSet[str]] = None) -> bytes:
+    """
+    Encodes a model, or plain data that may contain models, as compact JSON bytes.
+
+    Models go straight through Pydantic's compiled serializer, which can limit a model to
+    the top-level fields in `include`. Plain data uses orjson when it is installed and
+    the standard library otherwise.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump_json(
+            by_alias=True, exclude_unset=True, include=include
+        ).encode()
+    if orjson is not None:
+        return orjson.dumps(value, default=_encode_model)
+    return json.dumps(value, default=_encode_model, separators=(",", ":")).encode()
+
+
+class ModelResponse(Response):
+    """
+    JSON response that skips FastAPI's jsonable_encoder pass and encodes with to_json,
+    optionally limited to the top-level fields in `include`
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self, content: Any, include: Optional[AbstractSet[str]] = None, **kwargs: Any
+    ):
+        # Set before the base class renders the body
+        self.include = include
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content, include=self.include)
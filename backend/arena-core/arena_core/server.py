@@ -0,0 +1,152 @@
+"""
+Launches a backend under uvicorn in development or production mode.
+
+Development mode is a single process with auto-reload. Production mode runs several
+worker processes under uvicorn's supervisor, which restarts workers that exit. It uses
+uvloop and httptools when they are installed and tunes keep-alive and the listen
+backlog. Workers are recycled after a number of requests to bound memory growth, and
+shutdown waits for in-flight requests to finish.
+
+Every setting can be given on the command line or through the environment:
+
+  SERVER_MODE                 dev or prod (default prod; --dev is a shortcut)
+  HOST, PORT                  bind address
+  WEB_CONCURRENCY             production workers (default: one per CPU)
+  SERVER_KEEPALIVE            seconds an idle keep-alive connection stays open
+  SERVER_BACKLOG              listen backlog
+  SERVER_MAX_REQUESTS         requests before a worker is recycled (0 disables)
+  SERVER_MAX_REQUESTS_JITTER  random extra requests, so workers do not recycle at once
+  SERVER_GRACEFUL_TIMEOUT     seconds shutdown waits for in-flight requests
+  LOG_LEVEL                   uvicorn log level
+"""
+
+import argparse
+import importlib.util
+import inspect
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+@dataclass
+class ServerSettings:
+    mode: str = "prod"
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 1
+    # Longer than the usual 60 s idle timeout of load balancers, so the proxy closes
+    # idle connections first and never reuses one the server just closed
+    keep_alive: int = 65
+    backlog: int = 2048
+    max_requests: int = 10000
+    max_requests_jitter: int = 1000
+    graceful_timeout: int = 30
+    log_level: str = "info"
+
+    @property
+    def loop(self) -> str:
+        return "uvloop" if _installed("uvloop") else "asyncio"
+
+    @property
+    def http(self) -> str:
+        return "httptools" if _installed("httptools") else "h11"
+
+    def uvicorn_options(self) -> Dict[str, Any]:
+        """
+        Keyword arguments for uvicorn.run. Options the installed uvicorn does not know
+        about are left out
+        """
+        if self.mode == "dev":
+            options: Dict[str, Any] = {"reload": True}
+        else:
+            options = {
+                "workers": self.workers,
+                "loop": self.loop,
+                "http": self.http,
+                "timeout_keep_alive": self.keep_alive,
+                "backlog": self.backlog,
+                # A single worker runs without the supervisor, so nothing would
+                # restart it after it recycles
+                "limit_max_requests": (
+                    self.max_requests or None if self.workers > 1 else None
+                ),
+                "limit_max_requests_jitter": self.max_requests_jitter,
+                "timeout_graceful_shutdown": self.graceful_timeout,
+                "access_log": False,
+            }
+        options.update(host=self.host, port=self.port, log_level=self.log_level)
+        supported = inspect.signature(uvicorn.Config).parameters
+        return {name: value for name, value in options.items() if name in supported}
+
+
+def parse_settings(
+    default_port: int, argv: Optional[List[str]] = None
+) -> ServerSettings:
+    """
+    Reads the server settings from the command line, falling back to the environment
+    """
+    env = os.environ.get
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--mode", choices=["dev", "prod"], default=env("SERVER_MODE", "prod")
+    )
+    parser.add_argument(
+        "--dev",
+        dest="mode",
+        action="store_const",
+        const="dev",
+        help="same as --mode dev",
+    )
+    parser.add_argument("--host", default=env("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(env("PORT", default_port)))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(env("WEB_CONCURRENCY", os.cpu_count() or 1)),
+    )
+    parser.add_argument(
+        "--keep-alive", type=int, default=int(env("SERVER_KEEPALIVE", "65"))
+    )
+    parser.add_argument(
+        "--backlog", type=int, default=int(env("SERVER_BACKLOG", "2048"))
+    )
+    parser.add_argument(
+        "--max-requests", type=int, default=int(env("SERVER_MAX_REQUESTS", "10000"))
+    )
+    parser.add_argument(
+        "--max-requests-jitter",
+        type=int,
+        default=int(env("SERVER_MAX_REQUESTS_JITTER", "1000")),
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=int(env("SERVER_GRACEFUL_TIMEOUT", "30")),
+    )
+    parser.add_argument("--log-level", default=env("LOG_LEVEL", "info"))
+    args = parser.parse_args(argv)
+    return ServerSettings(**vars(args))
+
+
+def serve(app: str, default_port: int, argv: Optional[List[str]] = None) -> None:
+    """
+    Runs the ASGI app given as "module:attribute" with settings from the command line
+    and environment
+    """
+    settings = parse_settings(default_port, argv)
+    options = settings.uvicorn_options()
+    if settings.mode == "prod":
+        print(
+            f"Starting {app} with {settings.workers} workers "
+            f"(loop={options.get('loop')}, http={options.get('http')})",
+            flush=True,
+        )
+    uvicorn.run(app, **options)
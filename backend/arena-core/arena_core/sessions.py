@@ -0,0 +1,85 @@
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+from arena_core.cache import ResultCache
+from arena_core.engine import PlanEngine
+from arena_core.models import Itinerary, PlanRequest, PlanUpdate
+
+
+def apply_update(request: PlanRequest, update: PlanUpdate) -> PlanRequest:
+    """
+    Applies a partial edit to a plan request. Raises ValidationError when the edited
+    request is invalid
+    """
+    changes = update.model_dump(exclude_unset=True, exclude={"preferences"})
+    preferences = {**request.preferences, **update.preferences}
+    changes["preferences"] = {
+        key: value for key, value in preferences.items() if value is not None
+    }
+    # Validated again so an edit cannot produce an invalid request
+    return PlanRequest.model_validate({**request.model_dump(), **changes})
+
+
+class PlanSessions:
+    """
+    Plan Sessions - Keeps the last request and per-section results of each session, so an
+    edit only re-runs the agents that depend on what changed.
+
+    Sessions are stored in their own ResultCache. Setting SESSION_PATH stores them in
+    SQLite as well, so every worker on a host can continue any session.
+    """
+
+    def __init__(self, engine: PlanEngine, store: ResultCache):
+        self.engine = engine
+        self.store = store
+
+    @classmethod
+    def from_env(cls, engine: PlanEngine) -> "PlanSessions":
+        store = ResultCache(
+            max_entries=int(os.getenv("SESSION_MAX_ENTRIES", "1024")),
+            ttl=float(os.getenv("SESSION_TTL_SECONDS", "3600")),
+            path=os.getenv("SESSION_PATH") or None,
+            budget_bucket=0,
+        )
+        return cls(engine, store)
+
+    async def create(self, request: PlanRequest) -> Itinerary:
+        return await self._plan(uuid.uuid4().hex, request, {})
+
+    async def update(self, session_id: str, update: PlanUpdate) -> Optional[Itinerary]:
+        """
+        Re-plans a session after an edit, or returns None for an unknown session
+        """
+        session = await self.store.get(self._key(session_id))
+        if session is None:
+            return None
+        request = apply_update(PlanRequest.model_validate(session["request"]), update)
+        return await self._plan(session_id, request, session["sections"])
+
+    def close(self) -> None:
+        self.store.close()
+
+    async def _plan(
+        self,
+        session_id: str,
+        request: PlanRequest,
+        sections: Dict[str, Dict[str, Any]],
+    ) -> Itinerary:
+        itinerary, sections = await self.engine.replan(
+            sections,
+            destination=request.destination,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            budget=request.budget,
+            preferences=request.preferences,
+        )
+        await self.store.set(
+            self._key(session_id),
+            {"request": request.model_dump(), "sections": sections},
+        )
+        itinerary.metadata["session_id"] = session_id
+        return itinerary
+
+    def _key(self, session_id: str) -> str:
+        return f"session:{session_id}"
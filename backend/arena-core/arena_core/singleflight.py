@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Request coalescing - Concurrent calls with the same key share one in-flight coroutine,
+    so a burst of identical searches costs a single upstream call.
+
+    The shared call is shielded: a caller that is cancelled stops waiting without
+    cancelling the call for everyone else.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._in_flight.get(key)
+        if future is None:
+            self.leaders += 1
+            future = asyncio.ensure_future(call())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.followers += 1
+        return await asyncio.shield(future)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+    def _forget(self, key: str, done: "asyncio.Future[Any]") -> None:
+        if self._in_flight.get(key) is done:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not done.cancelled():
+            done.exception()
@@ -0,0 +1,107 @@
+"""
+Cold start helpers for the backends, which scale to zero and start workers on bursts.
+
+Heavy modules that only some requests need are imported on first use with
+`lazy_import`, so a worker answers its health check sooner. `Prewarm` then optionally
+loads them, and runs a sample plan, when the app starts. Set PREWARM to:
+
+  off         do nothing (default): the first plan pays for the warm-up
+  blocking    warm up before the worker accepts requests, trading time to the first
+              healthy response for a fast first plan
+  background  warm up while the worker already serves requests
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import sys
+import time
+from types import ModuleType
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from arena_core.models import PlanRequest
+
+PREWARM_MODES = ("off", "blocking", "background")
+
+logger = logging.getLogger(__name__)
+
+# Planned by a warm-up, so the first real plan finds every code path loaded
+WARMUP_REQUEST = PlanRequest(
+    destination="Lisbon",
+    start_date="2025-06-01",
+    end_date="2025-06-05",
+    budget=3000,
+    preferences={"origin": "New York", "activities": ["sightseeing"]},
+)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Returns module `name`, executing it on first attribute access instead of now. The
+    module must be installed; annotations that use it should be quoted, since
+    evaluating them would load it
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class Prewarm:
+    """
+    Runs a worker's warm-up coroutine at startup, as set by `mode`. A failed warm-up is
+    logged and otherwise ignored, since the worker can still serve cold. `state` (off,
+    pending, running, done or failed) and `elapsed_ms` are reported by `snapshot`, so
+    a readiness check can wait for a background warm-up
+    """
+
+    def __init__(self, mode: str = "off"):
+        if mode not in PREWARM_MODES:
+            raise ValueError(f"PREWARM must be one of {', '.join(PREWARM_MODES)}")
+        self.mode = mode
+        self.state = "off" if mode == "off" else "pending"
+        self.elapsed_ms: Optional[float] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @classmethod
+    def from_env(cls) -> "Prewarm":
+        return cls(os.getenv("PREWARM", "off"))
+
+    async def start(self, warm: Callable[[], Awaitable[Any]]) -> None:
+        if self.mode == "blocking":
+            await self._run(warm)
+        elif self.mode == "background":
+            self._task = asyncio.ensure_future(self._run(warm))
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self, warm: Callable[[], Awaitable[Any]]) -> None:
+        self.state = "running"
+        started = time.perf_counter()
+        try:
+            await warm()
+        except Exception:
+            self.state = "failed"
+            logger.exception("Prewarm failed")
+        else:
+            self.state = "done"
+        finally:
+            self.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "state": self.state, "elapsed_ms": self.elapsed_ms}
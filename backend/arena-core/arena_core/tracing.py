@@ -0,0 +1,327 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - OpenTelemetry is optional
+    otel_trace = None
+
+
+@dataclass
+class Span:
+    """
+    A timed stage of a request. Spans started while another span is active become its
+    children and share its trace
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    started_at: float = 0.0
+    duration_ms: float = 0.0
+    status: str = "ok"
+    # Finished spans of the whole trace, shared by every span in it
+    finished: List["Span"] = field(default_factory=list, repr=False)
+
+    def server_timing(self) -> str:
+        """
+        Renders the finished child spans as a Server-Timing header value, summing spans
+        that share a name
+        """
+        totals: Dict[str, float] = {}
+        for span in self.finished:
+            if span is not self:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return ", ".join(f"{name};dur={dur:.1f}" for name, dur in totals.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter:
+    """
+    Receives every finished span
+    """
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JSONLinesExporter(SpanExporter):
+    """
+    Writes one JSON object per finished span, for local runs without a collector
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str) -> "JSONLinesExporter":
+        return cls(open(path, "a", buffering=1))
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+class PrometheusExporter(SpanExporter):
+    """
+    Aggregates span durations into a Prometheus histogram per span name
+    """
+
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, namespace: str = "arena"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, List[float]] = {}
+        self._sums: Dict[str, float] = {}
+        self._errors: Dict[str, int] = {}
+
+    def export(self, span: Span) -> None:
+        seconds = span.duration_ms / 1000
+        with self._lock:
+            counts = self._histograms.setdefault(
+                span.name, [0] * (len(self.buckets) + 1)
+            )
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[index] += 1
+            counts[-1] += 1
+            self._sums[span.name] = self._sums.get(span.name, 0.0) + seconds
+            if span.status != "ok":
+                self._errors[span.name] = self._errors.get(span.name, 0) + 1
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition of the span histograms
+        """
+        metric = f"{self.namespace}_span_duration_seconds"
+        errors = f"{self.namespace}_span_errors_total"
+        lines = [
+            f"# HELP {metric} Duration of traced stages.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for name, counts in sorted(self._histograms.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(
+                        f'{metric}_bucket{{span="{name}",le="{bound}"}} {count}'
+                    )
+                lines.append(f'{metric}_bucket{{span="{name}",le="+Inf"}} {counts[-1]}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {self._sums[name]:.6f}')
+                lines.append(f'{metric}_count{{span="{name}"}} {counts[-1]}')
+            lines.append(f"# HELP {errors} Traced stages that raised.")
+            lines.append(f"# TYPE {errors} counter")
+            for name, count in sorted(self._errors.items()):
+                lines.append(f'{errors}{{span="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("arena_span", default=None)
+
+
+class Tracer:
+    """
+    Lightweight tracer shared by both backends.
+
+    Spans are tracked with a context variable, so they nest correctly across awaits and
+    into tasks started while a span is active. When an OpenTelemetry tracer is given,
+    every span is mirrored to it as well.
+    """
+
+    def __init__(
+        self,
+        exporters: Optional[List[SpanExporter]] = None,
+        otel_tracer: Any = None,
+    ):
+        self.exporters = exporters or []
+        self.otel_tracer = otel_tracer
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+            started_at=time.time(),
+            finished=parent.finished if parent else [],
+        )
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            if self.otel_tracer is not None:
+                stack.enter_context(
+                    self.otel_tracer.start_as_current_span(name, attributes=attributes)
+                )
+            try:
+                yield span
+            except BaseException as e:
+                span.status = "error"
+                span.attributes["error"] = repr(e)
+                raise
+            finally:
+                span.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+                _current_span.reset(token)
+                span.finished.append(span)
+                for exporter in self.exporters:
+                    exporter.export(span)
+
+    def exporter(self, kind: type) -> Optional[SpanExporter]:
+        for exporter in self.exporters:
+            if isinstance(exporter, kind):
+                return exporter
+        return None
+
+    def close(self) -> None:
+        for exporter in self.exporters:
+            exporter.close()
+
+
+_tracer = Tracer()
+
+# Stands in for the configured tracer inside `untraced`
+_untraced_tracer = Tracer()
+_untraced: ContextVar[bool] = ContextVar("arena_untraced", default=False)
+
+
+def get_tracer() -> Tracer:
+    return _untraced_tracer if _untraced.get() else _tracer
+
+
+@contextmanager
+def untraced() -> Iterator[None]:
+    """
+    Spans started inside, and in tasks started from it, are neither exported nor
+    mirrored to OpenTelemetry
+    """
+    token = _untraced.set(True)
+    try:
+        yield
+    finally:
+        _untraced.reset(token)
+
+
+def install_otlp_exporter(service_name: str) -> bool:
+    """
+    Installs an OpenTelemetry SDK tracer provider that batches spans to the OTLP
+    collector at OTEL_EXPORTER_OTLP_ENDPOINT, over gRPC or, when
+    OTEL_EXPORTER_OTLP_PROTOCOL is `http/protobuf`, over HTTP.
+
+    A provider already installed, e.g. by the `opentelemetry-instrument` launcher, is
+    kept. Returns whether spans will be exported.
+    """
+    if not isinstance(otel_trace.get_tracer_provider(), otel_trace.ProxyTracerProvider):
+        return True
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        if os.getenv("OTEL_EXPORTER_OTLP_PROTOCOL", "grpc").startswith("http"):
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        else:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+                OTLPSpanExporter,
+            )
+    except ImportError:  # pragma: no cover - the SDK comes with the otel extra
+        return False
+
+    # OTEL_SERVICE_NAME, when set, names the service instead
+    attributes = (
+        {} if os.getenv("OTEL_SERVICE_NAME") else {"service.name": service_name}
+    )
+    resource = Resource.create(attributes)
+    provider = TracerProvider(resource=resource)
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    otel_trace.set_tracer_provider(provider)
+    return True
+
+
+def configure_tracing(service_name: str) -> Tracer:
+    """
+    Installs the process-wide tracer from environment variables.
+
+    A Prometheus aggregator is always enabled. Spans are also appended as JSON lines to
+    TRACING_JSON_PATH when it is set, and exported to OpenTelemetry when the `otel`
+    extra is installed and OTEL_EXPORTER_OTLP_ENDPOINT points at a collector.
+    """
+    global _tracer
+
+    exporters: List[SpanExporter] = [PrometheusExporter()]
+    json_path = os.getenv("TRACING_JSON_PATH")
+    if json_path:
+        exporters.append(JSONLinesExporter.open(json_path))
+
+    otel_tracer = None
+    if otel_trace is not None and os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        # Without the SDK the API only hands out no-op spans, so they are skipped
+        if install_otlp_exporter(service_name):
+            otel_tracer = otel_trace.get_tracer(service_name)
+
+    _tracer = Tracer(exporters=exporters, otel_tracer=otel_tracer)
+    return _tracer
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that wraps every HTTP request in a root span and, optionally, reports
+    the durations of the stages finished before the response starts in a Server-Timing
+    header
+    """
+
+    def __init__(self, app: Any, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with get_tracer().span(
+            "request", method=scope["method"], path=scope["path"]
+        ) as span:
+
+            async def send_with_timing(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    span.attributes["status_code"] = message["status"]
+                    timing = span.server_timing() if self.server_timing else ""
+                    if timing:
+                        headers = list(message.get("headers", []))
+                        headers.append((b"server-timing", timing.encode()))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
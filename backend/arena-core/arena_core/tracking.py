@@ -0,0 +1,54 @@
+from typing import Any, Iterator, Optional, Set
+
+
+class TrackedPreferences(dict):
+    """
+    Preferences that remember which keys an agent read, so a plan session knows which
+    request fields each section depends on.
+
+    Iterating over the preferences counts as reading all of them.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.used = False
+        self.read_all = False
+        self._read: Set[str] = set()
+
+    @property
+    def reads(self) -> Optional[Set[str]]:
+        """
+        Keys that were read, or None when the dependencies are unknown because every key
+        was read or the agent never ran
+        """
+        if not self.used or self.read_all:
+            return None
+        return set(self._read)
+
+    def __getitem__(self, key: str) -> Any:
+        self._read.add(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key: object) -> bool:
+        self._read.add(key)
+        return super().__contains__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self._read.add(key)
+        return super().get(key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        self.read_all = True
+        return super().__iter__()
+
+    def keys(self):
+        self.read_all = True
+        return super().keys()
+
+    def values(self):
+        self.read_all = True
+        return super().values()
+
+    def items(self):
+        self.read_all = True
+        return super().items()
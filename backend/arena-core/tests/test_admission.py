@@ -0,0 +1,119 @@
+import asyncio
+import sqlite3
+
+import pytest
+from arena_core.admission import (
+    AdmissionController,
+    Rejected,
+    SQLiteRateLimitStore,
+    client_key,
+)
+
+
+def scope(api_key: bytes = b"", address: str = "10.0.0.1") -> dict:
+    headers = [(b"x-api-key", api_key)] if api_key else []
+    return {"headers": headers, "client": (address, 50000)}
+
+
+def test_clients_are_keyed_by_address_unless_the_api_key_is_known():
+    assert client_key(scope(b"anything")) == "ip:10.0.0.1"
+    assert client_key(scope(b"random"), {"team-a"}) == "ip:10.0.0.1"
+    assert client_key(scope(b"team-a"), {"team-a"}) == "key:team-a"
+    assert client_key({"headers": []}) == "ip:unknown"
+
+
+def test_an_empty_bucket_is_rate_limited():
+    controller = AdmissionController(rate=1.0, burst=1)
+
+    async def main():
+        await controller.acquire("ip:a")
+        controller.release("ip:a")
+        with pytest.raises(Rejected) as rejected:
+            await controller.acquire("ip:a")
+        # Other clients have their own bucket
+        await controller.acquire("ip:b")
+        return rejected.value
+
+    rejection = asyncio.run(main())
+
+    assert (rejection.status, rejection.reason) == (429, "rate_limited")
+    assert 0 < rejection.retry_after <= 1
+    assert controller.rejected == {"rate_limited": 1}
+
+
+def test_a_client_over_its_in_flight_cap_is_rejected():
+    controller = AdmissionController(client_max_in_flight=1)
+
+    async def main():
+        await controller.acquire("ip:a")
+        with pytest.raises(Rejected) as rejected:
+            await controller.acquire("ip:a")
+        return rejected.value
+
+    rejection = asyncio.run(main())
+
+    assert (rejection.status, rejection.reason) == (429, "client_limit")
+
+
+def test_requests_beyond_the_queue_are_shed():
+    controller = AdmissionController(max_in_flight=1, max_queue=0)
+
+    async def main():
+        await controller.acquire("ip:a")
+        with pytest.raises(Rejected) as rejected:
+            await controller.acquire("ip:b")
+        return rejected.value
+
+    rejection = asyncio.run(main())
+
+    assert (rejection.status, rejection.reason) == (503, "queue_full")
+    assert rejection.retry_after >= 1
+
+
+def test_a_queued_request_times_out():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+
+    async def main():
+        await controller.acquire("ip:a")
+        with pytest.raises(Rejected) as rejected:
+            await controller.acquire("ip:b")
+        return rejected.value
+
+    rejection = asyncio.run(main())
+
+    assert (rejection.status, rejection.reason) == (503, "queue_timeout")
+    assert controller.waiting == 0
+
+
+def test_a_queued_request_runs_once_a_slot_frees_up():
+    controller = AdmissionController(max_in_flight=1, max_queue=1)
+
+    async def main():
+        await controller.acquire("ip:a")
+        waiter = asyncio.ensure_future(controller.acquire("ip:b"))
+        await asyncio.sleep(0.01)
+        controller.release("ip:a")
+        await waiter
+
+    asyncio.run(main())
+
+    assert controller.admitted == 2 and controller.in_flight == 1
+
+
+def test_a_locked_rate_limit_file_lets_requests_through(tmp_path):
+    path = str(tmp_path / "ratelimits.sqlite3")
+    store = SQLiteRateLimitStore(path, timeout=0.01)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        wait = asyncio.run(store.take("ip:a", 1.0, 1))
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    assert wait == 0.0
+    assert store.errors == 1
+    # Once the lock is gone the bucket works again
+    assert asyncio.run(store.take("ip:a", 1.0, 1)) == 0.0
+    assert asyncio.run(store.take("ip:a", 1.0, 1)) > 0
+    store.close()
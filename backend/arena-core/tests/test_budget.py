@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from arena_core.budget import allocate_budget
+
+
+def option(total_cost: float, rating: float) -> SimpleNamespace:
+    return SimpleNamespace(total_cost=total_cost, rating=rating)
+
+
+def test_picks_the_best_rated_combination_within_budget():
+    candidates = {
+        "transportation": [option(100, 3.0), option(300, 5.0)],
+        "accommodation": [option(200, 4.0), option(500, 4.5)],
+    }
+
+    allocation = allocate_budget(candidates, budget=600)
+
+    assert allocation.choices == {"transportation": 1, "accommodation": 0}
+    assert allocation.total_cost == 500
+    assert allocation.score == 9.0
+    assert allocation.within_budget
+
+
+def test_prefers_the_cheaper_combination_on_ties():
+    candidates = {"accommodation": [option(400, 4.0), option(250, 4.0)]}
+
+    allocation = allocate_budget(candidates, budget=1000)
+
+    assert allocation.choices == {"accommodation": 1}
+    assert allocation.total_cost == 250
+
+
+def test_weights_shift_the_choice():
+    candidates = {
+        "transportation": [option(100, 3.0), option(300, 5.0)],
+        "accommodation": [option(100, 3.0), option(300, 5.0)],
+    }
+
+    allocation = allocate_budget(candidates, budget=400, weights={"accommodation": 2.0})
+
+    assert allocation.choices == {"transportation": 0, "accommodation": 1}
+
+
+def test_falls_back_to_the_cheapest_combination_when_nothing_fits():
+    candidates = {
+        "transportation": [option(300, 5.0), option(200, 3.0)],
+        "accommodation": [option(400, 4.0), option(350, 2.0)],
+    }
+
+    allocation = allocate_budget(candidates, budget=100)
+
+    assert allocation.choices == {"transportation": 1, "accommodation": 1}
+    assert allocation.total_cost == 550
+    assert not allocation.within_budget
@@ -0,0 +1,36 @@
+from arena_core.cache import cache_key
+
+
+def test_strings_are_case_folded_and_whitespace_collapsed():
+    assert cache_key("plan", destination="  New   York ") == cache_key(
+        "plan", destination="new york"
+    )
+
+
+def test_mapping_keys_are_sorted():
+    assert cache_key(
+        "plan", preferences={"origin": "Boston", "activities": ["Museums"]}
+    ) == cache_key("plan", preferences={"activities": ["museums"], "origin": "boston"})
+
+
+def test_budgets_share_a_key_within_their_bucket():
+    assert cache_key("plan", budget_bucket=25, budget=1010) == cache_key(
+        "plan", budget_bucket=25, budget=1024.99
+    )
+    assert cache_key("plan", budget_bucket=25, budget=1010) != cache_key(
+        "plan", budget_bucket=25, budget=1025
+    )
+
+
+def test_budgets_are_exact_without_a_bucket():
+    assert cache_key("plan", budget=1000) != cache_key("plan", budget=1001)
+
+
+def test_keys_differ_by_namespace_and_value():
+    assert cache_key("plan", destination="Paris") != cache_key(
+        "summary", destination="Paris"
+    )
+    assert cache_key("plan", destination="Paris") != cache_key(
+        "plan", destination="Rome"
+    )
+    assert cache_key("plan", destination="Paris").startswith("plan:")
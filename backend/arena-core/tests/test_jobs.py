@@ -0,0 +1,212 @@
+import asyncio
+import time
+
+import pytest
+from arena_core.jobs import JobQueue, JobStore, QueueFull
+from arena_core.models import PlanRequest
+
+
+def plan_request(**overrides) -> PlanRequest:
+    fields = dict(
+        destination="Lisbon",
+        start_date="2025-06-01",
+        end_date="2025-06-05",
+        budget=3000,
+        preferences={"origin": "New York"},
+    )
+    return PlanRequest(**{**fields, **overrides})
+
+
+@pytest.fixture
+def store():
+    store = JobStore(":memory:")
+    yield store
+    store.close()
+
+
+def test_identical_requests_share_a_job(store):
+    queue = JobQueue(store)
+    job_id, _ = store.submit(queue.key(plan_request()), plan_request(), 10)
+
+    same_id, reused = store.submit(
+        queue.key(plan_request(destination=" LISBON ")), plan_request(), 10
+    )
+    other_id, other_reused = store.submit(
+        queue.key(plan_request(budget=3001)), plan_request(budget=3001), 10
+    )
+
+    assert (same_id, reused) == (job_id, True)
+    assert other_id != job_id and not other_reused
+
+
+def test_a_full_queue_rejects_new_jobs(store):
+    store.submit("a", plan_request(), 1)
+
+    with pytest.raises(QueueFull):
+        store.submit("b", plan_request(), 1)
+    # A duplicate of a queued job is still accepted
+    assert store.submit("a", plan_request(), 1)[1]
+
+
+def test_an_expired_lease_is_claimed_again(store):
+    job_id, _ = store.submit("a", plan_request(), 10)
+    first = store.claim(lease=60, max_attempts=3, ttl=60)
+
+    assert first.id == job_id and first.attempts == 1
+    assert store.claim(lease=60, max_attempts=3, ttl=60) is None
+
+    # The worker running it died without renewing the lease
+    store._conn.execute("UPDATE plan_jobs SET lease_until = ?", (time.time() - 1,))
+    second = store.claim(lease=60, max_attempts=3, ttl=60)
+
+    assert second.id == job_id and second.attempts == 2
+
+
+def test_a_renewed_lease_is_not_claimed(store):
+    job_id, _ = store.submit("a", plan_request(), 10)
+    store.claim(lease=0, max_attempts=3, ttl=60)
+
+    assert store.renew(job_id, 1, lease=60)
+    assert store.claim(lease=60, max_attempts=3, ttl=60) is None
+
+
+def test_a_job_fails_after_max_attempts(store):
+    job_id, _ = store.submit("a", plan_request(), 10)
+    store.claim(lease=-1, max_attempts=1, ttl=60)
+
+    assert store.claim(lease=60, max_attempts=1, ttl=60) is None
+    job = store.get(job_id)
+    assert job.status == "failed"
+    assert "1 times" in job.error
+
+
+def test_a_worker_that_lost_its_lease_cannot_finish_the_job(store):
+    job_id, _ = store.submit("a", plan_request(), 10)
+    store.claim(lease=-1, max_attempts=3, ttl=60)
+    store.claim(lease=60, max_attempts=3, ttl=60)
+
+    # The first worker comes back after the job was claimed again
+    assert not store.renew(job_id, 1, lease=60)
+    assert not store.finish(job_id, 1, ttl=60, error="late failure")
+    store.release(job_id, 1)
+    job = store.get(job_id)
+    assert (job.status, job.attempts, job.error) == ("running", 2, None)
+
+    assert store.finish(job_id, 2, ttl=60, result=b"{}")
+    assert store.get(job_id).status == "done"
+
+
+def test_finished_jobs_expire(store):
+    job_id, _ = store.submit("a", plan_request(), 10)
+    store.claim(lease=60, max_attempts=3, ttl=60)
+    store.finish(job_id, 1, ttl=-1, result=b"{}")
+
+    assert store.get(job_id) is None
+    # An expired result is not reused either
+    assert store.submit("a", plan_request(), 10)[1] is False
+    assert store.purge() == 1
+
+
+def test_workers_run_jobs_and_renew_their_lease(store):
+    runs = []
+
+    async def run(request: PlanRequest) -> dict:
+        runs.append(request.destination)
+        # Outlasts the lease, which the worker keeps renewing
+        await asyncio.sleep(0.3)
+        return {"destination": request.destination}
+
+    async def main():
+        queue = JobQueue(store, workers=2, lease=0.1, poll_interval=0.01)
+        queue.start(run)
+        try:
+            job_id, _ = await queue.submit(plan_request())
+            return await queue.get(job_id, wait=5)
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(main())
+
+    assert job.status == "done" and job.attempts == 1
+    assert job.result == b'{"destination":"Lisbon"}'
+    assert runs == ["Lisbon"]
+
+
+def test_workers_survive_store_errors(store):
+    claim = store.claim
+    calls = []
+
+    def flaky_claim(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return claim(*args)
+
+    store.claim = flaky_claim
+
+    async def run(request: PlanRequest) -> dict:
+        return {}
+
+    async def main():
+        queue = JobQueue(store, workers=1, poll_interval=0.01)
+        queue.start(run)
+        try:
+            job_id, _ = await queue.submit(plan_request())
+            return queue, await queue.get(job_id, wait=5)
+        finally:
+            await queue.stop()
+
+    queue, job = asyncio.run(main())
+
+    assert job.status == "done"
+    assert queue.worker_errors == 1
+
+
+def test_waiting_on_jobs_leaves_no_events_behind(store):
+    async def run(request: PlanRequest) -> dict:
+        await asyncio.sleep(0.05)
+        return {}
+
+    async def main():
+        queue = JobQueue(store, workers=1, poll_interval=0.01)
+        # Queued by another process and never run here
+        elsewhere, _ = store.submit("elsewhere", plan_request(budget=1), 10)
+        store.claim(lease=60, max_attempts=3, ttl=60)
+        queue.start(run)
+        try:
+            job_id, _ = await queue.submit(plan_request())
+            waited = await asyncio.gather(
+                queue.get(elsewhere, wait=0.05), queue.get(job_id, wait=5)
+            )
+            return queue, waited
+        finally:
+            await queue.stop()
+
+    queue, (other, job) = asyncio.run(main())
+
+    assert other.status == "running"
+    assert job.status == "done"
+    assert queue._finished == {} and queue._running == set()
+
+
+def test_a_late_result_is_dropped(store):
+    async def run(request: PlanRequest) -> dict:
+        # The job is taken over while its first worker is still planning
+        store._conn.execute("UPDATE plan_jobs SET attempts = attempts + 1")
+        return {}
+
+    async def main():
+        queue = JobQueue(store, workers=1, poll_interval=0.01)
+        queue.start(run)
+        try:
+            job_id, _ = await queue.submit(plan_request())
+            while not queue.counters["lost"]:
+                await asyncio.sleep(0.01)
+            return queue, await queue.get(job_id)
+        finally:
+            await queue.stop()
+
+    queue, job = asyncio.run(main())
+
+    assert job.status == "running" and job.result is None
+    assert queue.counters["done"] == 0
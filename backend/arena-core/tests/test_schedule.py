@@ -0,0 +1,38 @@
+from arena_core.models import Activity
+from arena_core.schedule import TripCalendar, _build_days, schedule_trip
+
+
+def activity(name: str, duration: str = "2 hours") -> Activity:
+    return Activity(
+        name=name,
+        category="sightseeing",
+        description=name,
+        location="Old Town, Lisbon",
+        price=20,
+        duration=duration,
+        rating=4.5,
+        date="",
+    )
+
+
+def test_a_day_starting_after_dinner_has_no_free_stretch():
+    calendar = TripCalendar.parse("2025-06-01", "2025-06-03")
+
+    first, *rest = _build_days(calendar, "2025-06-01T18:30:00", None)
+
+    assert first.blocks[0].cursor > 19 * 60
+    assert first.longest == 0
+    assert all(day.longest > 0 for day in rest)
+
+
+def test_activities_skip_a_late_arrival_day():
+    schedule = schedule_trip(
+        "2025-06-01",
+        "2025-06-02",
+        [activity("Castle"), activity("Tram ride", "1 hour")],
+        arrival="2025-06-01T18:30:00",
+    )
+
+    assert schedule.unscheduled == []
+    assert {item.date for item in schedule.activities} == {"2025-06-02"}
+    assert schedule.days[0].items == []
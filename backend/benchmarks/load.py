@@ -0,0 +1,403 @@
+"""
+Load test for the /plan endpoints of the Python backends.
+
+Drives a backend's app.main:app either in-process through an ASGI transport or over
+HTTP against real uvicorn workers. Sub-agent searches are slowed down by a fake latency
+model (ARENA_FAKE_LATENCY), so the numbers reflect the orchestration, caching and
+serialization overhead on top of a known upstream latency. Upstream failures and stalls
+can be injected as well (ARENA_FAKE_FAULTS) to measure the retries, circuit breakers
+and hedging.
+
+Usage:
+  python load.py --backend pydantic-ai
+  python load.py --backend all --mode uvicorn --workers 2
+  python load.py --backend all --faults error=0.1,slow=0.02,slow_ms=500
+  python load.py --backend all --save-baseline
+  python load.py --backend all --compare
+  python load.py --backend all --compare --gate-timing
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+BACKENDS = ["pydantic-ai", "openai-agents-py"]
+
+
+def plan_body(index: int) -> Dict[str, Any]:
+    # A distinct destination per request keeps caches and request coalescing out of the
+    # measurement unless they are enabled on purpose
+    return {
+        "destination": f"City {index}",
+        "startDate": "2025-06-01",
+        "endDate": "2025-06-05",
+        "budget": 3000,
+        "preferences": {"origin": "New York", "activities": ["sightseeing"]},
+    }
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def drive(
+    client: httpx.AsyncClient, total: int, concurrency: int
+) -> Tuple[List[float], int, float]:
+    """
+    Closed-loop load: `concurrency` clients issue `total` requests between them
+    """
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            response = await client.post("/plan", json=plan_body(index))
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(latencies: List[float], errors: int, wall: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / wall, 1),
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "mean_ms": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+    }
+
+
+async def measure_allocations(
+    client: httpx.AsyncClient, requests: int
+) -> Dict[str, Any]:
+    """
+    Memory allocated and still held per request, plus the peak traced memory.
+
+    Measured in a separate pass because tracing skews latency.
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for index in range(requests):
+        await client.post("/plan", json=plan_body(-index - 1))
+    after = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    stats = [
+        stat for stat in after.compare_to(before, "filename") if stat.count_diff > 0
+    ]
+    return {
+        "retained_blocks_per_request": round(
+            sum(stat.count_diff for stat in stats) / requests, 1
+        ),
+        "retained_kib_per_request": round(
+            sum(stat.size_diff for stat in stats) / requests / 1024, 2
+        ),
+        "peak_traced_kib": round(peak / 1024, 1),
+    }
+
+
+async def run_asgi(args: argparse.Namespace) -> Dict[str, Any]:
+    sys.path.insert(0, str(BACKEND_ROOT / args.backend))
+    app = importlib.import_module("app.main").app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            await drive(client, args.warmup, args.concurrency)
+            latencies, errors, wall = await drive(
+                client, args.requests, args.concurrency
+            )
+            result = summarize(latencies, errors, wall)
+            result.update(await measure_allocations(client, args.alloc_requests))
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_healthy(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not become healthy in time")
+
+
+def worker_pids(pid: int) -> List[int]:
+    """
+    Worker processes spawned by the server's supervisor, read from /proc (Linux only).
+    Other children, such as multiprocessing's resource tracker, are left out
+    """
+    try:
+        children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+    except OSError:
+        return []
+    workers = []
+    for child in children:
+        try:
+            if b"spawn_main" in Path(f"/proc/{child}/cmdline").read_bytes():
+                workers.append(int(child))
+        except OSError:
+            continue
+    return workers
+
+
+def rss_mib(pid: int) -> Optional[float]:
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+def worker_memory(pid: int) -> Dict[str, Any]:
+    """
+    Resident memory of each server worker, or of the server itself when it runs without
+    a supervisor
+    """
+    workers = worker_pids(pid) or [pid]
+    sizes = [size for size in map(rss_mib, workers) if size is not None]
+    if not sizes:
+        return {}
+    return {
+        "worker_rss_mib": sizes,
+        "max_worker_rss_mib": max(sizes),
+    }
+
+
+async def run_uvicorn(args: argparse.Namespace) -> Dict[str, Any]:
+    port = free_port()
+    # Launch through the backend's production entry point, as a deployment would
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "server.py",
+            "--mode",
+            "prod",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(args.workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=BACKEND_ROOT / args.backend,
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60
+        ) as client:
+            await wait_healthy(client)
+            startup_ms = (time.perf_counter() - started) * 1000
+            idle_memory = worker_memory(server.pid)
+            await drive(client, args.warmup, args.concurrency)
+            latencies, errors, wall = await drive(
+                client, args.requests, args.concurrency
+            )
+            loaded_memory = worker_memory(server.pid)
+    finally:
+        # SIGTERM drains in-flight requests before the workers exit
+        server.terminate()
+        server.wait(timeout=60)
+
+    result = summarize(latencies, errors, wall)
+    result["workers"] = args.workers
+    result["startup_ms"] = round(startup_ms, 1)
+    if idle_memory:
+        result["idle_max_worker_rss_mib"] = idle_memory["max_worker_rss_mib"]
+    result.update(loaded_memory)
+    return result
+
+
+def baseline_path(backend: str, mode: str) -> Path:
+    return BASELINE_DIR / f"{backend}-{mode}.json"
+
+
+ALLOCATION_METRICS = (
+    "retained_blocks_per_request",
+    "retained_kib_per_request",
+    "peak_traced_kib",
+)
+TIMING_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def regressions(
+    result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Compares failed requests and allocations per request against a saved baseline.
+    Both are deterministic enough to gate on, unlike latency on shared machines
+    """
+    found = []
+    for metric in ALLOCATION_METRICS:
+        if metric in baseline and result.get(metric, 0) > baseline[metric] * (
+            1 + tolerance
+        ):
+            found.append(f"{metric} {result[metric]} > baseline {baseline[metric]}")
+    if result["errors"]:
+        found.append(f"{result['errors']} requests failed")
+    return found
+
+
+def timing_drift(
+    result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Compares latency percentiles and throughput against a saved baseline. Only
+    meaningful when both ran on the same machine
+    """
+    found = []
+    for metric in TIMING_METRICS:
+        if metric in baseline and result.get(metric, 0) > baseline[metric] * (
+            1 + tolerance
+        ):
+            found.append(f"{metric} {result[metric]} > baseline {baseline[metric]}")
+    if result["rps"] < baseline["rps"] * (1 - tolerance):
+        found.append(f"rps {result['rps']} < baseline {baseline['rps']}")
+    return found
+
+
+def run_backend(args: argparse.Namespace) -> int:
+    # The fake latency and cache settings must be in place before the app is imported
+    os.environ["ARENA_FAKE_LATENCY"] = args.latency
+    os.environ.setdefault("ARENA_FAKE_LATENCY_SEED", "7")
+    if args.faults:
+        os.environ["ARENA_FAKE_FAULTS"] = args.faults
+        os.environ.setdefault("ARENA_FAKE_FAULTS_SEED", "7")
+    os.environ["OPENAI_API_KEY"] = ""
+    if not args.cache:
+        os.environ["CACHE_MAX_ENTRIES"] = "0"
+        os.environ.pop("CACHE_PATH", None)
+
+    runner = run_asgi if args.mode == "asgi" else run_uvicorn
+    result = asyncio.run(runner(args))
+    result.update(
+        {
+            "backend": args.backend,
+            "mode": args.mode,
+            "latency": args.latency,
+            "faults": args.faults,
+            "concurrency": args.concurrency,
+        }
+    )
+    print(json.dumps(result))
+
+    path = baseline_path(args.backend, args.mode)
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path.write_text(json.dumps(result, indent=2, sort_keys=True) + "\n")
+    if args.compare:
+        if not path.exists():
+            print(f"No baseline at {path}", file=sys.stderr)
+            return 1
+        baseline = json.loads(path.read_text())
+        found = regressions(result, baseline, args.tolerance)
+        drift = timing_drift(result, baseline, args.tolerance)
+        # Timing only fails the run when asked, e.g. on the machine that saved the
+        # baseline; elsewhere it is reported
+        if args.gate_timing:
+            found += drift
+        else:
+            for change in drift:
+                print(f"TIMING {args.backend}/{args.mode}: {change}", file=sys.stderr)
+        for regression in found:
+            print(
+                f"REGRESSION {args.backend}/{args.mode}: {regression}", file=sys.stderr
+            )
+        return 1 if found else 0
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--backend", choices=BACKENDS + ["all"], default="all")
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--alloc-requests", type=int, default=50)
+    parser.add_argument(
+        "--latency",
+        default="fixed:20",
+        help="fake sub-agent latency in ms, e.g. fixed:20, uniform:10,50, lognormal:40,0.5",
+    )
+    parser.add_argument(
+        "--faults",
+        default="",
+        help="fake upstream faults, e.g. error=0.1,slow=0.02,slow_ms=500",
+    )
+    parser.add_argument("--cache", action="store_true", help="keep the result cache on")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument(
+        "--gate-timing",
+        action="store_true",
+        help="also fail on latency and RPS regressions, not just report them",
+    )
+    args, _ = parser.parse_known_args(argv)
+
+    if args.backend != "all":
+        return run_backend(args)
+
+    # Both backends ship a top-level `app` package, so each one runs in its own process
+    argv = list(sys.argv[1:] if argv is None else argv)
+    status = 0
+    for backend in BACKENDS:
+        status |= subprocess.call(
+            [sys.executable, __file__, *argv, "--backend", backend],
+            cwd=BACKEND_ROOT / backend,
+        )
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
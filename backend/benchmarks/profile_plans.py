@@ -0,0 +1,267 @@
+"""
+Profiles the planning pipeline offline by replaying recorded upstream calls.
+
+A record pass runs plans through a backend's app.main:app with ARENA_CASSETTE_MODE=record
+and saves every sub-agent search and model call, with its latency, to a cassette. With
+an OpenAI key set, the openai-agents-py backend records real model calls; otherwise the
+fake latency model (ARENA_FAKE_LATENCY) stands in for the upstreams. Replay passes then
+serve the same calls from the cassette, at the recorded speed or scaled with --speed
+(0 skips the waits, leaving only the backend's own work), so every run is deterministic
+and needs no network or API key.
+
+Each replay pass is profiled with cProfile, which writes a .prof file and a hot-path
+report of the functions with the most cumulative and own time, and with a stack
+sampler, which writes folded stacks for flame graphs. `--profiler none` runs the replay
+without either, for an external sampling profiler such as py-spy.
+
+Usage:
+  python profile_plans.py --backend all --record
+  python profile_plans.py --backend pydantic-ai --plans 500 --speed 0
+  python profile_plans.py --backend all --speed 1 --profiler sample
+  py-spy record -o flame.svg -- python profile_plans.py --backend pydantic-ai --profiler none
+"""
+
+import argparse
+import asyncio
+import cProfile
+import importlib
+import io
+import json
+import os
+import pstats
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from load import BACKEND_ROOT, BACKENDS, plan_body, summarize
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+CASSETTE_DIR = BENCHMARK_DIR / "cassettes"
+PROFILE_DIR = BENCHMARK_DIR / "profiles"
+
+
+class StackSampler:
+    """
+    Samples the Python stack of one thread at a fixed interval from a background
+    thread, and counts identical stacks in the folded format flame graph tools read
+    (flamegraph.pl, speedscope, inferno)
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "StackSampler":
+        self._thread_id = threading.get_ident()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            frames: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(
+                    f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def write(self, path: Path) -> None:
+        with path.open("w") as folded:
+            for stack, count in self.stacks.most_common():
+                folded.write(f"{stack} {count}\n")
+
+
+def hot_paths(profile: cProfile.Profile, top: int, focus: Optional[str]) -> str:
+    """
+    The `top` functions by cumulative and by own time, optionally only those whose
+    path matches `focus`
+    """
+    output = io.StringIO()
+    stats = pstats.Stats(profile, stream=output)
+    restrictions: List[Any] = [focus, top] if focus else [top]
+    for order in ("cumulative", "tottime"):
+        output.write(f"=== Top {top} functions by {order} time ===\n")
+        stats.sort_stats(order).print_stats(*restrictions)
+    return output.getvalue()
+
+
+async def run_plans(
+    client: httpx.AsyncClient, plans: int, distinct: int, concurrency: int
+) -> Dict[str, Any]:
+    """
+    Closed-loop plans cycling through `distinct` requests, so replays only ask for
+    requests the record pass made
+    """
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_index
+        while next_index < plans:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            response = await client.post("/plan", json=plan_body(index % distinct))
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_app(args: argparse.Namespace, profiler: str) -> Dict[str, Any]:
+    sys.path.insert(0, str(BACKEND_ROOT / args.backend))
+    app = importlib.import_module("app.main").app
+    plans = args.distinct if args.record else args.plans
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            if profiler == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+                result = await run_plans(client, plans, args.distinct, args.concurrency)
+                profile.disable()
+                path = PROFILE_DIR / f"{args.backend}.prof"
+                profile.dump_stats(path)
+                report = hot_paths(profile, args.top, args.focus)
+                report_path = PROFILE_DIR / f"{args.backend}-hotpaths.txt"
+                report_path.write_text(report)
+                print(report, file=sys.stderr)
+                result.update({"profile": str(path), "hot_paths": str(report_path)})
+            elif profiler == "sample":
+                with StackSampler(args.interval / 1000) as sampler:
+                    result = await run_plans(
+                        client, plans, args.distinct, args.concurrency
+                    )
+                path = PROFILE_DIR / f"{args.backend}.folded"
+                sampler.write(path)
+                result.update(
+                    {"folded": str(path), "samples": sum(sampler.stacks.values())}
+                )
+            else:
+                result = await run_plans(client, plans, args.distinct, args.concurrency)
+        result["cassette"] = app.state.registry.cassette.snapshot()
+    return result
+
+
+def run_backend(args: argparse.Namespace) -> int:
+    # The cassette and cache settings must be in place before the app is imported
+    cassette = Path(args.cassette or CASSETTE_DIR / f"{args.backend}.jsonl.gz")
+    os.environ["ARENA_CASSETTE"] = str(cassette)
+    os.environ["CACHE_MAX_ENTRIES"] = "0"
+    os.environ.pop("CACHE_PATH", None)
+    # Without prewarm, the cassette and the profiles only hold the plans driven here
+    os.environ["PREWARM"] = "off"
+    if args.record:
+        os.environ["ARENA_CASSETTE_MODE"] = "record"
+        os.environ.setdefault("ARENA_FAKE_LATENCY", args.latency)
+        os.environ.setdefault("ARENA_FAKE_LATENCY_SEED", "7")
+        cassette.parent.mkdir(parents=True, exist_ok=True)
+        profilers = ["none"]
+    else:
+        # Replayed model calls need no key, and a key would only add the SDK's imports
+        os.environ["ARENA_CASSETTE_MODE"] = "replay"
+        os.environ["ARENA_CASSETTE_SPEED"] = str(args.speed)
+        os.environ["OPENAI_API_KEY"] = ""
+        PROFILE_DIR.mkdir(exist_ok=True)
+        profilers = (
+            ["cprofile", "sample"] if args.profiler == "all" else [args.profiler]
+        )
+
+    status = 0
+    for profiler in profilers:
+        result = asyncio.run(run_app(args, profiler))
+        result.update(
+            {
+                "backend": args.backend,
+                "pass": "record" if args.record else f"replay/{profiler}",
+                "speed": None if args.record else args.speed,
+                "concurrency": args.concurrency,
+            }
+        )
+        print(json.dumps(result))
+        if result["errors"] or result["cassette"]["misses"]:
+            status = 1
+    return status
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--backend", choices=BACKENDS + ["all"], default="all")
+    parser.add_argument("--record", action="store_true", help="record the cassette")
+    parser.add_argument(
+        "--cassette", help="cassette path (default: cassettes/<backend>.jsonl.gz)"
+    )
+    parser.add_argument("--plans", type=int, default=200)
+    parser.add_argument(
+        "--distinct",
+        type=int,
+        default=20,
+        help="distinct plan requests, recorded once and cycled through on replay",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--latency",
+        default="lognormal:40,0.5",
+        help="fake upstream latency in ms while recording, unless ARENA_FAKE_LATENCY is set",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0,
+        help="replay speed relative to the recording; 0 skips the recorded waits",
+    )
+    parser.add_argument(
+        "--profiler", choices=["all", "cprofile", "sample", "none"], default="all"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=1, help="stack sampling interval in ms"
+    )
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument(
+        "--focus",
+        default=None,
+        help="only report functions whose path matches this regex, e.g. arena_core",
+    )
+    args, _ = parser.parse_known_args(argv)
+
+    if args.backend != "all":
+        return run_backend(args)
+
+    # Both backends ship a top-level `app` package, so each one runs in its own process
+    argv = list(sys.argv[1:] if argv is None else argv)
+    status = 0
+    for backend in BACKENDS:
+        status |= subprocess.call(
+            [sys.executable, __file__, *argv, "--backend", backend],
+            cwd=BACKEND_ROOT / backend,
+        )
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
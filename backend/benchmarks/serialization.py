@@ -0,0 +1,134 @@
+"""
+Compares the dict + jsonable_encoder response path with the typed Itinerary path.
+
+Usage: python serialization.py [--activities N] [--repeat R] [--number K]
+"""
+
+import argparse
+import json
+import timeit
+
+from arena_core.models import Itinerary
+from arena_core.serialization import ModelResponse, orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def build_itinerary(activities: int) -> dict:
+    """
+    Builds an itinerary dict shaped like the pydantic-ai /plan response
+    """
+    leg = {
+        "airline": "Demo Airlines",
+        "flight_number": "DA101",
+        "departure": {
+            "airport": "New York International Airport",
+            "time": "2025-06-01T08:00:00",
+        },
+        "arrival": {
+            "airport": "Paris International Airport",
+            "time": "2025-06-01T12:00:00",
+        },
+        "duration": "4h 00m",
+        "price": 450.0,
+    }
+    return {
+        "destination": "Paris",
+        "dates": {"start": "2025-06-01", "end": "2025-06-04"},
+        "budget": {"total": 3000.0, "spent": 2190.0, "remaining": 810.0},
+        "transportation": {
+            "outbound": leg,
+            "return": {**leg, "flight_number": "DA102"},
+            "total_cost": 900.0,
+            "notes": ["Direct flights selected based on preference"],
+        },
+        "accommodation": {
+            "type": "Hotel",
+            "name": "Grand Paris Hotel",
+            "address": "123 Main St, Paris",
+            "check_in": "2025-06-01",
+            "check_out": "2025-06-04",
+            "nights": 3,
+            "room_type": "Deluxe King",
+            "amenities": ["Free WiFi", "Pool", "Fitness Center", "Restaurant"],
+            "total_cost": 810.0,
+            "nightly_rate": 270.0,
+            "rating": 4.5,
+            "images": ["hotel_image_1.jpg", "hotel_image_2.jpg"],
+            "notes": ["Includes breakfast"],
+        },
+        "activities": {
+            "activities": [
+                {
+                    "name": f"Paris Activity {i}",
+                    "category": "Attraction",
+                    "description": "World-renowned art museum featuring local exhibits",
+                    "location": "Art District, Paris",
+                    "price": 45.0,
+                    "duration": "3 hours",
+                    "rating": 4.8,
+                    "images": ["museum_1.jpg", "museum_2.jpg"],
+                    "date": "2025-06-01",
+                }
+                for i in range(activities)
+            ],
+            "dining": [
+                {
+                    "name": "The Paris Grill",
+                    "category": "Restaurant",
+                    "cuisine": "Local",
+                    "description": "Upscale dining featuring local specialties",
+                    "location": "Downtown, Paris",
+                    "price_range": "$$",
+                    "rating": 4.6,
+                    "images": ["restaurant_1.jpg"],
+                    "recommended_dishes": ["Local fish", "Regional stew"],
+                }
+            ],
+            "total_cost": 45.0 * activities,
+            "notes": ["Activities selected based on preferences"],
+        },
+        "summary": "A 3-day trip to Paris",
+        "metadata": {"degraded": False, "failures": {}, "cache": "miss"},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--activities", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    data = build_itinerary(args.activities)
+    itinerary = Itinerary.model_validate(data)
+
+    # Both paths must produce the same document
+    assert json.loads(ModelResponse(itinerary).body) == json.loads(
+        JSONResponse(jsonable_encoder(data)).body
+    )
+
+    cases = {
+        "dict + jsonable_encoder (previous /plan)": lambda: JSONResponse(
+            jsonable_encoder(data)
+        ).body,
+        "Itinerary + ModelResponse": lambda: ModelResponse(itinerary).body,
+        "validate dict + ModelResponse": lambda: ModelResponse(
+            Itinerary.model_validate(data)
+        ).body,
+    }
+    if orjson is not None:
+        cases["dict + orjson"] = lambda: orjson.dumps(data)
+
+    size = len(ModelResponse(itinerary).body)
+    print(f"payload: {args.activities} activities, {size / 1024:.1f} KiB")
+    baseline = None
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, repeat=args.repeat, number=args.number))
+        per_call_us = best / args.number * 1e6
+        baseline = baseline or per_call_us
+        print(f"{name:<42} {per_call_us:10.1f} us/op {baseline / per_call_us:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Cold start benchmark for the Python backends.
+
+Starts a backend's production entry point (server.py) with a single worker, as a
+scale-from-zero instance would, and measures the time from launching the process to the
+first healthy response (GET /) and to the first completed plan (POST /plan). The plan
+after it shows what a warm worker costs. Each PREWARM mode is measured separately.
+
+It also profiles the import of app.main with `python -X importtime` and reports the
+import time attributed to each top-level package.
+
+Usage:
+  python startup.py --backend pydantic-ai
+  python startup.py --backend all --runs 10 --prewarm off,blocking,background
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from load import BACKEND_ROOT, BACKENDS, free_port, plan_body
+
+
+def import_profile(backend: str, top: int) -> Dict[str, Any]:
+    """
+    Milliseconds spent importing app.main, in total and per top-level package
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_ROOT / backend,
+        env={**os.environ, "PYTHONPATH": "."},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    packages: Dict[str, int] = {}
+    total = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+        if name.strip() == "app.main":
+            total = int(cumulative_us)
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "import_ms": round(total / 1000, 1),
+        "import_packages_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+    }
+
+
+async def cold_start(backend: str, prewarm: str) -> Dict[str, float]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "PREWARM": prewarm,
+        "OPENAI_API_KEY": "",
+        "CACHE_MAX_ENTRIES": "0",
+    }
+    env.pop("CACHE_PATH", None)
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "server.py",
+            "--mode",
+            "prod",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            "1",
+            "--log-level",
+            "warning",
+        ],
+        cwd=BACKEND_ROOT / backend,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=60
+        ) as client:
+            while True:
+                try:
+                    if (await client.get("/")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - started > 60:
+                    raise RuntimeError(f"{backend} did not become healthy in time")
+                await asyncio.sleep(0.005)
+            healthy = time.perf_counter()
+
+            (await client.post("/plan", json=plan_body(0))).raise_for_status()
+            first_plan = time.perf_counter()
+
+            (await client.post("/plan", json=plan_body(1))).raise_for_status()
+            warm_plan_ms = (time.perf_counter() - first_plan) * 1000
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    return {
+        "healthy_ms": (healthy - started) * 1000,
+        "first_plan_ms": (first_plan - started) * 1000,
+        "first_plan_latency_ms": (first_plan - healthy) * 1000,
+        "warm_plan_latency_ms": warm_plan_ms,
+    }
+
+
+def run_backend(backend: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    profile = import_profile(backend, args.top)
+    results = []
+    for prewarm in args.prewarm.split(","):
+        runs = [asyncio.run(cold_start(backend, prewarm)) for _ in range(args.runs)]
+        result: Dict[str, Any] = {"backend": backend, "prewarm": prewarm}
+        for metric in runs[0]:
+            result[metric] = round(statistics.median(run[metric] for run in runs), 1)
+        result["runs"] = args.runs
+        result.update(profile)
+        results.append(result)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--backend", choices=BACKENDS + ["all"], default="all")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per mode")
+    parser.add_argument(
+        "--prewarm",
+        default="off,blocking",
+        help="comma-separated PREWARM modes: off, blocking, background",
+    )
+    parser.add_argument("--top", type=int, default=8, help="packages to list")
+    args = parser.parse_args(argv)
+
+    backends = BACKENDS if args.backend == "all" else [args.backend]
+    for backend in backends:
+        for result in run_backend(backend, args):
+            print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
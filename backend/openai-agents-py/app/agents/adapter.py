@@ -0,0 +1,278 @@
+from typing import Any, Dict, Optional
+
+from app.metering import (
+    MeteredProvider,
+    TokenBudgetExceeded,
+    UsageMeter,
+    agent_scope,
+    build_messages,
+    metered,
+    plan_context,
+)
+from app.providers import FakeProvider, ModelProvider, ProviderBusyError
+from arena_core.cache import ResultCache
+from arena_core.engine import AgentAdapter
+from arena_core.models import (
+    AccommodationResult,
+    ActivitiesResult,
+    Activity,
+    FlightEndpoint,
+    FlightLeg,
+    FlightResult,
+    Itinerary,
+)
+from arena_core.resilience import UpstreamUnavailable
+from arena_core.schedule import trip_nights
+
+SUMMARY_INSTRUCTIONS = (
+    "You are the travel planning coordinator. Rewrite the user's draft itinerary "
+    "summary as one friendly sentence. Keep every fact and do not add new ones, and "
+    "use only the facts in the trip context and the draft."
+)
+
+
+class OpenAIAgentsAdapter(AgentAdapter):
+    """
+    OpenAI Agents Adapter - Runs the section searches as tools and asks the model provider
+    to write the itinerary summary, metering the tokens of every plan. The plan engine
+    from arena-core runs the searches and synthesizes the itinerary
+    """
+
+    def __init__(
+        self,
+        provider: Optional[ModelProvider] = None,
+        cache: Optional[ResultCache] = None,
+        token_budget: Optional[int] = None,
+    ):
+        # The provider is owned by the agent registry and shared across requests
+        self.provider = provider or MeteredProvider(FakeProvider())
+        # Most model tokens a single plan may use; None means unlimited
+        self.token_budget = token_budget
+
+        # Caches polished summaries; optional
+        self.cache = cache
+
+        self._searches = {
+            "transportation": self._search_flights,
+            "accommodation": self._search_accommodations,
+            "activities": self._search_activities,
+        }
+
+    async def search(
+        self,
+        section: str,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> Any:
+        # This would be implemented using OpenAI's Assistant API
+        # For now, the searches return mock data
+        with agent_scope(section):
+            return await self._searches[section](
+                destination=destination,
+                start_date=start_date,
+                end_date=end_date,
+                budget=budget,
+                preferences=preferences,
+            )
+
+    async def summarize(
+        self,
+        draft: str,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> str:
+        """
+        Asks the model provider to polish the draft summary, keeping the draft when
+        the worker is saturated, the model is unavailable or the plan's token budget is
+        spent rather than failing the whole plan
+        """
+        trip = dict(
+            destination=destination,
+            start_date=start_date,
+            end_date=end_date,
+            budget=budget,
+            preferences=preferences,
+        )
+        context = plan_context(**trip)
+        draft = f"{draft} generated by OpenAI Agents SDK"
+        if self.cache is not None:
+            # The prompt carries the trip context, so two trips with the same draft
+            # can still get different summaries
+            key = self.cache.key("summary", draft=draft, **trip)
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        try:
+            completion = await self.provider.complete(
+                build_messages(SUMMARY_INSTRUCTIONS, context, draft)
+            )
+        except (ProviderBusyError, TokenBudgetExceeded, UpstreamUnavailable):
+            return draft
+
+        summary = completion.text.strip() or draft
+        if self.cache is not None:
+            await self.cache.set(key, summary)
+        return summary
+
+    def begin_plan(self) -> UsageMeter:
+        return UsageMeter(budget=self.token_budget)
+
+    def plan_scope(self, state: UsageMeter):
+        # Charges the plan's model calls, including those made by its tasks, to its meter
+        return metered(state)
+
+    def finish_plan(self, itinerary: Itinerary, state: UsageMeter) -> Itinerary:
+        """
+        Reports the plan's model usage in its metadata and metrics
+        """
+        # Assigned rather than updated in place so the field counts as set when dumped
+        itinerary.metadata = {**itinerary.metadata, "usage": state.snapshot()}
+        if isinstance(self.provider, MeteredProvider):
+            self.provider.metrics.observe_plan(state)
+        return itinerary
+
+    async def _search_flights(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> FlightResult:
+        # Mock flight details
+        origin = preferences.get("origin", "New York")
+        return FlightResult(
+            outbound=FlightLeg(
+                airline="Demo Airlines",
+                flight_number="DA101",
+                departure=FlightEndpoint(
+                    airport=f"{origin} International Airport",
+                    time=f"{start_date}T08:00:00",
+                ),
+                arrival=FlightEndpoint(
+                    airport=f"{destination} International Airport",
+                    time=f"{start_date}T12:00:00",
+                ),
+                duration="4h 00m",
+                price=budget * 0.45,
+            ),
+            return_flight=FlightLeg(
+                airline="Demo Airlines",
+                flight_number="DA102",
+                departure=FlightEndpoint(
+                    airport=f"{destination} International Airport",
+                    time=f"{end_date}T14:00:00",
+                ),
+                arrival=FlightEndpoint(
+                    airport=f"{origin} International Airport",
+                    time=f"{end_date}T18:00:00",
+                ),
+                duration="4h 00m",
+                price=budget * 0.45,
+            ),
+            total_cost=budget * 0.9,
+            notes=[
+                "Direct flights selected based on preference",
+                "Economy class tickets",
+            ],
+        )
+
+    async def _search_accommodations(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> AccommodationResult:
+        # Mock accommodation details
+        nights = trip_nights(start_date, end_date)
+        accommodation_type = preferences.get("accommodation_type", "hotel")
+        if accommodation_type.lower() == "hotel":
+            return AccommodationResult(
+                type="Hotel",
+                name=f"Grand {destination} Hotel",
+                address=f"123 Main St, {destination}",
+                check_in=start_date,
+                check_out=end_date,
+                nights=nights,
+                room_type="Deluxe King",
+                amenities=["Free WiFi", "Pool", "Fitness Center", "Restaurant"],
+                total_cost=budget * 0.9,
+                nightly_rate=budget * 0.9 / max(nights, 1),
+                rating=4.5,
+                notes=[
+                    "Selected based on location preference",
+                    "Includes breakfast",
+                ],
+            )
+        else:
+            return AccommodationResult(
+                type="Vacation Rental",
+                name=f"Charming {destination} Apartment",
+                address=f"456 Oak St, {destination}",
+                check_in=start_date,
+                check_out=end_date,
+                nights=nights,
+                property_type="Entire apartment",
+                amenities=[
+                    "Free WiFi",
+                    "Kitchen",
+                    "Washer/Dryer",
+                    "Air Conditioning",
+                ],
+                total_cost=budget * 0.85,
+                nightly_rate=budget * 0.85 / max(nights, 1),
+                rating=4.7,
+                notes=[
+                    "Self check-in with keypad",
+                    "Close to downtown",
+                    "Superhost",
+                ],
+            )
+
+    async def _search_activities(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> ActivitiesResult:
+        # Mock activities details
+        activities = [
+            Activity(
+                name=f"{destination} Museum of Art",
+                category="Attraction",
+                description="World-renowned art museum featuring local and international exhibits",
+                location=f"Art District, {destination}",
+                price=budget * 0.05,
+                duration="3 hours",
+                rating=4.8,
+                date=start_date,
+            ),
+            Activity(
+                name=f"{destination} Culinary Tour",
+                category="Food & Drink",
+                description="Guided tour of local cuisine and food markets",
+                location=f"Downtown, {destination}",
+                price=budget * 0.1,
+                duration="4 hours",
+                rating=4.9,
+                date=start_date,
+            ),
+        ]
+
+        activities_total_cost = sum([activity.price for activity in activities])
+        return ActivitiesResult(
+            activities=activities,
+            total_cost=activities_total_cost,
+            notes=["Activities selected based on preferences"],
+        )
@@ -1,172 +0,0 @@
-import os
-from typing import Any, Dict, List
-
-import openai
-
-
-class CoordinatorAgent:
-    """
-    Coordinator Agent - Analyzes user requirements, delegates tasks, and synthesizes final itinerary
-    using OpenAI's Agent framework
-    """
-
-    def __init__(self):
-        # Initialize OpenAI client
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-    async def plan_trip(
-        self,
-        destination: str,
-        start_date: str,
-        end_date: str,
-        budget: float,
-        preferences: Dict[str, Any],
-    ) -> Dict[str, Any]:
-        """
-        Orchestrates the travel planning process using OpenAI's Agent framework
-        """
-        # This would be implemented using OpenAI's Assistant API
-        # For now, return mock data
-
-        # Mock flight details
-        flight_results = {
-            "outbound": {
-                "airline": "Demo Airlines",
-                "flight_number": "DA101",
-                "departure": {
-                    "airport": f"{preferences.get('origin', 'New York')} International Airport",
-                    "time": f"{start_date}T08:00:00",
-                },
-                "arrival": {
-                    "airport": f"{destination} International Airport",
-                    "time": f"{start_date}T12:00:00",
-                },
-                "duration": "4h 00m",
-                "price": budget * 0.45,
-            },
-            "return": {
-                "airline": "Demo Airlines",
-                "flight_number": "DA102",
-                "departure": {
-                    "airport": f"{destination} International Airport",
-                    "time": f"{end_date}T14:00:00",
-                },
-                "arrival": {
-                    "airport": f"{preferences.get('origin', 'New York')} International Airport",
-                    "time": f"{end_date}T18:00:00",
-                },
-                "duration": "4h 00m",
-                "price": budget * 0.45,
-            },
-            "total_cost": budget * 0.9,
-            "notes": [
-                "Direct flights selected based on preference",
-                "Economy class tickets",
-            ],
-        }
-
-        # Mock accommodation details
-        accommodation_type = preferences.get("accommodation_type", "hotel")
-        if accommodation_type.lower() == "hotel":
-            accommodation_results = {
-                "type": "Hotel",
-                "name": f"Grand {destination} Hotel",
-                "address": f"123 Main St, {destination}",
-                "check_in": start_date,
-                "check_out": end_date,
-                "nights": 3,  # Would calculate this from dates in real implementation
-                "room_type": "Deluxe King",
-                "amenities": ["Free WiFi", "Pool", "Fitness Center", "Restaurant"],
-                "total_cost": budget * 0.9,
-                "nightly_rate": budget * 0.3,
-                "rating": 4.5,
-                "notes": [
-                    "Selected based on location preference",
-                    "Includes breakfast",
-                ],
-            }
-        else:
-            accommodation_results = {
-                "type": "Vacation Rental",
-                "name": f"Charming {destination} Apartment",
-                "address": f"456 Oak St, {destination}",
-                "check_in": start_date,
-                "check_out": end_date,
-                "nights": 3,  # Would calculate this from dates in real implementation
-                "property_type": "Entire apartment",
-                "amenities": [
-                    "Free WiFi",
-                    "Kitchen",
-                    "Washer/Dryer",
-                    "Air Conditioning",
-                ],
-                "total_cost": budget * 0.85,
-                "nightly_rate": budget * 0.28,
-                "rating": 4.7,
-                "notes": [
-                    "Self check-in with keypad",
-                    "Close to downtown",
-                    "Superhost",
-                ],
-            }
-
-        # Mock activities details
-        activities = [
-            {
-                "name": f"{destination} Museum of Art",
-                "category": "Attraction",
-                "description": "World-renowned art museum featuring local and international exhibits",
-                "location": f"Art District, {destination}",
-                "price": budget * 0.05,
-                "duration": "3 hours",
-                "rating": 4.8,
-                "date": start_date,
-            },
-            {
-                "name": f"{destination} Culinary Tour",
-                "category": "Food & Drink",
-                "description": "Guided tour of local cuisine and food markets",
-                "location": f"Downtown, {destination}",
-                "price": budget * 0.1,
-                "duration": "4 hours",
-                "rating": 4.9,
-                "date": start_date,
-            },
-        ]
-
-        activities_total_cost = sum([activity["price"] for activity in activities])
-        activities_results = {
-            "activities": activities,
-            "total_cost": activities_total_cost,
-            "notes": ["Activities selected based on preferences"],
-        }
-
-        # Synthesize results into a comprehensive itinerary
-        itinerary = {
-            "destination": destination,
-            "dates": {"start": start_date, "end": end_date},
-            "budget": {
-                "total": budget,
-                "spent": sum(
-                    [
-                        flight_results.get("total_cost", 0),
-                        accommodation_results.get("total_cost", 0),
-                        activities_results.get("total_cost", 0),
-                    ]
-                ),
-                "remaining": budget
-                - sum(
-                    [
-                        flight_results.get("total_cost", 0),
-                        accommodation_results.get("total_cost", 0),
-                        activities_results.get("total_cost", 0),
-                    ]
-                ),
-            },
-            "transportation": flight_results,
-            "accommodation": accommodation_results,
-            "activities": activities_results,
-            "summary": f"A 3-day trip to {destination} generated by OpenAI Agents SDK",
-        }
-
-        return itinerary
@@ -0,0 +1,285 @@
+"""
+Token and cost metering for model calls.
+
+`MeteredProvider` wraps a ModelProvider and charges every completion to the plan's
+`UsageMeter`, which the agent adapter installs in a context variable for the duration of a
+plan. Usage is split per agent, and a plan stops calling the model once its token budget
+is spent.
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.providers import Completion, Messages, ModelProvider
+
+# USD per million (prompt, cached prompt, completion) tokens. Models are matched by
+# prefix, so dated snapshots such as "gpt-4o-mini-2024-07-18" use their family's price
+PRICES_PER_MILLION: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+}
+
+
+def price_of(model: str) -> Tuple[float, float, float]:
+    """
+    Per-million token prices of a model, or zero for unknown and fake models
+    """
+    matches = [prefix for prefix in PRICES_PER_MILLION if model.startswith(prefix)]
+    if not matches:
+        return (0.0, 0.0, 0.0)
+    return PRICES_PER_MILLION[max(matches, key=len)]
+
+
+def cost_of(completion: Completion) -> float:
+    prompt, cached, output = price_of(completion.model)
+    uncached = completion.prompt_tokens - completion.cached_tokens
+    return (
+        uncached * prompt
+        + completion.cached_tokens * cached
+        + completion.completion_tokens * output
+    ) / 1_000_000
+
+
+def estimate_tokens(messages: Messages) -> int:
+    """
+    Rough prompt size used to check the budget before a call, at ~4 characters a token
+    """
+    return sum(len(message.get("content", "")) for message in messages) // 4 + 1
+
+
+class TokenBudgetExceeded(Exception):
+    """
+    Raised instead of calling the model when a plan has spent its token budget
+    """
+
+
+@dataclass
+class Usage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, completion: Completion, cost: float) -> None:
+        self.calls += 1
+        self.prompt_tokens += completion.prompt_tokens
+        self.completion_tokens += completion.completion_tokens
+        self.cost_usd += cost
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+@dataclass
+class UsageMeter:
+    """
+    Token usage and cost of one plan, per agent, with an optional token budget
+    """
+
+    budget: Optional[int] = None
+    total: Usage = field(default_factory=Usage)
+    agents: Dict[str, Usage] = field(default_factory=dict)
+    exhausted: bool = False
+
+    def check(self, estimate: int) -> None:
+        """
+        Raises TokenBudgetExceeded when a call of about `estimate` tokens would go over
+        the budget
+        """
+        if self.budget is not None and self.total.total_tokens + estimate > self.budget:
+            self.exhausted = True
+            raise TokenBudgetExceeded(
+                f"Plan used {self.total.total_tokens} of {self.budget} tokens; "
+                f"a call needing ~{estimate} more was skipped"
+            )
+
+    def charge(self, agent: str, completion: Completion, cost: float) -> None:
+        self.total.add(completion, cost)
+        self.agents.setdefault(agent, Usage()).add(completion, cost)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.total.to_dict(),
+            "budget": self.budget,
+            "exhausted": self.exhausted,
+            "agents": {name: usage.to_dict() for name, usage in self.agents.items()},
+        }
+
+
+_meter: ContextVar[Optional[UsageMeter]] = ContextVar("arena_meter", default=None)
+_agent: ContextVar[str] = ContextVar("arena_agent", default="coordinator")
+
+
+def current_meter() -> Optional[UsageMeter]:
+    return _meter.get()
+
+
+@contextmanager
+def metered(meter: UsageMeter) -> Iterator[UsageMeter]:
+    """
+    Charges model calls made in this context, and in tasks started from it, to `meter`
+    """
+    token = _meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _meter.reset(token)
+
+
+@contextmanager
+def agent_scope(name: str) -> Iterator[None]:
+    """
+    Attributes model calls made in this context to the agent `name`
+    """
+    token = _agent.set(name)
+    try:
+        yield
+    finally:
+        _agent.reset(token)
+
+
+class UsageMetrics:
+    """
+    Process-wide token and cost counters per agent and model, in the Prometheus text
+    format
+    """
+
+    def __init__(self, namespace: str = "arena"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._tokens: Dict[Tuple[str, str, str], int] = {}
+        self._calls: Dict[Tuple[str, str], int] = {}
+        self._cost: Dict[Tuple[str, str], float] = {}
+        self._plans = 0
+        self._plan_tokens = 0
+        self._plan_cost = 0.0
+        self._budget_exceeded = 0
+
+    def record(self, agent: str, completion: Completion, cost: float) -> None:
+        labels = (agent, completion.model)
+        kinds = {
+            "prompt": completion.prompt_tokens,
+            "completion": completion.completion_tokens,
+        }
+        with self._lock:
+            for kind, tokens in kinds.items():
+                key = (*labels, kind)
+                self._tokens[key] = self._tokens.get(key, 0) + tokens
+            self._calls[labels] = self._calls.get(labels, 0) + 1
+            self._cost[labels] = self._cost.get(labels, 0.0) + cost
+
+    def observe_plan(self, meter: UsageMeter) -> None:
+        with self._lock:
+            self._plans += 1
+            self._plan_tokens += meter.total.total_tokens
+            self._plan_cost += meter.total.cost_usd
+            self._budget_exceeded += int(meter.exhausted)
+
+    def render(self) -> str:
+        ns = self.namespace
+        lines: List[str] = [
+            f"# HELP {ns}_llm_tokens_total Model tokens by agent, model and kind.",
+            f"# TYPE {ns}_llm_tokens_total counter",
+        ]
+        with self._lock:
+            for (agent, model, kind), tokens in sorted(self._tokens.items()):
+                lines.append(
+                    f'{ns}_llm_tokens_total{{agent="{agent}",model="{model}",'
+                    f'kind="{kind}"}} {tokens}'
+                )
+            lines += [
+                f"# HELP {ns}_llm_calls_total Model calls by agent and model.",
+                f"# TYPE {ns}_llm_calls_total counter",
+            ]
+            for (agent, model), calls in sorted(self._calls.items()):
+                lines.append(
+                    f'{ns}_llm_calls_total{{agent="{agent}",model="{model}"}} {calls}'
+                )
+            lines += [
+                f"# HELP {ns}_llm_cost_usd_total Estimated model cost in USD.",
+                f"# TYPE {ns}_llm_cost_usd_total counter",
+            ]
+            for (agent, model), cost in sorted(self._cost.items()):
+                lines.append(
+                    f'{ns}_llm_cost_usd_total{{agent="{agent}",model="{model}"}} '
+                    f"{cost:.6f}"
+                )
+            lines += [
+                f"# HELP {ns}_plan_tokens Model tokens used per plan.",
+                f"# TYPE {ns}_plan_tokens summary",
+                f"{ns}_plan_tokens_sum {self._plan_tokens}",
+                f"{ns}_plan_tokens_count {self._plans}",
+                f"# HELP {ns}_plan_cost_usd Estimated model cost per plan in USD.",
+                f"# TYPE {ns}_plan_cost_usd summary",
+                f"{ns}_plan_cost_usd_sum {self._plan_cost:.6f}",
+                f"{ns}_plan_cost_usd_count {self._plans}",
+                f"# HELP {ns}_plan_token_budget_exceeded_total Plans that ran out "
+                "of token budget.",
+                f"# TYPE {ns}_plan_token_budget_exceeded_total counter",
+                f"{ns}_plan_token_budget_exceeded_total {self._budget_exceeded}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class MeteredProvider(ModelProvider):
+    """
+    Provider middleware that checks the plan's token budget before each call and
+    charges the call's usage to the plan, the calling agent and the metrics
+    """
+
+    def __init__(self, inner: ModelProvider, metrics: Optional[UsageMetrics] = None):
+        super().__init__(inner.limiter)
+        self.inner = inner
+        self.metrics = metrics or UsageMetrics()
+
+    async def complete(self, messages: Messages, **options: Any) -> Completion:
+        meter = current_meter()
+        if meter is not None:
+            meter.check(estimate_tokens(messages) + options.get("max_tokens", 0))
+
+        completion = await self.inner.complete(messages, **options)
+        cost = cost_of(completion)
+        agent = _agent.get()
+        if meter is not None:
+            meter.charge(agent, completion, cost)
+        self.metrics.record(agent, completion, cost)
+        return completion
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+
+def plan_context(**context: Any) -> str:
+    """
+    Serializes the trip context a prompt is grounded in, with sorted keys and fixed
+    separators so the same trip always renders to the same text
+    """
+    return json.dumps(context, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def build_messages(instructions: str, context: str, content: str) -> Messages:
+    """
+    Builds a prompt from the agent's instructions, the trip context and its input
+    """
+    return [
+        {"role": "system", "content": instructions},
+        {"role": "user", "content": f"Trip context: {context}"},
+        {"role": "user", "content": content},
+    ]
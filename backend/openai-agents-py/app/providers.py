@@ -0,0 +1,227 @@
+import asyncio
+import sys
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Union,
+)
+
+from arena_core.resilience import Resilience
+from arena_core.tracing import get_tracer
+
+if TYPE_CHECKING:
+    # The SDK takes about half a second to import, so it is only loaded when a key is set
+    import openai
+
+Messages = List[Dict[str, str]]
+
+
+@dataclass
+class Completion:
+    """
+    Text returned by a model provider along with its token usage
+    """
+
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Prompt tokens served from the provider's prompt cache
+    cached_tokens: int = 0
+
+
+class ProviderBusyError(Exception):
+    """
+    Raised when a worker already has the maximum number of model calls queued
+    """
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds the number of outstanding model calls in a worker.
+
+    Up to `max_concurrency` calls run at once and up to `max_waiting` more are queued.
+    Anything beyond that, or a queued call that waits longer than `wait_timeout`
+    seconds, is rejected with ProviderBusyError instead of piling up on the event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        max_waiting: int = 64,
+        wait_timeout: Optional[float] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            raise ProviderBusyError(
+                f"{self.in_flight} model calls in flight and {self.waiting} queued"
+            )
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+        except asyncio.TimeoutError:
+            raise ProviderBusyError(
+                f"Timed out after {self.wait_timeout:g}s waiting for a model call slot"
+            )
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Whether a failed call is worth retrying. Connection errors, timeouts, rate limits
+    and server errors are; a rejected request or a saturated worker is not
+    """
+    if isinstance(error, ProviderBusyError):
+        return False
+    # Only an error raised by the SDK can be an SDK error, so never import it here
+    sdk = sys.modules.get("openai")
+    if sdk is not None and isinstance(error, sdk.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return True
+
+
+class ModelProvider:
+    """
+    Base class for async chat-completion providers.
+
+    Every call goes through the provider's ConcurrencyLimiter, so subclasses only
+    implement `_complete`.
+    """
+
+    def __init__(self, limiter: Optional[ConcurrencyLimiter] = None):
+        self.limiter = limiter or ConcurrencyLimiter()
+
+    async def complete(self, messages: Messages, **options: Any) -> Completion:
+        with get_tracer().span("model.complete", provider=type(self).__name__):
+            async with self.limiter:
+                return await self._complete(messages, **options)
+
+    async def _complete(self, messages: Messages, **options: Any) -> Completion:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class OpenAIProvider(ModelProvider):
+    """
+    Provider backed by the shared AsyncOpenAI client
+    """
+
+    def __init__(
+        self,
+        client: "openai.AsyncOpenAI",
+        model: str = "gpt-4o-mini",
+        limiter: Optional[ConcurrencyLimiter] = None,
+    ):
+        super().__init__(limiter)
+        self.client = client
+        self.model = model
+
+    async def _complete(self, messages: Messages, **options: Any) -> Completion:
+        response = await self.client.chat.completions.create(
+            model=options.pop("model", self.model), messages=messages, **options
+        )
+        usage = response.usage
+        details = getattr(usage, "prompt_tokens_details", None)
+        return Completion(
+            text=response.choices[0].message.content or "",
+            model=response.model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            cached_tokens=(getattr(details, "cached_tokens", None) or 0),
+        )
+
+
+class ResilientProvider(ModelProvider):
+    """
+    Provider middleware that retries transient failures with backoff and fails fast
+    while the model's circuit is open. Model calls are never hedged, since both
+    attempts would be billed
+    """
+
+    def __init__(self, inner: ModelProvider, resilience: Resilience):
+        super().__init__(inner.limiter)
+        self.inner = inner
+        self.resilience = resilience
+
+    async def complete(self, messages: Messages, **options: Any) -> Completion:
+        return await self.resilience.call(
+            "model", lambda: self.inner.complete(messages, **options), hedge=False
+        )
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+
+def echo_reply(messages: Messages) -> str:
+    """
+    Default FakeProvider reply: the content of the last user message
+    """
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content", "")
+    return ""
+
+
+class FakeProvider(ModelProvider):
+    """
+    Deterministic local provider for tests and keyless development.
+
+    Replies are produced by `reply` (a fixed string or a function of the messages)
+    after an optional simulated `latency` in seconds. Tokens are counted as words. The
+    messages of the last `max_calls` calls are kept in `calls`, so a long-running
+    keyless worker does not grow with every plan.
+    """
+
+    max_calls = 64
+
+    def __init__(
+        self,
+        reply: Union[str, Callable[[Messages], str]] = echo_reply,
+        latency: float = 0.0,
+        model: str = "fake",
+        limiter: Optional[ConcurrencyLimiter] = None,
+    ):
+        super().__init__(limiter)
+        self.reply = reply
+        self.latency = latency
+        self.model = model
+        self.calls: Deque[Messages] = deque(maxlen=self.max_calls)
+
+    async def _complete(self, messages: Messages, **options: Any) -> Completion:
+        self.calls.append(messages)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        text = self.reply(messages) if callable(self.reply) else self.reply
+        sizes = [len(message.get("content", "").split()) for message in messages]
+        return Completion(
+            text=text,
+            model=self.model,
+            prompt_tokens=sum(sizes),
+            completion_tokens=len(text.split()),
+        )
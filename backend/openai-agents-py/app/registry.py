@@ -0,0 +1,135 @@
+import dataclasses
+import os
+from typing import TYPE_CHECKING, Optional
+
+from app.agents.adapter import OpenAIAgentsAdapter
+from app.metering import MeteredProvider, UsageMetrics
+from app.providers import (
+    Completion,
+    ConcurrencyLimiter,
+    FakeProvider,
+    ModelProvider,
+    OpenAIProvider,
+    ResilientProvider,
+    is_transient,
+)
+from arena_core.api import AgentRuntime
+from arena_core.cassette import use_cassette
+from arena_core.engine import AgentAdapter
+from arena_core.fakes import FaultModel, inject_faults
+from arena_core.resilience import Resilience
+
+if TYPE_CHECKING:
+    import httpx
+    import openai
+
+
+def build_http_client() -> "httpx.AsyncClient":
+    """
+    Builds the pooled HTTP transport shared by every OpenAI call in this worker.
+
+    Pool sizes and timeouts can be tuned with environment variables.
+    """
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv("OPENAI_TIMEOUT", "60")),
+        connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5")),
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def build_limiter() -> ConcurrencyLimiter:
+    """
+    Builds the per-worker cap on outstanding model calls from environment variables
+    """
+    wait_timeout = os.getenv("MODEL_QUEUE_TIMEOUT", "10")
+    return ConcurrencyLimiter(
+        max_concurrency=int(os.getenv("MODEL_MAX_CONCURRENCY", "16")),
+        max_waiting=int(os.getenv("MODEL_MAX_WAITING", "64")),
+        wait_timeout=float(wait_timeout) if wait_timeout else None,
+    )
+
+
+class AgentRegistry(AgentRuntime):
+    """
+    Agent Registry - Owns the OpenAI client and model provider that live for the whole
+    application lifespan, so requests reuse warm connections instead of opening new pools
+    each time
+    """
+
+    def __init__(self):
+        super().__init__(Resilience.from_env(retryable=is_transient))
+        self.http_client: Optional["httpx.AsyncClient"] = None
+        self.client: Optional["openai.AsyncOpenAI"] = None
+        self.provider: Optional[ModelProvider] = None
+        self.metrics = UsageMetrics()
+
+    async def build_adapter(self) -> AgentAdapter:
+        api_key = os.getenv("OPENAI_API_KEY")
+        limiter = build_limiter()
+        if api_key:
+            # Imported here so keyless workers, and the health check, never load the SDK
+            import openai
+
+            self.http_client = build_http_client()
+            # Retries are handled by the resilience layer, so the SDK's own are off
+            self.client = openai.AsyncOpenAI(
+                api_key=api_key, http_client=self.http_client, max_retries=0
+            )
+            self.provider = OpenAIProvider(
+                self.client,
+                model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+                limiter=limiter,
+            )
+        else:
+            # Without a key, fall back to the deterministic local provider
+            self.provider = FakeProvider(limiter=limiter)
+        # Benchmarks simulate model failures and stalls via ARENA_FAKE_FAULTS, as well
+        # as in the searches
+        faults = FaultModel.from_env()
+        if faults is not None:
+            inject_faults(self.provider, faults, "_complete")
+        # ARENA_CASSETTE records model calls, or replays them without an API key
+        if self.cassette is not None:
+            use_cassette(
+                self.provider,
+                self.cassette,
+                "_complete",
+                encode=dataclasses.asdict,
+                decode=lambda data: Completion(**data),
+            )
+        # Retry transient model failures, then count tokens and cost of every call, per
+        # plan and per agent, once
+        self.provider = ResilientProvider(self.provider, self.resilience)
+        self.provider = MeteredProvider(self.provider, self.metrics)
+        token_budget = os.getenv("PLAN_TOKEN_BUDGET")
+        return OpenAIAgentsAdapter(
+            provider=self.provider,
+            cache=self.cache,
+            token_budget=int(token_budget) if token_budget else None,
+        )
+
+    async def build_warmup_adapter(self) -> AgentAdapter:
+        # The fake provider, metered into its own metrics, stands in for the model
+        return OpenAIAgentsAdapter(provider=MeteredProvider(FakeProvider()))
+
+    def render_metrics(self) -> str:
+        return self.metrics.render() + super().render_metrics()
+
+    async def shutdown(self) -> None:
+        await super().shutdown()
+        if self.provider is not None:
+            await self.provider.close()
+            self.provider = None
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
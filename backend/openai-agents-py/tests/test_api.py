@@ -0,0 +1,111 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+
+def events(response) -> list:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_a_batch_reports_invalid_items_in_their_own_event(client, plan_body):
+    invalid = {**plan_body, "budget": "a lot"}
+    response = client.post("/plan/batch", json={"requests": [invalid, plan_body]})
+
+    assert response.status_code == 200
+    *items, done = events(response)
+    by_index = {item["index"]: item for item in items}
+    assert by_index[0]["status"] == "error"
+    assert [error["loc"] for error in by_index[0]["detail"]] == [["budget"]]
+    assert by_index[1]["status"] == "ok"
+    assert by_index[1]["data"]["summary"]
+    assert (done["total"], done["failed"]) == (2, 1)
+
+
+def test_an_unchanged_plan_answers_304(client, plan_body):
+    first = client.post("/plan", json=plan_body)
+    etag = first.headers["etag"]
+
+    unchanged = client.post(
+        "/plan", json=plan_body, headers={"If-None-Match": f'"other", {etag}'}
+    )
+    changed = client.post(
+        "/plan", json={**plan_body, "budget": 5000}, headers={"If-None-Match": etag}
+    )
+
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == etag
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_known_api_keys_get_their_own_rate_limit(make_client, plan_body):
+    client = make_client(
+        RATE_LIMIT_PER_SECOND="0.01",
+        RATE_LIMIT_BURST="1",
+        ADMISSION_API_KEYS="team-a,team-b",
+    )
+
+    def post(api_key: str) -> int:
+        return client.post(
+            "/plan", json=plan_body, headers={"x-api-key": api_key}
+        ).status_code
+
+    assert [post("team-a"), post("team-a"), post("team-b")] == [200, 429, 200]
+    # Unknown keys all share the address's bucket
+    assert [post("guess-1"), post("guess-2")] == [200, 429]
+
+
+def test_a_request_that_waits_too_long_gets_503(make_client, plan_body):
+    client = make_client(
+        ADMISSION_MAX_IN_FLIGHT="1",
+        ADMISSION_QUEUE_TIMEOUT="0.05",
+        ARENA_FAKE_LATENCY="fixed:300",
+    )
+
+    with ThreadPoolExecutor(2) as pool:
+        responses = list(
+            pool.map(
+                lambda index: client.post(
+                    "/plan", json={**plan_body, "destination": f"City {index}"}
+                ),
+                range(2),
+            )
+        )
+
+    assert sorted(response.status_code for response in responses) == [200, 503]
+    timed_out = next(response for response in responses if response.status_code == 503)
+    assert timed_out.json()["reason"] == "queue_timeout"
+    assert "retry-after" in timed_out.headers
+    metrics = client.get("/metrics").text
+    assert 'arena_admission_rejected_total{reason="queue_timeout"} 1' in metrics
+
+
+def test_a_batch_cannot_exceed_the_client_cap(make_client, plan_body):
+    client = make_client(
+        ADMISSION_CLIENT_MAX_IN_FLIGHT="2", ARENA_FAKE_LATENCY="fixed:50"
+    )
+    trips = [{**plan_body, "destination": f"City {index}"} for index in range(6)]
+
+    response = client.post("/plan/batch", json={"requests": trips, "concurrency": 6})
+    *items, done = events(response)
+
+    # The batch runs at most two plans at once, so none is turned away
+    assert done["failed"] == 0
+    metrics = client.get("/metrics").text
+    assert "arena_admission_admitted_total 6" in metrics
+
+
+def test_plan_sessions_and_options_are_served(client, plan_body):
+    created = client.post("/plan/sessions", json=plan_body).json()
+    session_id = created["metadata"]["session_id"]
+
+    edited = client.patch(f"/plan/sessions/{session_id}", json={"budget": 5000})
+    result_set = created["metadata"]["result_sets"]["accommodation"]
+    page = client.get(
+        f"/options/accommodation/{result_set}", params={"sort": "price", "limit": 1}
+    ).json()
+
+    assert edited.status_code == 200
+    assert edited.json()["budget"]["total"] == 5000
+    assert page["total"] >= 1 and len(page["items"]) == 1
+    assert client.patch("/plan/sessions/unknown", json={}).status_code == 404
+    assert client.get("/options/accommodation/unknown").status_code == 404
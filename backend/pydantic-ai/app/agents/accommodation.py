@@ -1,4 +1,8 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from app.inventory import InventoryStore
+from arena_core.models import AccommodationResult
+from arena_core.schedule import trip_nights
 
 
 class AccommodationAgent:
@@ -6,6 +10,10 @@ class AccommodationAgent:
     Accommodation Agent - Researches hotels, Airbnbs, and other lodging options
     """
 
+    def __init__(self, inventory: Optional[InventoryStore] = None):
+        # Local inventory snapshot checked before the live search
+        self.inventory = inventory
+
     async def search_accommodations(
         self,
         destination: str,
@@ -13,9 +21,10 @@ class AccommodationAgent:
         check_out: str,
         budget: float,
         preferences: Dict[str, Any],
-    ) -> Dict[str, Any]:
+    ) -> List[AccommodationResult]:
         """
-        Searches for accommodations based on user criteria and constraints.
+        Searches for accommodations based on user criteria and constraints, returning every
+        candidate stay so the coordinator can pick the one that fits the budget.
 
         In a real implementation, this would call external hotel/booking APIs or use LLM to search and filter options.
         For this demo, we'll return mock data.
@@ -23,48 +32,128 @@ class AccommodationAgent:
         # Determine preferred accommodation type from preferences or default to hotel
         accommodation_type = preferences.get("accommodation_type", "hotel")
 
+        if self.inventory is not None:
+            stays = await self.inventory.find_lodging(
+                destination,
+                check_in,
+                check_out,
+                accommodation_type=(
+                    "Hotel"
+                    if accommodation_type.lower() == "hotel"
+                    else "Vacation Rental"
+                ),
+                max_price=budget,
+            )
+            if stays:
+                return stays
+
         # Mock implementation - in a real app would call accommodation search APIs
+        nights = trip_nights(check_in, check_out)
         if accommodation_type.lower() == "hotel":
-            return {
-                "type": "Hotel",
-                "name": f"Grand {destination} Hotel",
-                "address": f"123 Main St, {destination}",
-                "check_in": check_in,
-                "check_out": check_out,
-                "nights": 3,  # Would calculate this from dates in real implementation
-                "room_type": "Deluxe King",
-                "amenities": ["Free WiFi", "Pool", "Fitness Center", "Restaurant"],
-                "total_cost": budget * 0.9,
-                "nightly_rate": budget * 0.3,
-                "rating": 4.5,
-                "images": ["hotel_image_1.jpg", "hotel_image_2.jpg"],
-                "notes": [
-                    "Selected based on location preference",
-                    "Includes breakfast",
-                ],
-            }
+            return [
+                AccommodationResult(
+                    type="Hotel",
+                    name=f"Grand {destination} Hotel",
+                    address=f"123 Main St, {destination}",
+                    check_in=check_in,
+                    check_out=check_out,
+                    nights=nights,
+                    room_type="Deluxe King",
+                    amenities=["Free WiFi", "Pool", "Fitness Center", "Restaurant"],
+                    total_cost=90.0 * nights,
+                    nightly_rate=90.0,
+                    rating=4.5,
+                    images=["hotel_image_1.jpg", "hotel_image_2.jpg"],
+                    notes=[
+                        "Selected based on location preference",
+                        "Includes breakfast",
+                    ],
+                ),
+                AccommodationResult(
+                    type="Hotel",
+                    name=f"The {destination} Palace",
+                    address=f"1 Palace Square, {destination}",
+                    check_in=check_in,
+                    check_out=check_out,
+                    nights=nights,
+                    room_type="Junior Suite",
+                    amenities=["Free WiFi", "Spa", "Pool", "Concierge", "Restaurant"],
+                    total_cost=130.0 * nights,
+                    nightly_rate=130.0,
+                    rating=4.9,
+                    images=["palace_image_1.jpg", "palace_image_2.jpg"],
+                    notes=["Five-star service", "Includes breakfast and late checkout"],
+                ),
+                AccommodationResult(
+                    type="Hotel",
+                    name=f"{destination} City Inn",
+                    address=f"78 Station Rd, {destination}",
+                    check_in=check_in,
+                    check_out=check_out,
+                    nights=nights,
+                    room_type="Standard Double",
+                    amenities=["Free WiFi"],
+                    total_cost=50.0 * nights,
+                    nightly_rate=50.0,
+                    rating=3.9,
+                    images=["inn_image_1.jpg"],
+                    notes=["Close to public transport"],
+                ),
+            ]
         else:  # Airbnb or other rental
-            return {
-                "type": "Vacation Rental",
-                "name": f"Charming {destination} Apartment",
-                "address": f"456 Oak St, {destination}",
-                "check_in": check_in,
-                "check_out": check_out,
-                "nights": 3,  # Would calculate this from dates in real implementation
-                "property_type": "Entire apartment",
-                "amenities": [
-                    "Free WiFi",
-                    "Kitchen",
-                    "Washer/Dryer",
-                    "Air Conditioning",
-                ],
-                "total_cost": budget * 0.85,
-                "nightly_rate": budget * 0.28,
-                "rating": 4.7,
-                "images": ["rental_image_1.jpg", "rental_image_2.jpg"],
-                "notes": [
-                    "Self check-in with keypad",
-                    "Close to downtown",
-                    "Superhost",
-                ],
-            }
+            return [
+                AccommodationResult(
+                    type="Vacation Rental",
+                    name=f"Charming {destination} Apartment",
+                    address=f"456 Oak St, {destination}",
+                    check_in=check_in,
+                    check_out=check_out,
+                    nights=nights,
+                    property_type="Entire apartment",
+                    amenities=[
+                        "Free WiFi",
+                        "Kitchen",
+                        "Washer/Dryer",
+                        "Air Conditioning",
+                    ],
+                    total_cost=84.0 * nights,
+                    nightly_rate=84.0,
+                    rating=4.7,
+                    images=["rental_image_1.jpg", "rental_image_2.jpg"],
+                    notes=[
+                        "Self check-in with keypad",
+                        "Close to downtown",
+                        "Superhost",
+                    ],
+                ),
+                AccommodationResult(
+                    type="Vacation Rental",
+                    name=f"{destination} Riverside Loft",
+                    address=f"9 Quay St, {destination}",
+                    check_in=check_in,
+                    check_out=check_out,
+                    nights=nights,
+                    property_type="Entire loft",
+                    amenities=["Free WiFi", "Kitchen", "Balcony", "River view"],
+                    total_cost=110.0 * nights,
+                    nightly_rate=110.0,
+                    rating=4.9,
+                    images=["loft_image_1.jpg", "loft_image_2.jpg"],
+                    notes=["Superhost", "Walking distance to the old town"],
+                ),
+                AccommodationResult(
+                    type="Vacation Rental",
+                    name=f"Cozy {destination} Studio",
+                    address=f"210 Elm St, {destination}",
+                    check_in=check_in,
+                    check_out=check_out,
+                    nights=nights,
+                    property_type="Private studio",
+                    amenities=["Free WiFi", "Kitchenette"],
+                    total_cost=47.0 * nights,
+                    nightly_rate=47.0,
+                    rating=4.1,
+                    images=["studio_image_1.jpg"],
+                    notes=["Self check-in"],
+                ),
+            ]
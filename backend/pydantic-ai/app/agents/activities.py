@@ -1,4 +1,7 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from app.inventory import InventoryStore
+from arena_core.models import ActivitiesResult, Activity, Restaurant
 
 
 class ActivitiesAgent:
@@ -6,6 +9,10 @@ class ActivitiesAgent:
     Activities Agent - Discovers popular attractions, restaurants, and experiences
     """
 
+    def __init__(self, inventory: Optional[InventoryStore] = None):
+        # Local inventory snapshot checked before the live search
+        self.inventory = inventory
+
     async def search_activities(
         self,
         destination: str,
@@ -13,9 +20,10 @@ class ActivitiesAgent:
         end_date: str,
         budget: float,
         preferences: Dict[str, Any],
-    ) -> Dict[str, Any]:
+    ) -> List[ActivitiesResult]:
         """
         Searches for activities, attractions, and dining options based on user criteria and constraints.
+        Returns several activity packages so the coordinator can pick the one that fits the budget.
 
         In a real implementation, this would call external activity APIs or use LLM to search and filter options.
         For this demo, we'll return mock data.
@@ -23,78 +31,125 @@ class ActivitiesAgent:
         # Extract preferences for activities
         activity_preferences = preferences.get("activities", ["sightseeing", "dining"])
 
+        if self.inventory is not None:
+            found = await self.inventory.find_activities(
+                destination,
+                start_date,
+                end_date,
+                categories=preferences.get("activity_categories"),
+                max_price=budget,
+            )
+            if found:
+                return self._packages(found)
+
         # Mock implementation - in a real app would call activity search APIs
         activities = [
-            {
-                "name": f"{destination} Museum of Art",
-                "category": "Attraction",
-                "description": "World-renowned art museum featuring local and international exhibits",
-                "location": f"Art District, {destination}",
-                "price": budget * 0.05,
-                "duration": "3 hours",
-                "rating": 4.8,
-                "images": ["museum_1.jpg", "museum_2.jpg"],
-                "date": start_date,
-            },
-            {
-                "name": f"{destination} Culinary Tour",
-                "category": "Food & Drink",
-                "description": "Guided tour of local cuisine and food markets",
-                "location": f"Downtown, {destination}",
-                "price": budget * 0.1,
-                "duration": "4 hours",
-                "rating": 4.9,
-                "images": ["food_tour_1.jpg", "food_tour_2.jpg"],
-                "date": start_date,
-            },
-            {
-                "name": f"{destination} Harbor Cruise",
-                "category": "Entertainment",
-                "description": "Scenic boat tour of the harbor and coastline",
-                "location": f"Harbor, {destination}",
-                "price": budget * 0.07,
-                "duration": "2 hours",
-                "rating": 4.7,
-                "images": ["cruise_1.jpg", "cruise_2.jpg"],
-                "date": end_date,
-            },
+            Activity(
+                name=f"{destination} Museum of Art",
+                category="Attraction",
+                description="World-renowned art museum featuring local and international exhibits",
+                location=f"Art District, {destination}",
+                price=15.0,
+                duration="3 hours",
+                rating=4.8,
+                images=["museum_1.jpg", "museum_2.jpg"],
+                date=start_date,
+            ),
+            Activity(
+                name=f"{destination} Culinary Tour",
+                category="Food & Drink",
+                description="Guided tour of local cuisine and food markets",
+                location=f"Downtown, {destination}",
+                price=30.0,
+                duration="4 hours",
+                rating=4.9,
+                images=["food_tour_1.jpg", "food_tour_2.jpg"],
+                date=start_date,
+            ),
+            Activity(
+                name=f"{destination} Harbor Cruise",
+                category="Entertainment",
+                description="Scenic boat tour of the harbor and coastline",
+                location=f"Harbor, {destination}",
+                price=21.0,
+                duration="2 hours",
+                rating=4.7,
+                images=["cruise_1.jpg", "cruise_2.jpg"],
+                date=end_date,
+            ),
         ]
 
         # Add dining options
         restaurants = [
-            {
-                "name": f"The {destination} Grill",
-                "category": "Restaurant",
-                "cuisine": "Local",
-                "description": "Upscale dining featuring local specialties",
-                "location": f"Downtown, {destination}",
-                "price_range": "$$",
-                "rating": 4.6,
-                "images": ["restaurant_1.jpg", "restaurant_2.jpg"],
-                "recommended_dishes": ["Local fish", "Regional stew"],
-            },
-            {
-                "name": "Cafe Internationale",
-                "category": "Restaurant",
-                "cuisine": "International",
-                "description": "Casual dining with dishes from around the world",
-                "location": f"Tourist District, {destination}",
-                "price_range": "$$",
-                "rating": 4.5,
-                "images": ["cafe_1.jpg", "cafe_2.jpg"],
-                "recommended_dishes": ["Pasta", "Steak"],
-            },
+            Restaurant(
+                name=f"The {destination} Grill",
+                category="Restaurant",
+                cuisine="Local",
+                description="Upscale dining featuring local specialties",
+                location=f"Downtown, {destination}",
+                price_range="$$",
+                rating=4.6,
+                images=["restaurant_1.jpg", "restaurant_2.jpg"],
+                recommended_dishes=["Local fish", "Regional stew"],
+            ),
+            Restaurant(
+                name="Cafe Internationale",
+                category="Restaurant",
+                cuisine="International",
+                description="Casual dining with dishes from around the world",
+                location=f"Tourist District, {destination}",
+                price_range="$$",
+                rating=4.5,
+                images=["cafe_1.jpg", "cafe_2.jpg"],
+                recommended_dishes=["Pasta", "Steak"],
+            ),
         ]
 
-        # Calculate total cost
-        total_cost = sum([activity["price"] for activity in activities])
+        private_tour = Activity(
+            name=f"Private {destination} Day Tour",
+            category="Tour",
+            description="Full-day guided tour with a private local guide",
+            location=f"Hotel pickup, {destination}",
+            price=60.0,
+            duration="8 hours",
+            rating=5.0,
+            images=["private_tour_1.jpg"],
+            date=end_date,
+        )
 
-        return {
-            "activities": activities,
-            "dining": restaurants,
-            "total_cost": total_cost,
-            "notes": [
-                "Activities selected based on preferences",
-                "Restaurant reservations recommended",
-            ],
-        }
+        museum, _, cruise = activities
+        packages = [
+            (activities, "Activities selected based on preferences"),
+            ([museum, cruise], "Essential sights only to keep costs down"),
+            (activities + [private_tour], "Includes a private guided day tour"),
+        ]
+        return [
+            ActivitiesResult(
+                activities=package,
+                dining=restaurants,
+                total_cost=sum([activity.price for activity in package]),
+                notes=[note, "Restaurant reservations recommended"],
+            )
+            for package, note in packages
+        ]
+
+    def _packages(self, activities: List[Activity]) -> List[ActivitiesResult]:
+        """
+        Groups inventory activities, best rated first, into a top-rated and a
+        budget package
+        """
+        top_rated = activities[:3]
+        cheapest = sorted(activities, key=lambda activity: activity.price)[:3]
+        packages = [(top_rated, "Top-rated activities from the local inventory")]
+        if cheapest != top_rated:
+            packages.append(
+                (cheapest, "Lowest-priced activities from the local inventory")
+            )
+        return [
+            ActivitiesResult(
+                activities=package,
+                total_cost=sum([activity.price for activity in package]),
+                notes=[note],
+            )
+            for package, note in packages
+        ]
@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Optional
+
+from app.agents.accommodation import AccommodationAgent
+from app.agents.activities import ActivitiesAgent
+from app.agents.flight import FlightResearchAgent
+from arena_core.engine import AgentAdapter
+
+
+class PydanticAIAdapter(AgentAdapter):
+    """
+    Pydantic AI Adapter - Delegates each itinerary section to its specialist agent. The
+    plan engine from arena-core runs them and synthesizes the itinerary
+    """
+
+    def __init__(
+        self,
+        flight_agent: Optional[FlightResearchAgent] = None,
+        accommodation_agent: Optional[AccommodationAgent] = None,
+        activities_agent: Optional[ActivitiesAgent] = None,
+    ):
+        self.flight_agent = flight_agent or FlightResearchAgent()
+        self.accommodation_agent = accommodation_agent or AccommodationAgent()
+        self.activities_agent = activities_agent or ActivitiesAgent()
+
+    async def search(
+        self,
+        section: str,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: float,
+        preferences: Dict[str, Any],
+    ) -> List[Any]:
+        if section == "transportation":
+            return await self.flight_agent.search_flights(
+                origin=preferences.get("origin", "New York"),
+                destination=destination,
+                departure_date=start_date,
+                return_date=end_date,
+                budget=budget,
+                preferences=preferences,
+            )
+        if section == "accommodation":
+            return await self.accommodation_agent.search_accommodations(
+                destination=destination,
+                check_in=start_date,
+                check_out=end_date,
+                budget=budget,
+                preferences=preferences,
+            )
+        return await self.activities_agent.search_activities(
+            destination=destination,
+            start_date=start_date,
+            end_date=end_date,
+            budget=budget,
+            preferences=preferences,
+        )
@@ -1,4 +1,42 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from app.inventory import InventoryStore
+from arena_core.models import FlightEndpoint, FlightLeg, FlightResult
+
+# Mock fares: (airline, flight numbers, outbound times, return times, duration,
+# fare per leg in USD, rating, notes)
+MOCK_FARES = [
+    (
+        "Demo Airlines",
+        ("DA101", "DA102"),
+        ("08:00:00", "12:00:00"),
+        ("14:00:00", "18:00:00"),
+        "4h 00m",
+        180.0,
+        4.4,
+        ["Direct flights selected based on preference", "Economy class tickets"],
+    ),
+    (
+        "Demo Airlines",
+        ("DA301", "DA302"),
+        ("10:00:00", "14:00:00"),
+        ("16:00:00", "20:00:00"),
+        "4h 00m",
+        260.0,
+        4.8,
+        ["Direct flights", "Premium economy tickets with checked bags"],
+    ),
+    (
+        "Budget Air",
+        ("BA717", "BA718"),
+        ("06:00:00", "13:30:00"),
+        ("11:00:00", "18:30:00"),
+        "7h 30m",
+        110.0,
+        3.6,
+        ["One stop each way", "Economy class tickets, carry-on only"],
+    ),
+]
 
 
 class FlightResearchAgent:
@@ -6,6 +44,10 @@ class FlightResearchAgent:
     Flight Research Agent - Finds optimal flight options based on user constraints
     """
 
+    def __init__(self, inventory: Optional[InventoryStore] = None):
+        # Local inventory snapshot checked before the live search
+        self.inventory = inventory
+
     async def search_flights(
         self,
         origin: str,
@@ -14,46 +56,66 @@ class FlightResearchAgent:
         return_date: str,
         budget: float,
         preferences: Dict[str, Any],
-    ) -> Dict[str, Any]:
+    ) -> List[FlightResult]:
         """
-        Searches for flights based on user criteria and constraints.
+        Searches for flights based on user criteria and constraints, returning every
+        candidate round trip so the coordinator can pick the one that fits the budget.
 
         In a real implementation, this would call external flight APIs or use LLM to search and filter options.
         For this demo, we'll return mock data.
         """
+        if self.inventory is not None:
+            flights = await self.inventory.find_flights(
+                origin, destination, departure_date, return_date, max_price=budget
+            )
+            if flights:
+                return flights
+
         # Mock implementation - in a real app would call flight search APIs
-        return {
-            "outbound": {
-                "airline": "Demo Airlines",
-                "flight_number": "DA101",
-                "departure": {
-                    "airport": f"{origin} International Airport",
-                    "time": f"{departure_date}T08:00:00",
-                },
-                "arrival": {
-                    "airport": f"{destination} International Airport",
-                    "time": f"{departure_date}T12:00:00",
-                },
-                "duration": "4h 00m",
-                "price": budget * 0.45,
-            },
-            "return": {
-                "airline": "Demo Airlines",
-                "flight_number": "DA102",
-                "departure": {
-                    "airport": f"{destination} International Airport",
-                    "time": f"{return_date}T14:00:00",
-                },
-                "arrival": {
-                    "airport": f"{origin} International Airport",
-                    "time": f"{return_date}T18:00:00",
-                },
-                "duration": "4h 00m",
-                "price": budget * 0.45,
-            },
-            "total_cost": budget * 0.9,
-            "notes": [
-                "Direct flights selected based on preference",
-                "Economy class tickets",
-            ],
-        }
+        candidates = []
+        for (
+            airline,
+            (outbound_number, return_number),
+            (outbound_departs, outbound_arrives),
+            (return_departs, return_arrives),
+            duration,
+            fare,
+            rating,
+            notes,
+        ) in MOCK_FARES:
+            candidates.append(
+                FlightResult(
+                    outbound=FlightLeg(
+                        airline=airline,
+                        flight_number=outbound_number,
+                        departure=FlightEndpoint(
+                            airport=f"{origin} International Airport",
+                            time=f"{departure_date}T{outbound_departs}",
+                        ),
+                        arrival=FlightEndpoint(
+                            airport=f"{destination} International Airport",
+                            time=f"{departure_date}T{outbound_arrives}",
+                        ),
+                        duration=duration,
+                        price=fare,
+                    ),
+                    return_flight=FlightLeg(
+                        airline=airline,
+                        flight_number=return_number,
+                        departure=FlightEndpoint(
+                            airport=f"{destination} International Airport",
+                            time=f"{return_date}T{return_departs}",
+                        ),
+                        arrival=FlightEndpoint(
+                            airport=f"{origin} International Airport",
+                            time=f"{return_date}T{return_arrives}",
+                        ),
+                        duration=duration,
+                        price=fare,
+                    ),
+                    total_cost=fare * 2,
+                    rating=rating,
+                    notes=list(notes),
+                )
+            )
+        return candidates
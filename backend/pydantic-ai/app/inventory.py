@@ -0,0 +1,294 @@
+"""
+Local inventory snapshot that the agents query before making live calls.
+
+Snapshots are loaded from JSON-lines provider dumps into a SQLite file with one indexed
+table per entity type. Workers open the file read-only with memory-mapped I/O, so every
+uvicorn worker on a host shares the same pages through the OS page cache.
+
+Usage:
+  python -m app.inventory inventory.sqlite3 --flights flights.jsonl \\
+      --lodging lodging.jsonl --activities activities.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from arena_core.cache import normalize_text
+from arena_core.models import AccommodationResult, Activity, FlightResult
+from arena_core.schedule import trip_nights
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS flights ("
+    "origin TEXT NOT NULL, destination TEXT NOT NULL, departure_date TEXT NOT NULL, "
+    "return_date TEXT NOT NULL, price REAL NOT NULL, rating REAL, payload TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS flights_route ON flights "
+    "(destination, origin, departure_date, return_date, price)",
+    "CREATE TABLE IF NOT EXISTS lodging ("
+    "destination TEXT NOT NULL, type TEXT NOT NULL, available_from TEXT NOT NULL, "
+    "available_to TEXT NOT NULL, nightly_rate REAL NOT NULL, rating REAL, "
+    "payload TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS lodging_destination ON lodging "
+    "(destination, type, nightly_rate)",
+    "CREATE TABLE IF NOT EXISTS activities ("
+    "destination TEXT NOT NULL, category TEXT NOT NULL, date TEXT, price REAL NOT NULL, "
+    "rating REAL, payload TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS activities_destination ON activities "
+    "(destination, category, price)",
+]
+
+
+def _price_band(
+    column: str, min_price: Optional[float], max_price: Optional[float]
+) -> Tuple[str, List[Any]]:
+    """
+    SQL clauses limiting `column` to a price band, and their parameters
+    """
+    clauses, params = [], []
+    if min_price is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(min_price)
+    if max_price is not None:
+        clauses.append(f"{column} <= ?")
+        params.append(max_price)
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+class InventoryStore:
+    """
+    Inventory Store - Indexed snapshot of flights, lodging and activities.
+
+    Lookups are by destination and date range, with optional price band, category and
+    accommodation type filters, and return the same models the agents produce. Hit and
+    miss counters per entity type are kept for /cache/stats.
+    """
+
+    def __init__(self, path: str, readonly: bool = True, mmap_size: int = 256 << 20):
+        self.path = path
+        self._lock = threading.Lock()
+        if readonly:
+            self._conn = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._conn:
+                for statement in SCHEMA:
+                    self._conn.execute(statement)
+        # Memory-mapped reads let workers share the snapshot's pages
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional["InventoryStore"]:
+        path = os.getenv("INVENTORY_PATH")
+        if not path or not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def load(self, entity: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Bulk-loads provider dump rows into one table. Each row holds the fields of the
+        entity's model plus the fields it is indexed by
+        """
+        insert = {
+            "flights": (
+                "INSERT INTO flights VALUES (?, ?, ?, ?, ?, ?, ?)",
+                lambda row: (
+                    normalize_text(row["origin"]),
+                    normalize_text(row["destination"]),
+                    row["departure_date"],
+                    row["return_date"],
+                    row["total_cost"],
+                    row.get("rating"),
+                    json.dumps(row),
+                ),
+            ),
+            "lodging": (
+                "INSERT INTO lodging VALUES (?, ?, ?, ?, ?, ?, ?)",
+                lambda row: (
+                    normalize_text(row["destination"]),
+                    normalize_text(row["type"]),
+                    row["available_from"],
+                    row["available_to"],
+                    row["nightly_rate"],
+                    row.get("rating"),
+                    json.dumps(row),
+                ),
+            ),
+            "activities": (
+                "INSERT INTO activities VALUES (?, ?, ?, ?, ?, ?)",
+                lambda row: (
+                    normalize_text(row["destination"]),
+                    normalize_text(row["category"]),
+                    row.get("date"),
+                    row["price"],
+                    row.get("rating"),
+                    json.dumps(row),
+                ),
+            ),
+        }
+        statement, to_params = insert[entity]
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(statement, map(to_params, rows))
+            return cursor.rowcount
+
+    async def find_flights(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str,
+        return_date: str,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> List[FlightResult]:
+        band, band_params = _price_band("price", min_price, max_price)
+        rows = await self._query(
+            "flights",
+            "SELECT payload FROM flights WHERE destination = ? AND origin = ? "
+            f"AND departure_date = ? AND return_date = ?{band} "
+            "ORDER BY rating DESC, price",
+            (
+                normalize_text(destination),
+                normalize_text(origin),
+                departure_date,
+                return_date,
+                *band_params,
+            ),
+        )
+        return [FlightResult.model_validate(row) for row in rows]
+
+    async def find_lodging(
+        self,
+        destination: str,
+        check_in: str,
+        check_out: str,
+        accommodation_type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> List[AccommodationResult]:
+        """
+        Properties available for the whole stay. The price band applies to the total
+        cost of the stay
+        """
+        nights = trip_nights(check_in, check_out)
+        band, band_params = _price_band(
+            "nightly_rate",
+            min_price / nights if min_price is not None and nights else None,
+            max_price / nights if max_price is not None and nights else None,
+        )
+        type_filter, type_params = "", []
+        if accommodation_type:
+            type_filter = " AND type = ?"
+            type_params = [normalize_text(accommodation_type)]
+        rows = await self._query(
+            "lodging",
+            "SELECT payload FROM lodging WHERE destination = ?"
+            f"{type_filter}{band} AND available_from <= ? AND available_to >= ? "
+            "ORDER BY rating DESC, nightly_rate",
+            (
+                normalize_text(destination),
+                *type_params,
+                *band_params,
+                check_in,
+                check_out,
+            ),
+        )
+        return [
+            AccommodationResult.model_validate(
+                {
+                    **row,
+                    "check_in": check_in,
+                    "check_out": check_out,
+                    "nights": nights,
+                    "total_cost": row["nightly_rate"] * nights,
+                }
+            )
+            for row in rows
+        ]
+
+    async def find_activities(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        categories: Optional[Sequence[str]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> List[Activity]:
+        """
+        Activities on a day of the trip, or available any day when they have no date
+        """
+        band, band_params = _price_band("price", min_price, max_price)
+        category_filter, category_params = "", []
+        if categories:
+            category_filter = f" AND category IN ({', '.join('?' * len(categories))})"
+            category_params = [normalize_text(category) for category in categories]
+        rows = await self._query(
+            "activities",
+            "SELECT payload FROM activities WHERE destination = ?"
+            f"{category_filter}{band} "
+            "AND (date IS NULL OR date BETWEEN ? AND ?) ORDER BY rating DESC, price",
+            (
+                normalize_text(destination),
+                *category_params,
+                *band_params,
+                start_date,
+                end_date,
+            ),
+        )
+        return [
+            Activity.model_validate({**row, "date": row.get("date") or start_date})
+            for row in rows
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"path": self.path, "entities": self.stats}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def _query(
+        self, entity: str, sql: str, params: Sequence[Any]
+    ) -> List[Dict[str, Any]]:
+        rows = await asyncio.to_thread(self._fetch, sql, params)
+        counts = self.stats.setdefault(entity, {"hits": 0, "misses": 0})
+        counts["hits" if rows else "misses"] += 1
+        return rows
+
+    def _fetch(self, sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("path", help="SQLite file to create or extend")
+    for entity in ("flights", "lodging", "activities"):
+        parser.add_argument(f"--{entity}", help=f"JSON-lines dump of {entity}")
+    args = parser.parse_args(argv)
+
+    store = InventoryStore(args.path, readonly=False)
+    try:
+        for entity in ("flights", "lodging", "activities"):
+            dump = getattr(args, entity)
+            if dump:
+                with open(dump) as lines:
+                    rows = (json.loads(line) for line in lines if line.strip())
+                    print(f"{entity}: {store.load(entity, rows)} rows")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
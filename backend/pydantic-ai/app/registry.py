@@ -0,0 +1,45 @@
+from typing import Any, Dict, Optional
+
+from app.agents.accommodation import AccommodationAgent
+from app.agents.activities import ActivitiesAgent
+from app.agents.adapter import PydanticAIAdapter
+from app.agents.flight import FlightResearchAgent
+from app.inventory import InventoryStore
+from arena_core.api import AgentRuntime
+from arena_core.engine import AgentAdapter
+
+
+class AgentRegistry(AgentRuntime):
+    """
+    Agent Registry - Owns the agents and inventory snapshot that live for
+    the whole application lifespan, so requests reuse warm instances
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.inventory: Optional[InventoryStore] = None
+
+    async def build_adapter(self) -> AgentAdapter:
+        # Agents query the local inventory snapshot first when INVENTORY_PATH is set
+        self.inventory = InventoryStore.from_env()
+        return PydanticAIAdapter(
+            flight_agent=FlightResearchAgent(inventory=self.inventory),
+            accommodation_agent=AccommodationAgent(inventory=self.inventory),
+            activities_agent=ActivitiesAgent(inventory=self.inventory),
+        )
+
+    async def build_warmup_adapter(self) -> AgentAdapter:
+        # The mock searches, without the inventory snapshot and its hit counters
+        return PydanticAIAdapter()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "inventory": self.inventory.snapshot() if self.inventory else None,
+        }
+
+    async def shutdown(self) -> None:
+        await super().shutdown()
+        if self.inventory is not None:
+            self.inventory.close()
+            self.inventory = None
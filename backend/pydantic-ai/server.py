@@ -1,4 +1,5 @@
-import uvicorn
+from arena_core.server import serve
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # Production workers by default; `python server.py --dev` runs one process with reload
+    serve("app.main:app", default_port=8000)
@@ -0,0 +1,44 @@
+import pytest
+from app.registry import AgentRegistry
+from arena_core.api import create_app
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    """
+    Starts a fresh app with the given environment variables, since admission control
+    and the runtime read theirs when the app is built and started
+    """
+    clients = []
+
+    def make(**env: str) -> TestClient:
+        monkeypatch.setenv("JOBS_PATH", ":memory:")
+        monkeypatch.setenv("PREWARM", "off")
+        for name in ("CACHE_PATH", "RATE_LIMIT_PATH", "ARENA_CASSETTE"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        client = TestClient(create_app("Travel Planner", "pydantic-ai", AgentRegistry))
+        clients.append(client.__enter__())
+        return client
+
+    yield make
+    for client in clients:
+        client.__exit__(None, None, None)
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client()
+
+
+@pytest.fixture
+def plan_body():
+    return {
+        "destination": "Lisbon",
+        "startDate": "2025-06-01",
+        "endDate": "2025-06-05",
+        "budget": 3000,
+        "preferences": {"origin": "New York", "activities": ["sightseeing"]},
+    }
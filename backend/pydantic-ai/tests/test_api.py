@@ -0,0 +1,124 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+
+def events(response) -> list:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_a_batch_reports_invalid_items_in_their_own_event(client, plan_body):
+    invalid = {**plan_body, "endDate": "2025-05-01"}
+    response = client.post(
+        "/plan/batch", json={"requests": [plan_body, invalid, {"budget": 10}]}
+    )
+
+    assert response.status_code == 200
+    *items, done = events(response)
+    by_index = {item["index"]: item for item in items}
+    assert by_index[0]["status"] == "ok"
+    assert by_index[0]["data"]["destination"] == "Lisbon"
+    assert by_index[1]["status"] == "error"
+    assert "endDate must not be before startDate" in by_index[1]["detail"][0]["msg"]
+    assert by_index[2]["status"] == "error"
+    assert {error["loc"][0] for error in by_index[2]["detail"]} >= {"destination"}
+    assert (done["event"], done["total"], done["failed"]) == ("done", 3, 2)
+
+
+def test_an_empty_batch_is_rejected(client):
+    assert client.post("/plan/batch", json={"requests": []}).status_code == 422
+
+
+def test_an_unchanged_plan_answers_304(client, plan_body):
+    first = client.post("/plan", json=plan_body)
+    etag = first.headers["etag"]
+
+    unchanged = client.post("/plan", json=plan_body, headers={"If-None-Match": etag})
+    stale = client.post(
+        "/plan", json=plan_body, headers={"If-None-Match": 'W/"stale-1"'}
+    )
+    other_fields = client.post(
+        "/plan?fields=budget", json=plan_body, headers={"If-None-Match": etag}
+    )
+
+    assert first.status_code == 200 and etag.startswith('W/"')
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == etag and not unchanged.content
+    assert stale.status_code == 200
+    assert other_fields.status_code == 200
+
+
+def test_a_client_over_its_rate_limit_gets_429(make_client, plan_body):
+    client = make_client(RATE_LIMIT_PER_SECOND="0.01", RATE_LIMIT_BURST="1")
+
+    assert client.post("/plan", json=plan_body).status_code == 200
+    limited = client.post("/plan", json=plan_body)
+    # An unknown API key does not buy a fresh bucket
+    other_key = client.post("/plan", json=plan_body, headers={"x-api-key": "new"})
+
+    assert limited.status_code == 429
+    assert int(limited.headers["retry-after"]) >= 1
+    assert limited.json()["reason"] == "rate_limited"
+    assert other_key.status_code == 429
+    # Health checks are not limited
+    assert client.get("/").status_code == 200
+
+
+def test_a_full_server_sheds_requests_with_503(make_client, plan_body):
+    client = make_client(
+        ADMISSION_MAX_IN_FLIGHT="1",
+        ADMISSION_MAX_QUEUE="0",
+        ARENA_FAKE_LATENCY="fixed:300",
+    )
+
+    with ThreadPoolExecutor(2) as pool:
+        responses = list(
+            pool.map(
+                lambda index: client.post(
+                    "/plan", json={**plan_body, "destination": f"City {index}"}
+                ),
+                range(2),
+            )
+        )
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 503]
+    shed = next(response for response in responses if response.status_code == 503)
+    assert shed.json()["reason"] == "queue_full"
+    assert "retry-after" in shed.headers
+
+
+def test_a_batch_is_charged_per_trip(make_client, plan_body):
+    client = make_client(RATE_LIMIT_PER_SECOND="0.01", RATE_LIMIT_BURST="2")
+    trips = [{**plan_body, "destination": f"City {index}"} for index in range(4)]
+
+    response = client.post("/plan/batch", json={"requests": trips})
+    *items, done = events(response)
+
+    assert response.status_code == 200
+    assert sorted(item["status"] for item in items) == ["error", "error", "ok", "ok"]
+    rejected = [item["detail"] for item in items if item["status"] == "error"]
+    assert {(detail["status"], detail["reason"]) for detail in rejected} == {
+        (429, "rate_limited")
+    }
+    assert done["failed"] == 2
+    # The batch used up the client's tokens
+    assert client.post("/plan", json=plan_body).status_code == 429
+
+
+def test_the_health_check_reports_the_warm_up(make_client):
+    cold = make_client().get("/").json()
+    warm = make_client(PREWARM="blocking").get("/").json()
+
+    assert cold["prewarm"] == {"mode": "off", "state": "off", "elapsed_ms": None}
+    assert warm["prewarm"]["state"] == "done"
+    assert warm["prewarm"]["elapsed_ms"] > 0
+
+
+def test_a_conditional_request_counts_one_plan_lookup(client, plan_body):
+    etag = client.post("/plan", json=plan_body).headers["etag"]
+    client.post("/plan", json=plan_body, headers={"If-None-Match": etag})
+    client.post("/plan", json=plan_body, headers={"If-None-Match": 'W/"stale-1"'})
+
+    plan = client.get("/cache/stats").json()["namespaces"]["plan"]
+    # The version probe is not counted; the second plan lookup is
+    assert (plan["hits"], plan["misses"]) == (1, 1)
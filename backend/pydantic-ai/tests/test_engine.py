@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from app.agents.adapter import PydanticAIAdapter
+from arena_core.cache import ResultCache
+from arena_core.engine import PlanEngine
+from arena_core.resilience import LastGood, Resilience, RetryPolicy
+
+TRIP = dict(
+    destination="Lisbon",
+    start_date="2025-06-01",
+    end_date="2025-06-05",
+    budget=3000,
+    preferences={"origin": "New York"},
+)
+
+
+class FlakyAdapter(PydanticAIAdapter):
+    """
+    The mock agents, with an accommodation agent that can be taken down
+    """
+
+    down = False
+
+    async def search(self, section: str, **params):
+        if self.down and section == "accommodation":
+            raise ConnectionError("accommodation agent is down")
+        return await super().search(section, **params)
+
+
+def test_stale_fallbacks_degrade_the_plan_and_are_not_cached():
+    adapter = FlakyAdapter()
+    cache = ResultCache(ttl=0.05)
+    engine = PlanEngine(
+        adapter,
+        cache=cache,
+        resilience=Resilience(
+            retry=RetryPolicy(attempts=1, base_delay=0), fallback=LastGood()
+        ),
+    )
+
+    async def plan():
+        return await engine.plan_trip(**TRIP)
+
+    fresh = asyncio.run(plan())
+    time.sleep(0.1)
+    adapter.down = True
+    stale = asyncio.run(plan())
+    adapter.down = False
+    recovered = asyncio.run(plan())
+
+    assert not fresh.metadata["degraded"] and fresh.metadata["stale"] == []
+    # The accommodation comes from the last good result, flagged as such
+    assert stale.accommodation == fresh.accommodation
+    assert stale.metadata["degraded"]
+    assert stale.metadata["stale"] == ["accommodation"]
+    assert "version" not in stale.metadata
+    assert "accommodation" not in stale.metadata["result_sets"]
+    # Neither the stale search nor the plan was cached, so the agent runs again
+    assert recovered.metadata["cache"] == "miss"
+    assert not recovered.metadata["degraded"]